@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""Бенчмарк индикаторов: сверка с эталоном pandas, пропускная способность и аллокации"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from modules import indicators
+from modules.indicators import (
+    NUMBA_AVAILABLE, INDICATOR_COLUMNS, ATR_PERIOD, ADX_PERIOD, BB_PERIOD, BB_STD
+)
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def make_ohlcv(n_bars, seed=42, gap_count=0, nan_count=0):
+    """Синтетический OHLCV ряд: геометрическое блуждание, ценовые гэпы и пропуски (NaN)"""
+    rng = np.random.default_rng(seed)
+    # Волатильность минутных баров: на 1M баров цена остаётся в реалистичном диапазоне,
+    # иначе онлайн-дисперсия pandas сама теряет точность на разнице порядков цены
+    returns = rng.normal(0, 0.001, n_bars)
+    if gap_count:
+        # Гэп открытия после выходных: резкий скачок цены на одном баре
+        returns[rng.integers(1, n_bars, gap_count)] += rng.normal(0, 0.01, gap_count)
+    close = 100 * np.exp(np.cumsum(returns))
+    high = close * (1 + rng.random(n_bars) * 0.005)
+    low = close * (1 - rng.random(n_bars) * 0.005)
+    volume = rng.integers(100, 1000, n_bars).astype(np.float64)
+    if nan_count:
+        for arr in (high, low, close, volume):
+            arr[rng.integers(0, n_bars, nan_count)] = np.nan
+    return pd.DataFrame({'High': high, 'Low': low, 'Close': close, 'Volume': volume})
+
+
+def load_recorded(path=None, symbol=None, interval="1h", period="1mo"):
+    """Записанный ряд из CSV (колонки High/Low/Close) или с Yahoo Finance"""
+    if path:
+        return pd.read_csv(path)
+    import yfinance as yf
+    return yf.Ticker(symbol).history(period=period, interval=interval)
+
+
+def pandas_reference(df):
+    """Эталон: исходный расчёт calculate_indicators на pandas (без заполнения пропусков)"""
+    close = df['Close']
+    high = df['High']
+    low = df['Low']
+    out = {
+        'EMA_20': close.ewm(span=20, adjust=False).mean(),
+        'EMA_50': close.ewm(span=50, adjust=False).mean(),
+        'EMA_100': close.ewm(span=100, adjust=False).mean(),
+    }
+
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    out['RSI'] = 100 - (100 / (1 + gain / loss))
+
+    out['MACD'] = close.ewm(span=12).mean() - close.ewm(span=26).mean()
+    out['MACD_Signal'] = out['MACD'].ewm(span=9).mean()
+
+    low_14 = low.rolling(14).min()
+    high_14 = high.rolling(14).max()
+    out['Stoch_K'] = 100 * ((close - low_14) / (high_14 - low_14))
+    out['Stoch_D'] = out['Stoch_K'].rolling(3).mean()
+
+    out['Resistance'] = high.rolling(10).max()
+    out['Support'] = low.rolling(10).min()
+
+    prev_close = close.shift()
+    true_range = pd.concat(
+        [high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1
+    ).max(axis=1)
+    atr = true_range.ewm(alpha=1.0 / ATR_PERIOD, adjust=False).mean()
+    out['ATR'] = atr
+
+    mid = close.rolling(BB_PERIOD).mean()
+    out['BB_Width'] = 2 * BB_STD * close.rolling(BB_PERIOD).std() / mid
+
+    up_move = high.diff()
+    down_move = -low.diff()
+    plus_dm = up_move.where((up_move > down_move) & (up_move > 0), 0.0)
+    minus_dm = down_move.where((down_move > up_move) & (down_move > 0), 0.0)
+    plus_di = 100 * plus_dm.ewm(alpha=1.0 / ADX_PERIOD, adjust=False).mean() / atr
+    minus_di = 100 * minus_dm.ewm(alpha=1.0 / ADX_PERIOD, adjust=False).mean() / atr
+    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
+    out['ADX'] = dx.ewm(alpha=1.0 / ADX_PERIOD, adjust=False).mean()
+
+    return {name: series.to_numpy(dtype=np.float64) for name, series in out.items()}
+
+
+def _backend_runner(name):
+    def run(df):
+        previous = indicators.get_backend()
+        indicators.set_backend(name)
+        try:
+            return indicators.compute_indicators(df['High'], df['Low'], df['Close'])
+        finally:
+            indicators.set_backend(previous)
+    return run
+
+
+def implementations():
+    """Реализации для сравнения: {название: функция(df) -> {колонка: массив}}"""
+    impls = {'pandas': pandas_reference, 'numpy': _backend_runner('numpy')}
+    # Без numba ядра выполняются интерпретатором - на больших рядах это часы
+    if NUMBA_AVAILABLE:
+        impls['numba'] = _backend_runner('numba')
+    return impls
+
+
+def check_accuracy(expected, actual, rtol=1e-7, atol=1e-9):
+    """Колонки, в которых реализация расходится с эталоном (значения или маска NaN)"""
+    bad = []
+    worst = 0.0
+    for name in INDICATOR_COLUMNS:
+        exp = expected[name]
+        act = actual[name]
+        if not np.array_equal(np.isnan(exp), np.isnan(act)):
+            bad.append(f"{name} (NaN)")
+            continue
+        mask = np.isfinite(exp) & np.isfinite(act)
+        diff = np.abs(exp[mask] - act[mask])
+        if diff.size:
+            worst = max(worst, float(diff.max()))
+            if np.any(diff > atol + rtol * np.abs(exp[mask])):
+                bad.append(name)
+    return bad, worst
+
+
+def measure(func, df, repeat):
+    """Лучшее время вызова и пик памяти, выделенной за один вызов"""
+    func(df)  # прогрев (JIT-компиляция, кэши pandas)
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        func(df)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_case(title, df, impls, repeat):
+    """Сверить и замерить все реализации на одном ряде"""
+    n_bars = len(df)
+    print(f"\n📊 {title}: {n_bars:,} баров")
+    expected = pandas_reference(df)
+
+    failed = False
+    for name, func in impls.items():
+        bad, worst = check_accuracy(expected, func(df))
+        seconds, peak = measure(func, df, repeat)
+        status = "✅" if not bad else "❌"
+        failed = failed or bool(bad)
+        print(
+            f"   {status} {name:<7} {n_bars / seconds:>14,.0f} бар/с | "
+            f"{seconds * 1000:>9.2f} мс | {peak / n_bars:>7.1f} Б/бар "
+            f"({peak / 1_048_576:.1f} МБ/вызов) | откл. {worst:.1e}"
+        )
+        if bad:
+            print(f"      расхождение: {', '.join(bad)}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Длины синтетических рядов в барах")
+    parser.add_argument('--repeat', type=int, default=3, help="Повторов замера времени")
+    parser.add_argument('--csv', help="CSV с записанным рядом (колонки High/Low/Close)")
+    parser.add_argument('--symbol', help="Тикер Yahoo Finance для записанного ряда")
+    parser.add_argument('--interval', default="1h", help="Интервал для --symbol")
+    parser.add_argument('--period', default="1mo", help="Период для --symbol")
+    args = parser.parse_args()
+
+    impls = implementations()
+    print(f"⚙️ Реализации: {', '.join(impls)} | эталон: pandas")
+    print("=" * 50)
+
+    failed = False
+    for n_bars in args.sizes:
+        failed |= run_case("Синтетика", make_ohlcv(n_bars), impls, args.repeat)
+        failed |= run_case(
+            "Синтетика с гэпами и NaN",
+            make_ohlcv(n_bars, seed=7, gap_count=max(1, n_bars // 500), nan_count=max(1, n_bars // 200)),
+            impls, args.repeat
+        )
+
+    if args.csv or args.symbol:
+        recorded = load_recorded(args.csv, args.symbol, args.interval, args.period)
+        if len(recorded) < 20:
+            print(f"\n⚠️ Записанный ряд слишком короткий ({len(recorded)} баров)")
+        else:
+            failed |= run_case(f"Записанный ряд {args.csv or args.symbol}", recorded, impls, args.repeat)
+
+    print("\n" + ("❌ Есть расхождения с эталоном" if failed else "✅ Все реализации совпадают с эталоном"))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 """Crypto Signals Bot Package"""
 from bot.config import *
 from bot.database import db
-from bot.analyzer import analyzer
+from modules.market_analyzer import analyzer
 
 __version__ = "2.0.0"
 __author__ = "Crypto Signals Team"
\ No newline at end of file
@@ -4,13 +4,13 @@ Core wrapper delegating to database module and providing helper methods
 from typing import Optional, Dict, List
 import logging
 
-from bot.database.db import db as Database
+from bot.database.core_db import db as Database
 
 logger = logging.getLogger(__name__)
 
 
 class CryptoSignalsBot:
-    """Light wrapper that delegates to `bot.database.db.Database` instance."""
+    """Light wrapper that delegates to `bot.database.core_db.Database` instance."""
 
     def __init__(self):
         self.db = Database
@@ -74,7 +74,7 @@ class CryptoSignalsBot:
         return self.db.set_setting(*args, **kwargs)
 
     def is_admin(self, user_id: int) -> bool:
-        return self.db.get_setting('admin_users', '') and str(user_id) in self.db.get_setting('admin_users', '').split(',')
+        return user_id in self.db.get_settings().get_int_list('admin_users')
 
 
 # Global instance
@@ -1 +1,8 @@
-# Database package
+"""
+Database package
+database.py - основная БД бота (WAL, единственный писатель, очередь записи),
+core_db.py - БД обёртки bot/core.py для обработчиков bot/handlers
+"""
+from bot.database.database import Database, AsyncDatabase, db, adb
+
+__all__ = ['Database', 'AsyncDatabase', 'db', 'adb']
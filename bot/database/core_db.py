@@ -8,17 +8,86 @@ from datetime import datetime
 from typing import Optional, List, Dict, Any, Tuple
 from contextlib import contextmanager
 
+from modules.migrations import migrate
+from modules.settings_cache import SettingsCache, BUMP_VERSION_SQL
+from bot.database.database import db as signal_db
+
 logger = logging.getLogger(__name__)
 
 DB_NAME = "crypto_signals_bot.db"
 
+# Table columns: (name, definition). New columns go to the end of the list
+# together with a new migration that calls ensure_table again
+USERS_COLUMNS = (
+    ('user_id', 'INTEGER PRIMARY KEY'),
+    ('username', 'TEXT'),
+    ('first_name', 'TEXT'),
+    ('language', "TEXT DEFAULT 'ru'"),
+    ('currency', "TEXT DEFAULT 'RUB'"),
+    ('initial_balance', 'REAL DEFAULT 10000'),
+    ('current_balance', 'REAL'),
+    ('trading_strategy', "TEXT DEFAULT 'martingale'"),
+    ('martingale_multiplier', 'REAL DEFAULT 3.0'),
+    ('percentage_value', 'REAL DEFAULT 2.5'),
+    ('daily_signals_count', 'INTEGER DEFAULT 0'),
+    ('daily_signals_date', 'DATE'),
+    ('is_vip', 'INTEGER DEFAULT 0'),
+    ('referral_registered', 'INTEGER DEFAULT 0'),
+    ('created_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP', 'DATETIME'),
+)
+
+SIGNAL_HISTORY_COLUMNS = (
+    ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    ('user_id', 'INTEGER'),
+    ('asset', 'TEXT'),
+    ('timeframe', 'TEXT'),
+    ('signal_type', 'TEXT'),
+    ('entry_price', 'REAL'),
+    ('stake_amount', 'REAL'),
+    ('result', 'TEXT'),
+    ('confidence', 'REAL'),
+    ('created_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP', 'DATETIME'),
+)
+
+BOT_SETTINGS_COLUMNS = (
+    ('key', 'TEXT PRIMARY KEY'),
+    ('value', 'TEXT'),
+    ('description', 'TEXT'),
+)
+
+SCREENSHOT_ANALYSIS_COLUMNS = (
+    ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    ('user_id', 'INTEGER'),
+    ('analysis_json', 'TEXT'),
+    ('created_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP', 'DATETIME'),
+)
+
+
+def _migrate_base_tables(ctx):
+    ctx.ensure_table('users', USERS_COLUMNS)
+    ctx.ensure_table('signal_history', SIGNAL_HISTORY_COLUMNS,
+                     ('FOREIGN KEY (user_id) REFERENCES users(user_id)',))
+    ctx.ensure_table('bot_settings', BOT_SETTINGS_COLUMNS)
+    ctx.ensure_table('screenshot_analysis', SCREENSHOT_ANALYSIS_COLUMNS,
+                     ('FOREIGN KEY (user_id) REFERENCES users(user_id)',))
+
+
+# Ordered schema migrations; applied ones never change, changes get a new version
+MIGRATIONS = (
+    (1, 'base tables', _migrate_base_tables),
+)
+
 
 class Database:
     """Database manager for the bot"""
     
-    def __init__(self, db_name: str = DB_NAME):
+    def __init__(self, db_name: str = DB_NAME, signal_store=None):
         self.db_name = db_name
+        # signal_history writes go through the main bot database so that
+        # user_signal_stats counters are updated in the same transaction
+        self.signal_store = signal_store or signal_db
         self.conn = self._create_connection()
+        self.settings = SettingsCache()
         self._initialize_tables()
     
     def _create_connection(self) -> sqlite3.Connection:
@@ -28,89 +97,9 @@ class Database:
         return conn
     
     def _initialize_tables(self):
-        """Initialize database tables"""
-        cursor = self.conn.cursor()
-        
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY,
-                username TEXT,
-                first_name TEXT,
-                language TEXT DEFAULT 'ru',
-                currency TEXT DEFAULT 'RUB',
-                initial_balance REAL DEFAULT 10000,
-                current_balance REAL,
-                trading_strategy TEXT DEFAULT 'martingale',
-                martingale_multiplier REAL DEFAULT 3.0,
-                percentage_value REAL DEFAULT 2.5,
-                -- Fields for free quota / referral / VIP
-                daily_signals_count INTEGER DEFAULT 0,
-                daily_signals_date DATE,
-                is_vip INTEGER DEFAULT 0,
-                referral_registered INTEGER DEFAULT 0,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Signal history table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS signal_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                asset TEXT,
-                timeframe TEXT,
-                signal_type TEXT,
-                entry_price REAL,
-                stake_amount REAL,
-                result TEXT,
-                confidence REAL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
-        
-        # Bot settings table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS bot_settings (
-                key TEXT PRIMARY KEY,
-                value TEXT,
-                description TEXT
-            )
-        ''')
-
-        # Screenshot analysis table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS screenshot_analysis (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                analysis_json TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
-        
-        self.conn.commit()
+        """Initialize database tables by applying pending schema migrations"""
+        migrate(self.conn, 'core_db', MIGRATIONS)
         logger.info("✅ Database tables initialized")
-
-        # Run migrations for older DBs (add missing columns if necessary)
-        self._migrate_schema()
-
-    def _migrate_schema(self):
-        """Add missing columns to users table for backward compatibility"""
-        cursor = self.conn.cursor()
-        # helper to add column if not exists
-        def add_column(name, col_type):
-            try:
-                cursor.execute(f"ALTER TABLE users ADD COLUMN {name} {col_type}")
-            except Exception:
-                pass
-
-        add_column('daily_signals_count', 'INTEGER DEFAULT 0')
-        add_column('daily_signals_date', 'DATE')
-        add_column('is_vip', 'INTEGER DEFAULT 0')
-        add_column('referral_registered', 'INTEGER DEFAULT 0')
-        self.conn.commit()
     
     @contextmanager
     def get_cursor(self):
@@ -225,22 +214,14 @@ class Database:
     # Signal operations
     def save_signal(self, user_id: int, asset: str, timeframe: str, signal_type: str, 
                     entry_price: float, stake_amount: float, confidence: float) -> int:
-        """Save signal to history"""
-        with self.get_cursor() as cursor:
-            cursor.execute('''
-                INSERT INTO signal_history 
-                (user_id, asset, timeframe, signal_type, entry_price, stake_amount, confidence)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (user_id, asset, timeframe, signal_type, entry_price, stake_amount, confidence))
-            return cursor.lastrowid
+        """Save signal to history (with the owner's stats counters)"""
+        return self.signal_store.save_signal_to_history(
+            user_id, asset, timeframe, signal_type, confidence, entry_price, stake_amount
+        )
     
     def update_signal_result(self, signal_id: int, result: str):
-        """Update signal result (win/loss)"""
-        with self.get_cursor() as cursor:
-            cursor.execute(
-                'UPDATE signal_history SET result = ? WHERE id = ?',
-                (result, signal_id)
-            )
+        """Update signal result (win/loss) and wait until it is committed"""
+        self.signal_store.update_signal_result(signal_id, result, 0.0).result()
     
     def get_user_signals(self, user_id: int, limit: int = 10) -> List[Dict]:
         """Get user's signal history"""
@@ -262,7 +243,7 @@ class Database:
                     SUM(CASE WHEN result = 'win' THEN 1 ELSE 0 END) as wins,
                     SUM(CASE WHEN result = 'loss' THEN 1 ELSE 0 END) as losses
                 FROM signal_history 
-                WHERE user_id = ? AND result IS NOT NULL
+                WHERE user_id = ? AND result IN ('win', 'loss')
             ''', (user_id,))
             row = cursor.fetchone()
             stats = dict(row) if row else {'total': 0, 'wins': 0, 'losses': 0}
@@ -277,10 +258,12 @@ class Database:
     # Settings operations
     def get_setting(self, key: str, default: str = None) -> Optional[str]:
         """Get bot setting"""
-        with self.get_cursor() as cursor:
-            cursor.execute('SELECT value FROM bot_settings WHERE key = ?', (key,))
-            row = cursor.fetchone()
-            return row['value'] if row else default
+        return self.get_settings().get(key, default)
+    
+    def get_settings(self) -> SettingsCache:
+        """Cached bot settings with typed getters"""
+        self.settings.sync(self.conn)
+        return self.settings
     
     def set_setting(self, key: str, value: str, description: str = ""):
         """Set bot setting"""
@@ -289,6 +272,8 @@ class Database:
                 INSERT OR REPLACE INTO bot_settings (key, value, description)
                 VALUES (?, ?, ?)
             ''', (key, value, description))
+            cursor.execute(BUMP_VERSION_SQL)
+        self.settings.invalidate()
     
     # Admin operations
     def get_all_users(self, limit: int = 100, offset: int = 0) -> List[Dict]:
@@ -0,0 +1,987 @@
+"""Модуль базы данных - все операции с SQLite"""
+import sqlite3
+import logging
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional, Tuple, List, Dict, Any
+
+from modules.performance_index import performance_index
+from modules.write_behind import WriteBehindQueue
+from modules.profile_cache import user_profiles
+from modules.settings_cache import SettingsCache, BUMP_VERSION_SQL
+from modules.migrations import migrate
+from modules.constants import (
+    DB_BUSY_TIMEOUT_MS, DB_CACHE_SIZE_KB, DB_SYNCHRONOUS, DB_EXECUTOR_WORKERS, EXPIRY_SWEEP_BATCH,
+    SHORT_TIMEFRAMES, LONG_TIMEFRAMES
+)
+
+logger = logging.getLogger(__name__)
+
+# Индексы (имя, таблица, столбцы), которые создаёт каждая миграция. Набор
+# версии заморожен: новый индекс - новая миграция со своим кортежем, удаление -
+# миграция с кортежем retired для ensure_indexes (индексы других компонентов
+# - modules/database.py, core_db.py - не трогаются)
+INDEXES_V3 = (
+    # get_user_signal_stats, get_last_pending_signal (ORDER BY signal_date)
+    ('idx_signal_history_user_result_date', 'signal_history', 'user_id, result, signal_date'),
+    # get_user_active_signals (expiration_time по диапазону)
+    ('idx_signal_history_user_result_expiry', 'signal_history', 'user_id, result, expiration_time'),
+    # get_referral_stats
+    ('idx_users_referred_by', 'users', 'referred_by'),
+)
+
+INDEXES_V4 = (
+    # Бэктест по последним часам и свёртка старых снимков в дневные корзины
+    ('idx_market_history_timestamp', 'market_history', 'timestamp'),
+)
+
+INDEXES_V5 = (
+    # sweep_expired_signals: истекающие pending-сигналы всех пользователей
+    ('idx_signal_history_result_expiry', 'signal_history', 'result, expiration_time'),
+)
+
+
+# Столбцы таблиц: (имя, определение). Новый столбец добавляется в конец списка
+# вместе с новой миграцией, которая снова вызывает ensure_table
+USERS_COLUMNS = (
+    ('user_id', 'INTEGER PRIMARY KEY'),
+    ('username', 'TEXT'),
+    ('first_name', 'TEXT'),
+    ('joined_date', 'DATETIME'),
+    ('subscription_end', 'DATETIME'),
+    ('is_premium', 'BOOLEAN DEFAULT 0'),
+    ('free_trials_used', 'INTEGER DEFAULT 0'),
+    ('signals_used', 'INTEGER DEFAULT 0'),
+    ('last_signal_date', 'DATETIME'),
+    ('initial_balance', 'REAL DEFAULT NULL'),
+    ('current_balance', 'REAL DEFAULT NULL'),
+    ('short_base_stake', 'REAL DEFAULT 100'),
+    ('current_martingale_level', 'INTEGER DEFAULT 0'),
+    ('consecutive_losses', 'INTEGER DEFAULT 0'),
+    ('currency', 'TEXT DEFAULT "RUB"'),
+    ('martingale_type', 'INTEGER DEFAULT 3'),
+    ('long_percentage', 'REAL DEFAULT 2.5'),
+    ('subscription_type', 'TEXT DEFAULT NULL'),
+    ('referral_code', 'TEXT DEFAULT NULL'),
+    ('referred_by', 'INTEGER DEFAULT NULL'),
+    ('new_user_discount_used', 'BOOLEAN DEFAULT 0'),
+    ('referral_earnings', 'REAL DEFAULT 0'),
+    ('pocket_option_registered', 'BOOLEAN DEFAULT 0'),
+    ('pocket_option_login', 'TEXT DEFAULT NULL'),
+    ('last_upgrade_offer', 'TEXT DEFAULT NULL'),
+    ('language', 'TEXT DEFAULT "ru"'),
+    ('free_short_signals_today', 'INTEGER DEFAULT 0'),
+    ('free_short_signals_date', 'TEXT DEFAULT NULL'),
+    ('free_long_signals_today', 'INTEGER DEFAULT 0'),
+    ('free_long_signals_date', 'TEXT DEFAULT NULL'),
+    ('banned', 'BOOLEAN DEFAULT 0'),
+    ('trading_strategy', 'TEXT DEFAULT NULL'),
+    ('martingale_multiplier', 'INTEGER DEFAULT 3'),
+    ('martingale_base_stake', 'REAL DEFAULT NULL'),
+    ('percentage_value', 'REAL DEFAULT 2.5'),
+    ('auto_trading_enabled', 'BOOLEAN DEFAULT 0'),
+    ('pocket_option_email', 'TEXT DEFAULT NULL'),
+    ('auto_trading_mode', 'TEXT DEFAULT "demo"'),
+    ('dalembert_base_stake', 'REAL DEFAULT 100'),
+    ('dalembert_unit', 'REAL DEFAULT 50'),
+    ('current_dalembert_level', 'INTEGER DEFAULT 0'),
+    ('auto_trading_strategy', 'TEXT DEFAULT "percentage"'),
+    ('pocket_option_ssid', 'TEXT DEFAULT NULL'),
+    ('pocket_option_connected', 'BOOLEAN DEFAULT 0'),
+    ('ssid_automation_purchased', 'BOOLEAN DEFAULT 0'),
+    ('ssid_automation_purchase_date', 'DATETIME DEFAULT NULL'),
+)
+
+SIGNAL_HISTORY_COLUMNS = (
+    ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    ('user_id', 'INTEGER'),
+    ('asset', 'TEXT'),
+    ('timeframe', 'TEXT'),
+    ('signal_type', 'TEXT'),
+    ('confidence', 'REAL'),
+    ('entry_price', 'REAL'),
+    ('result', 'TEXT'),
+    ('profit_loss', 'REAL'),
+    ('stake_amount', 'REAL'),
+    ('signal_date', 'DATETIME'),
+    ('close_date', 'DATETIME'),
+    ('notes', 'TEXT'),
+    ('expiration_time', 'TEXT'),
+    ('signal_tier', 'TEXT DEFAULT "vip"'),
+    ('raw_score', 'INTEGER'),
+)
+
+SIGNAL_PERFORMANCE_COLUMNS = (
+    ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    ('asset', 'TEXT NOT NULL'),
+    ('timeframe', 'TEXT NOT NULL'),
+    ('total_signals', 'INTEGER DEFAULT 0'),
+    ('wins', 'INTEGER DEFAULT 0'),
+    ('losses', 'INTEGER DEFAULT 0'),
+    ('win_rate', 'REAL DEFAULT 0.0'),
+    ('adaptive_weight', 'REAL DEFAULT 1.0'),
+    ('last_updated', 'TEXT NOT NULL'),
+)
+
+BOT_SETTINGS_COLUMNS = (
+    ('key', 'TEXT PRIMARY KEY'),
+    ('value', 'TEXT'),
+    ('description', 'TEXT'),
+    ('updated_at', 'TEXT'),
+    ('updated_by', 'INTEGER'),
+)
+
+# Снимки сканирований для аналитики (modules/market_history.py)
+MARKET_HISTORY_COLUMNS = (
+    ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    ('asset_symbol', 'TEXT NOT NULL'),
+    ('timeframe', 'TEXT NOT NULL'),
+    ('timestamp', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP', 'TIMESTAMP'),
+    ('price', 'REAL'),
+    ('volatility', 'REAL'),
+    ('volume', 'REAL'),
+    ('avg_volume', 'REAL'),
+    ('volume_ratio', 'REAL'),
+    ('whale_detected', 'INTEGER DEFAULT 0'),
+    ('trend', 'TEXT'),
+    ('rsi', 'REAL'),
+    ('macd', 'REAL'),
+    ('stoch_k', 'REAL'),
+    ('ema_20', 'REAL'),
+    ('ema_50', 'REAL'),
+    ('signal_generated', 'TEXT'),
+    ('confidence', 'REAL'),
+    ('score', 'INTEGER'),
+    ('samples', 'INTEGER DEFAULT 1'),
+    ('bucket', 'TEXT DEFAULT NULL'),
+)
+
+# Счётчики статистики пользователя: обновляются вместе с signal_history
+USER_SIGNAL_STATS_COLUMNS = (
+    ('user_id', 'INTEGER NOT NULL'),
+    ('timeframe_type', 'TEXT NOT NULL'),
+    ('tier', 'TEXT NOT NULL'),
+    ('total_signals', 'INTEGER DEFAULT 0'),
+    ('wins', 'INTEGER DEFAULT 0'),
+    ('losses', 'INTEGER DEFAULT 0'),
+    ('total_profit', 'REAL DEFAULT 0'),
+    ('total_loss', 'REAL DEFAULT 0'),
+    ('confidence_sum', 'REAL DEFAULT 0'),
+    ('confidence_count', 'INTEGER DEFAULT 0'),
+)
+
+
+def ensure_indexes(cursor, indexes, retired=()):
+    """Создать недостающие индексы и удалить выведенные по имени (таблицы, которых ещё нет, пропускаются)"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    existing = {row[0] for row in cursor.fetchall()}
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    tables = {row[0] for row in cursor.fetchall()}
+    managed = {name for name, _, _ in indexes}
+    
+    for name in existing.intersection(retired) - managed:
+        cursor.execute(f'DROP INDEX IF EXISTS {name}')
+        logger.info(f"Dropped retired index {name}")
+    for name, table, columns in indexes:
+        if table in tables:
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})')
+    if managed - existing:
+        cursor.execute('ANALYZE')
+
+
+def timeframe_type(timeframe: str) -> str:
+    """Тип таймфрейма для счётчиков статистики: short, long или other"""
+    if timeframe in SHORT_TIMEFRAMES:
+        return 'short'
+    if timeframe in LONG_TIMEFRAMES:
+        return 'long'
+    return 'other'
+
+
+def bump_user_stats(cursor, user_id: int, timeframe: str, tier: str, total: int = 0, wins: int = 0,
+                    losses: int = 0, profit: float = 0.0, loss: float = 0.0, confidence: float = None):
+    """
+    Добавить приращения к счётчикам user_signal_stats (в транзакции вызывающего).
+    confidence учитывается в среднем, только если задана (как AVG пропускает NULL).
+    """
+    confidence_count = 0 if confidence is None else 1
+    cursor.execute('''
+        INSERT INTO user_signal_stats
+        (user_id, timeframe_type, tier, total_signals, wins, losses, total_profit, total_loss,
+         confidence_sum, confidence_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_id, timeframe_type, tier) DO UPDATE SET
+            total_signals = total_signals + excluded.total_signals,
+            wins = wins + excluded.wins,
+            losses = losses + excluded.losses,
+            total_profit = total_profit + excluded.total_profit,
+            total_loss = total_loss + excluded.total_loss,
+            confidence_sum = confidence_sum + excluded.confidence_sum,
+            confidence_count = confidence_count + excluded.confidence_count
+    ''', (user_id, timeframe_type(timeframe), tier or 'vip', total, wins, losses, profit, loss,
+          confidence or 0, confidence_count))
+
+
+def rebuild_user_stats(cursor):
+    """Пересчитать user_signal_stats по всей signal_history"""
+    short_list = ','.join('?' * len(SHORT_TIMEFRAMES))
+    long_list = ','.join('?' * len(LONG_TIMEFRAMES))
+    cursor.execute('DELETE FROM user_signal_stats')
+    cursor.execute(f'''
+        INSERT INTO user_signal_stats
+        (user_id, timeframe_type, tier, total_signals, wins, losses, total_profit, total_loss,
+         confidence_sum, confidence_count)
+        SELECT user_id,
+               CASE WHEN timeframe IN ({short_list}) THEN 'short'
+                    WHEN timeframe IN ({long_list}) THEN 'long'
+                    ELSE 'other' END,
+               COALESCE(signal_tier, 'vip'),
+               COUNT(*),
+               SUM(CASE WHEN result = 'win' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN result = 'loss' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN result = 'win' THEN COALESCE(profit_loss, 0) ELSE 0 END),
+               SUM(CASE WHEN result = 'loss' THEN COALESCE(profit_loss, 0) ELSE 0 END),
+               SUM(COALESCE(confidence, 0)),
+               COUNT(confidence)
+        FROM signal_history
+        WHERE result IS NOT NULL AND user_id IS NOT NULL
+        GROUP BY 1, 2, 3
+    ''', SHORT_TIMEFRAMES + LONG_TIMEFRAMES)
+
+
+def _migrate_base_tables(ctx):
+    ctx.ensure_table('users', USERS_COLUMNS)
+    ctx.ensure_table('signal_history', SIGNAL_HISTORY_COLUMNS,
+                     ('FOREIGN KEY (user_id) REFERENCES users(user_id)',))
+    ctx.ensure_table('signal_performance', SIGNAL_PERFORMANCE_COLUMNS, ('UNIQUE(asset, timeframe)',))
+    ctx.ensure_table('bot_settings', BOT_SETTINGS_COLUMNS)
+
+
+def _migrate_user_signal_stats(ctx):
+    if ctx.ensure_table('user_signal_stats', USER_SIGNAL_STATS_COLUMNS,
+                        ('PRIMARY KEY (user_id, timeframe_type, tier)',)):
+        rebuild_user_stats(ctx.cursor)
+
+
+def _migrate_confidence_count(ctx):
+    ctx.ensure_table('user_signal_stats', USER_SIGNAL_STATS_COLUMNS)
+    rebuild_user_stats(ctx.cursor)
+
+
+def _migrate_indexes(ctx):
+    ensure_indexes(ctx.cursor, INDEXES_V3)
+
+
+def _migrate_market_history(ctx):
+    ctx.ensure_table('market_history', MARKET_HISTORY_COLUMNS)
+    ensure_indexes(ctx.cursor, INDEXES_V4)
+
+
+def _migrate_expiry_index(ctx):
+    ensure_indexes(ctx.cursor, INDEXES_V5)
+
+
+# Миграции схемы по порядку; применённые не меняются, изменения - новой версией
+MIGRATIONS = (
+    (1, 'base tables', _migrate_base_tables),
+    (2, 'user_signal_stats counters', _migrate_user_signal_stats),
+    (3, 'managed indexes', _migrate_indexes),
+    (4, 'market_history snapshots', _migrate_market_history),
+    (5, 'expiry sweep index', _migrate_expiry_index),
+    (6, 'user_signal_stats confidence count', _migrate_confidence_count),
+)
+
+
+class Database:
+    """Класс для работы с базой данных бота"""
+    
+    def __init__(self, db_path: str = 'crypto_signals_bot.db'):
+        self.db_path = db_path
+        self.performance = performance_index
+        # Соединение на поток для чтения и одно выделенное соединение для записи
+        self._local = threading.local()
+        self._connections = []
+        self._pool_lock = threading.Lock()
+        self._writer = None
+        self._write_lock = threading.RLock()
+        # Профили пользователей и настройки бота - в памяти, сбрасываются при записи
+        self.profiles = user_profiles
+        self.settings = SettingsCache()
+        self.setup_database()
+        self.performance.load(self.get_connection())
+        # Сигналы и счётчики пишутся пакетами групповой фиксацией
+        self.writes = WriteBehindQueue(self.write_cursor, after_commit=self._flush_performance)
+    
+    def _flush_performance(self):
+        with self.write_cursor() as cursor:
+            self.performance.maybe_flush(cursor.connection)
+    
+    def flush_writes(self, timeout: float = None) -> bool:
+        """Барьер чтения: дождаться фиксации всех поставленных в очередь записей"""
+        return self.writes.barrier(timeout=timeout)
+    
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        """Новое соединение с WAL-журналом и настройками кэша"""
+        conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT_MS / 1000, check_same_thread=check_same_thread)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={DB_SYNCHRONOUS}')
+        conn.execute(f'PRAGMA cache_size=-{DB_CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        with self._pool_lock:
+            self._connections.append(conn)
+        return conn
+    
+    def get_connection(self):
+        """Получить соединение текущего потока (WAL: чтения не блокируют запись)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+    
+    @contextmanager
+    def write_cursor(self):
+        """Курсор единственного писателя: запись под общей блокировкой, commit при выходе, rollback при ошибке"""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect(check_same_thread=False)
+            cursor = self._writer.cursor()
+            try:
+                yield cursor
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+            finally:
+                cursor.close()
+    
+    def close(self):
+        """Зафиксировать очередь записи и закрыть все соединения пула"""
+        self.writes.close()
+        with self._pool_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._writer = None
+        self._local = threading.local()
+    
+    def setup_database(self):
+        """Инициализация таблиц базы данных: применение недостающих миграций схемы"""
+        with self.write_cursor() as cursor:
+            migrate(cursor.connection, 'bot', MIGRATIONS)
+        logger.info("Database initialized successfully")
+    
+    # ========== НАСТРОЙКИ ==========
+    
+    def get_setting(self, key: str, default: str = '') -> str:
+        """Получить значение настройки"""
+        return self.get_settings().get(key) or default
+    
+    def get_settings(self) -> SettingsCache:
+        """Кэш настроек с типизированными геттерами (get_int, get_float, get_bool, get_int_list)"""
+        self.settings.sync(self.get_connection())
+        return self.settings
+    
+    def set_setting(self, key: str, value: str, admin_id: int):
+        """Установить значение настройки"""
+        with self.write_cursor() as cursor:
+            cursor.execute('''
+                INSERT OR REPLACE INTO bot_settings (key, value, updated_at, updated_by)
+                VALUES (?, ?, ?, ?)
+            ''', (key, value, datetime.now().isoformat(), admin_id))
+            cursor.execute(BUMP_VERSION_SQL)
+        self.settings.invalidate()
+    
+    def is_admin(self, user_id: int, admin_user_id: int) -> bool:
+        """Проверить, является ли пользователь администратором"""
+        return user_id in self.get_settings().get_int_list('admin_users', str(admin_user_id))
+    
+    # ========== ПОЛЬЗОВАТЕЛИ ==========
+    
+    def _load_profile(self, user_id: int) -> Dict[str, Any]:
+        cursor = self.get_connection().cursor()
+        cursor.execute('''
+            SELECT language, currency, banned, free_short_signals_today, free_short_signals_date
+            FROM users WHERE user_id = ?
+        ''', (user_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return {'exists': False, 'language': 'ru', 'currency': 'RUB', 'banned': False,
+                    'free_short_today': 0, 'free_short_date': None}
+        return {
+            'exists': True,
+            'language': row[0] or 'ru',
+            'currency': row[1] or 'RUB',
+            'banned': row[2] == 1,
+            'free_short_today': row[3] or 0,
+            'free_short_date': row[4]
+        }
+    
+    def get_profile(self, user_id: int) -> Dict[str, Any]:
+        """Профиль пользователя (язык, валюта, бан, квоты) из кэша или БД"""
+        return self.profiles.get(user_id, self._load_profile)
+    
+    def invalidate_profile(self, user_id: int = None):
+        """Сбросить кэш профиля после записи в users в обход методов Database"""
+        self.profiles.invalidate(user_id)
+    
+    def get_user(self, user_id: int) -> Optional[Tuple]:
+        """Получить данные пользователя"""
+        cursor = self.get_connection().cursor()
+        cursor.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
+        return cursor.fetchone()
+    
+    def add_user(self, user_id: int, username: str = None, first_name: str = None):
+        """Добавить нового пользователя"""
+        with self.write_cursor() as cursor:
+            cursor.execute('''
+                INSERT OR IGNORE INTO users (user_id, username, first_name, joined_date)
+                VALUES (?, ?, ?, ?)
+            ''', (user_id, username, first_name, datetime.now().isoformat()))
+        self.profiles.invalidate(user_id)
+    
+    def check_subscription(self, user_id: int) -> Tuple[bool, Optional[str], int, int, Optional[str]]:
+        """Проверить подписку пользователя"""
+        self.flush_writes()
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            'SELECT subscription_end, is_premium, signals_used, free_trials_used, subscription_type FROM users WHERE user_id = ?', 
+            (user_id,)
+        )
+        result = cursor.fetchone()
+        
+        if not result:
+            return False, "Пользователь не найден", 0, 0, None
+        
+        subscription_end, is_premium, signals_used, free_trials_used, subscription_type = result
+        
+        # Пожизненные тарифы
+        if subscription_type and not subscription_end:
+            return True, None, signals_used, free_trials_used, subscription_type
+        
+        # Обычная подписка с датой окончания
+        if subscription_end and datetime.now() < datetime.fromisoformat(subscription_end):
+            return True, subscription_end, signals_used, free_trials_used, subscription_type
+        
+        # Пробный период (3 дня VIP для новых пользователей)
+        if free_trials_used == 0:
+            trial_end = datetime.now() + timedelta(days=3)
+            with self.write_cursor() as write:
+                write.execute(
+                    'UPDATE users SET subscription_end = ?, subscription_type = ?, free_trials_used = 1 WHERE user_id = ?',
+                    (trial_end.isoformat(), 'vip', user_id)
+                )
+            return True, trial_end.isoformat(), signals_used, 1, 'vip'
+            
+        return False, "Нет активной подписки", signals_used, free_trials_used, None
+    
+    def get_subscription_tier(self, user_id: int) -> str:
+        """Тариф действующей подписки ('free', если её нет); пробный период не выдаёт"""
+        cursor = self.get_connection().cursor()
+        cursor.execute('SELECT subscription_end, subscription_type FROM users WHERE user_id = ?', (user_id,))
+        row = cursor.fetchone()
+        if not row or not row[1]:
+            return 'free'
+        subscription_end, subscription_type = row
+        if subscription_end and datetime.now() >= datetime.fromisoformat(subscription_end):
+            return 'free'
+        return subscription_type
+    
+    def is_banned(self, user_id: int) -> bool:
+        """Проверить, забанен ли пользователь"""
+        return self.get_profile(user_id)['banned']
+    
+    def ban_user(self, user_id: int, admin_id: int):
+        """Забанить пользователя"""
+        with self.write_cursor() as cursor:
+            cursor.execute('UPDATE users SET banned = 1 WHERE user_id = ?', (user_id,))
+        self.profiles.invalidate(user_id)
+        logger.info(f"Admin {admin_id} banned user {user_id}")
+    
+    def unban_user(self, user_id: int, admin_id: int):
+        """Разбанить пользователя"""
+        with self.write_cursor() as cursor:
+            cursor.execute('UPDATE users SET banned = 0 WHERE user_id = ?', (user_id,))
+        self.profiles.invalidate(user_id)
+        logger.info(f"Admin {admin_id} unbanned user {user_id}")
+    
+    # ========== ЯЗЫК И ВАЛЮТА ==========
+    
+    def get_user_language(self, user_id: int) -> str:
+        """Получить язык пользователя"""
+        return self.get_profile(user_id)['language']
+    
+    def set_user_language(self, user_id: int, language: str):
+        """Установить язык пользователя"""
+        with self.write_cursor() as cursor:
+            cursor.execute('UPDATE users SET language = ? WHERE user_id = ?', (language, user_id))
+        self.profiles.invalidate(user_id)
+    
+    def get_currency(self, user_id: int) -> str:
+        """Получить валюту пользователя"""
+        return self.get_profile(user_id)['currency']
+    
+    def set_currency(self, user_id: int, currency: str):
+        """Установить валюту пользователя"""
+        with self.write_cursor() as cursor:
+            cursor.execute('UPDATE users SET currency = ? WHERE user_id = ?', (currency, user_id))
+        self.profiles.invalidate(user_id)
+    
+    # ========== ПОДПИСКИ ==========
+    
+    def add_subscription(self, user_id: int, days: int = 30, subscription_type: str = 'vip'):
+        """Добавить подписку"""
+        with self.write_cursor() as cursor:
+            cursor.execute('SELECT subscription_end FROM users WHERE user_id = ?', (user_id,))
+            result = cursor.fetchone()
+            
+            if result and result[0]:
+                current_end = datetime.fromisoformat(result[0])
+                if current_end > datetime.now():
+                    new_end = current_end + timedelta(days=days)
+                else:
+                    new_end = datetime.now() + timedelta(days=days)
+            else:
+                new_end = datetime.now() + timedelta(days=days)
+            
+            cursor.execute('''
+                UPDATE users 
+                SET subscription_end = ?, is_premium = 1, subscription_type = ?
+                WHERE user_id = ?
+            ''', (new_end.isoformat(), subscription_type, user_id))
+            
+        logger.info(f"Added {subscription_type.upper()} subscription for user {user_id} until {new_end}")
+        
+        return new_end
+    
+    def add_lifetime_subscription(self, user_id: int):
+        """Добавить пожизненную подписку"""
+        with self.write_cursor() as cursor:
+            lifetime_end = datetime.now() + timedelta(days=36500)
+            
+            cursor.execute('''
+                INSERT OR IGNORE INTO users (user_id, username, first_name, joined_date)
+                VALUES (?, 'admin', 'Admin', ?)
+            ''', (user_id, datetime.now().isoformat()))
+            
+            cursor.execute('''
+                UPDATE users 
+                SET subscription_end = ?, is_premium = 1, subscription_type = 'vip'
+                WHERE user_id = ?
+            ''', (lifetime_end.isoformat(), user_id))
+            
+        return lifetime_end
+    
+    # ========== СТАТИСТИКА ==========
+    
+    def get_bot_stats(self) -> Dict[str, int]:
+        """Получить статистику бота"""
+        self.flush_writes()
+        cursor = self.get_connection().cursor()
+        
+        cursor.execute('SELECT COUNT(*) FROM users')
+        total_users = cursor.fetchone()[0]
+        
+        cursor.execute('SELECT COUNT(*) FROM users WHERE is_premium = 1')
+        premium_users = cursor.fetchone()[0]
+        
+        cursor.execute('SELECT SUM(signals_used) FROM users')
+        total_signals = cursor.fetchone()[0] or 0
+        
+        cursor.execute('''
+            SELECT COUNT(*) FROM users 
+            WHERE subscription_end IS NOT NULL 
+            AND datetime(subscription_end) > datetime('now')
+        ''')
+        active_subs = cursor.fetchone()[0]
+        
+        return {
+            'total_users': total_users,
+            'premium_users': premium_users,
+            'active_subscriptions': active_subs,
+            'total_signals': total_signals
+        }
+    
+    def get_user_signal_stats(self, user_id: int, timeframe_type: str = None, tier: str = None) -> Dict[str, Any]:
+        """Получить статистику сигналов пользователя (чтение счётчиков по первичному ключу)"""
+        self.flush_writes()
+        cursor = self.get_connection().cursor()
+        
+        filters = ['user_id = ?']
+        params = [user_id]
+        
+        if timeframe_type in ('short', 'long'):
+            filters.append('timeframe_type = ?')
+            params.append(timeframe_type)
+        
+        if tier:
+            filters.append('tier = ?')
+            params.append(tier)
+        
+        cursor.execute(f'''
+            SELECT COALESCE(SUM(total_signals), 0), COALESCE(SUM(wins), 0), COALESCE(SUM(losses), 0),
+                   COALESCE(SUM(total_profit), 0), COALESCE(SUM(total_loss), 0),
+                   COALESCE(SUM(confidence_sum), 0), COALESCE(SUM(confidence_count), 0)
+            FROM user_signal_stats
+            WHERE {' AND '.join(filters)}
+        ''', params)
+        
+        total, wins, losses, profit, loss, confidence_sum, confidence_count = cursor.fetchone()
+        avg_conf = confidence_sum / confidence_count if confidence_count else 0
+        
+        win_rate = (wins / total * 100) if total > 0 else 0
+        net_profit = (profit or 0) + (loss or 0)
+        
+        return {
+            'total_signals': total,
+            'wins': wins,
+            'losses': losses,
+            'win_rate': win_rate,
+            'net_profit': net_profit,
+            'total_profit': profit or 0,
+            'total_loss': loss or 0,
+            'avg_confidence': avg_conf or 0
+        }
+    
+    # ========== СИГНАЛЫ ==========
+    
+    def save_signal_to_history(self, user_id: int, asset: str, timeframe: str, 
+                                signal_type: str, confidence: float, entry_price: float,
+                                stake_amount: float = None, raw_score: int = None) -> int:
+        """
+        Сохранить сигнал в историю. Запись идёт в пакете очереди, id выдаёт SQLite
+        в транзакции писателя; вызов ждёт фиксации пакета и поднимает ошибку записи.
+        """
+        timeframe_minutes = {
+            "1M": 1, "2M": 2, "3M": 3, "5M": 5, "15M": 15, "30M": 30,
+            "1H": 60, "4H": 240, "1D": 1440, "1W": 10080
+        }
+        minutes = timeframe_minutes.get(timeframe, 5)
+        expiration_time = (datetime.now() + timedelta(minutes=minutes)).isoformat()
+        params = (user_id, asset, timeframe, signal_type, confidence, entry_price,
+                  stake_amount, datetime.now().isoformat(), expiration_time, raw_score)
+        
+        def op(cursor):
+            cursor.execute('''
+                INSERT INTO signal_history 
+                (user_id, asset, timeframe, signal_type, confidence, entry_price, stake_amount, 
+                 signal_date, expiration_time, result, raw_score)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending', ?)
+            ''', params)
+            signal_id = cursor.lastrowid
+            bump_user_stats(cursor, user_id, timeframe, 'vip', total=1, confidence=confidence)
+            return signal_id
+        
+        return self.writes.submit(op).result()
+    
+    def update_signal_result(self, signal_id: int, result: str, profit_loss: float):
+        """Обновить результат сигнала (запись отложенная; возвращает Future записи)"""
+        close_date = datetime.now().isoformat()
+        
+        def op(cursor):
+            cursor.execute('''
+                SELECT asset, timeframe, result, user_id, signal_tier, profit_loss, confidence
+                FROM signal_history WHERE id = ?
+            ''', (signal_id,))
+            row = cursor.fetchone()
+            cursor.execute('''
+                UPDATE signal_history
+                SET result = ?, profit_loss = ?, close_date = ?
+                WHERE id = ?
+            ''', (result, profit_loss, close_date, signal_id))
+            if not row:
+                return None
+            
+            # Счётчики пользователя: снять вклад прежнего результата и добавить новый
+            asset, timeframe, old_result, user_id, tier, old_pl, confidence = row
+            old_pl = old_pl or 0
+            bump_user_stats(
+                cursor, user_id, timeframe, tier,
+                total=0 if old_result is not None else 1,
+                wins=(result == 'win') - (old_result == 'win'),
+                losses=(result == 'loss') - (old_result == 'loss'),
+                profit=(profit_loss if result == 'win' else 0) - (old_pl if old_result == 'win' else 0),
+                loss=(profit_loss if result == 'loss' else 0) - (old_pl if old_result == 'loss' else 0),
+                confidence=None if old_result is not None else confidence
+            )
+            
+            # Повторная отметка результата не учитывается в статистике дважды;
+            # истёкший без отметки сигнал (sweep_expired_signals) ещё не учтён
+            if old_result in ('pending', 'expired'):
+                return lambda: self.performance.record(asset, timeframe, result)
+        
+        return self.writes.submit(op)
+    
+    def get_user_active_signals(self, user_id: int) -> List[Tuple[str, str, str]]:
+        """Получить активные (pending, не истекшие) сигналы пользователя"""
+        self.flush_writes()
+        cursor = self.get_connection().cursor()
+        cursor.execute('''
+            SELECT asset, timeframe, expiration_time
+            FROM signal_history
+            WHERE user_id = ? AND result = 'pending' AND expiration_time > ?
+        ''', (user_id, datetime.now().isoformat()))
+        return cursor.fetchall()
+    
+    def get_signal_asset(self, signal_id: int) -> Optional[str]:
+        """Получить актив сигнала по ID"""
+        self.flush_writes()
+        cursor = self.get_connection().cursor()
+        cursor.execute('SELECT asset FROM signal_history WHERE id = ?', (signal_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def sweep_expired_signals(self, limit: int = EXPIRY_SWEEP_BATCH) -> int:
+        """
+        Закрыть истекшие pending-сигналы всех пользователей, не больше limit за проход.
+        Поиск идёт по индексу (result, expiration_time): стоимость зависит от числа
+        истекших сигналов, а не пользователей. Счётчики не меняются - сигнал уже учтён в total.
+        """
+        now = datetime.now().isoformat()
+        with self.write_cursor() as cursor:
+            cursor.execute('''
+                UPDATE signal_history
+                SET result = 'expired', close_date = ?
+                WHERE id IN (
+                    SELECT id FROM signal_history
+                    WHERE result = 'pending' AND expiration_time < ?
+                    ORDER BY expiration_time
+                    LIMIT ?
+                )
+            ''', (now, now, limit))
+            return cursor.rowcount
+    
+    def get_last_pending_signal(self, user_id: int) -> Optional[Tuple]:
+        """Получить последний pending сигнал пользователя"""
+        self.flush_writes()
+        cursor = self.get_connection().cursor()
+        cursor.execute('''
+            SELECT id, asset, signal_type, confidence, stake_amount
+            FROM signal_history
+            WHERE user_id = ? AND result = 'pending'
+            ORDER BY signal_date DESC
+            LIMIT 1
+        ''', (user_id,))
+        return cursor.fetchone()
+    
+    def increment_signals_used(self, user_id: int):
+        """Увеличить счетчик использованных сигналов (запись отложенная; возвращает Future записи)"""
+        params = (datetime.now().isoformat(), user_id)
+        
+        def op(cursor):
+            cursor.execute(
+                'UPDATE users SET signals_used = signals_used + 1, last_signal_date = ? WHERE user_id = ?', params
+            )
+        
+        return self.writes.submit(op)
+    
+    # ========== FREE ЛИМИТЫ ==========
+    
+    def check_free_short_limit(self, user_id: int) -> Tuple[bool, int]:
+        """Проверить лимит FREE шорт-сигналов (5 в день)"""
+        profile = self.get_profile(user_id)
+        
+        if not profile['exists']:
+            return False, 0
+        
+        signals_today, last_date = profile['free_short_today'], profile['free_short_date']
+        today = datetime.now().date().isoformat()
+        
+        if last_date != today:
+            with self.write_cursor() as write:
+                write.execute(
+                    'UPDATE users SET free_short_signals_today = 0, free_short_signals_date = ? WHERE user_id = ?',
+                    (today, user_id)
+                )
+            self.profiles.invalidate(user_id)
+            signals_today = 0
+        
+        if signals_today >= 5:
+            return False, signals_today
+        
+        return True, signals_today
+    
+    def increment_free_short_signal(self, user_id: int) -> bool:
+        """Увеличить счетчик FREE шорт-сигналов"""
+        today = datetime.now().date().isoformat()
+        with self.write_cursor() as cursor:
+            cursor.execute('''
+                UPDATE users 
+                SET free_short_signals_today = CASE 
+                    WHEN free_short_signals_date = ? THEN 
+                        CASE WHEN free_short_signals_today < 5 THEN free_short_signals_today + 1 ELSE free_short_signals_today END
+                    ELSE 1
+                END,
+                free_short_signals_date = ?
+                WHERE user_id = ? 
+                AND (free_short_signals_date != ? OR free_short_signals_date IS NULL OR free_short_signals_today < 5)
+            ''', (today, today, user_id, today))
+            
+            affected_rows = cursor.rowcount
+        self.profiles.invalidate(user_id)
+        
+        return affected_rows > 0
+    
+    # ========== МАРТИНГЕЙЛ ==========
+    
+    def get_martingale_stake(self, user_id: int) -> Tuple[float, int]:
+        """Получить текущую ставку по мартингейлу"""
+        self.flush_writes()
+        cursor = self.get_connection().cursor()
+        cursor.execute('''
+            SELECT short_base_stake, martingale_base_stake, martingale_multiplier, 
+                   current_martingale_level, consecutive_losses
+            FROM users WHERE user_id = ?
+        ''', (user_id,))
+        result = cursor.fetchone()
+        
+        if not result:
+            return 100.0, 0
+        
+        short_base_stake, martingale_base_stake, martingale_multiplier, level, losses = result
+        
+        base_stake = martingale_base_stake or short_base_stake or 100.0
+        multiplier = martingale_multiplier or 3
+        level = level or 0
+        
+        stake = base_stake * (multiplier ** level)
+        return stake, level
+    
+    def update_martingale_after_win(self, user_id: int):
+        """Сбросить мартингейл после выигрыша (запись отложенная; возвращает Future записи)"""
+        def op(cursor):
+            cursor.execute('''
+                UPDATE users 
+                SET current_martingale_level = 0, consecutive_losses = 0
+                WHERE user_id = ?
+            ''', (user_id,))
+        
+        return self.writes.submit(op)
+    
+    def update_martingale_after_loss(self, user_id: int):
+        """Увеличить уровень мартингейла после проигрыша (запись отложенная; возвращает Future записи)"""
+        def op(cursor):
+            cursor.execute('''
+                SELECT current_martingale_level, consecutive_losses
+                FROM users WHERE user_id = ?
+            ''', (user_id,))
+            result = cursor.fetchone()
+            
+            if result:
+                level, losses = result
+                level = level or 0
+                losses = losses or 0
+                
+                if losses < 6:
+                    new_level = min(level + 1, 6)
+                    new_losses = losses + 1
+                    cursor.execute('''
+                        UPDATE users 
+                        SET current_martingale_level = ?, consecutive_losses = ?
+                        WHERE user_id = ?
+                    ''', (new_level, new_losses, user_id))
+        
+        return self.writes.submit(op)
+    
+    # ========== РЕФЕРАЛЫ ==========
+    
+    def generate_referral_code(self, user_id: int) -> str:
+        """Генерация уникального реферального кода"""
+        import hashlib
+        import time
+        code_base = f"{user_id}_{int(time.time())}"
+        code = hashlib.md5(code_base.encode()).hexdigest()[:8].upper()
+        
+        with self.write_cursor() as cursor:
+            cursor.execute('UPDATE users SET referral_code = ? WHERE user_id = ?', (code, user_id))
+        
+        return code
+    
+    def get_referral_code(self, user_id: int) -> str:
+        """Получить реферальный код пользователя"""
+        cursor = self.get_connection().cursor()
+        cursor.execute('SELECT referral_code FROM users WHERE user_id = ?', (user_id,))
+        result = cursor.fetchone()
+        
+        if result and result[0]:
+            return result[0]
+        
+        return self.generate_referral_code(user_id)
+    
+    # ========== АВТОТРЕЙДИНГ ==========
+    
+    def get_all_vip_users(self) -> List[int]:
+        """Получить всех VIP подписчиков"""
+        cursor = self.get_connection().cursor()
+        cursor.execute('''
+            SELECT user_id 
+            FROM users 
+            WHERE subscription_type = 'vip' 
+            AND subscription_end IS NOT NULL 
+            AND datetime(subscription_end) > datetime('now')
+        ''')
+        return [row[0] for row in cursor.fetchall()]
+    
+    def get_all_free_users(self) -> List[int]:
+        """Получить всех FREE пользователей"""
+        cursor = self.get_connection().cursor()
+        cursor.execute('''
+            SELECT user_id 
+            FROM users 
+            WHERE (subscription_type IS NULL OR subscription_type = 'free'
+                   OR subscription_end IS NULL 
+                   OR datetime(subscription_end) <= datetime('now'))
+            AND user_id IS NOT NULL
+        ''')
+        return [row[0] for row in cursor.fetchall()]
+
+
+class AsyncDatabase:
+    """
+    Асинхронный фасад Database для обработчиков: те же методы, но каждый
+    вызов выполняется в пуле потоков БД и возвращает awaitable, поэтому
+    цикл событий Telegram не ждёт диска. Соединения и write_cursor
+    берутся у самой Database - они привязаны к потоку. Отложенные записи
+    (методы, возвращающие Future очереди) ожидаются до фиксации пакета,
+    и ошибка записи поднимается в обработчике.
+    """
+    
+    def __init__(self, database: Database, max_workers: int = DB_EXECUTOR_WORKERS):
+        self.database = database
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db')
+    
+    def __getattr__(self, name: str):
+        attr = getattr(self.database, name)
+        if not callable(attr):
+            return attr
+        
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, functools.partial(attr, *args, **kwargs))
+            if isinstance(result, Future):
+                # Future очереди отложенной записи: ждём фиксацию без блокировки цикла
+                result = await asyncio.wrap_future(result)
+            return result
+        
+        # Обёртка создаётся один раз на метод
+        self.__dict__[name] = call
+        return call
+    
+    def shutdown(self, wait: bool = True):
+        """Остановить пул потоков БД"""
+        self._executor.shutdown(wait=wait)
+
+
+# Глобальный экземпляр базы данных
+db = Database()
+
+# Асинхронный фасад для обработчиков бота
+adb = AsyncDatabase(db)
\ No newline at end of file
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Пакетная калибровка уверенности: кривые score -> win rate по закрытым сигналам"""
+
+import sqlite3
+import sys
+
+from modules.calibration import run_calibration, default_curve
+
+
+def main(db_path='crypto_signals_bot.db'):
+    conn = sqlite3.connect(db_path)
+    try:
+        curves = run_calibration(conn)
+    finally:
+        conn.close()
+
+    print("🎯 КАЛИБРОВКА УВЕРЕННОСТИ")
+    print("=" * 50)
+    if not curves:
+        print("⚠️ Нет закрытых сигналов с raw_score - используется исходное отображение")
+        return 0
+
+    base = default_curve()
+    print(f"{'исходная':24s} | " + " ".join(f"{v:5.1f}" for v in base))
+    for (timeframe, asset_class), (curve, samples) in sorted(curves.items()):
+        title = f"{timeframe} {asset_class} ({samples})"
+        print(f"{title:24s} | " + " ".join(f"{v:5.1f}" for v in curve))
+    print(f"\n✅ Сохранено кривых: {len(curves)} (перезапустите бота для применения)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Проверка калибровки: по реалистичной истории (доля выигрышей 50-60%)
+кривые сохраняют реальную вероятность и растут по score (плоская кривая
+не различает сигналы), а сканирование синтетического рынка с порогами
+в шкале вероятности выдаёт сигналы без fallback.
+"""
+
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+from modules.calibration import run_calibration, confidence_calibration, default_curve
+from modules.constants import CALIBRATION_MAX_SCORE
+from modules.market_analyzer import build_scan_items, features_from_data, rank_scan_results
+
+
+def make_history(conn, items, per_score=40, seed=7):
+    """signal_history с закрытыми сигналами: win rate растёт от 50% до 60% по score"""
+    rng = np.random.default_rng(seed)
+    conn.execute('''
+        CREATE TABLE signal_history (
+            id INTEGER PRIMARY KEY, timeframe TEXT, asset TEXT, raw_score INTEGER, result TEXT
+        )
+    ''')
+    rows = []
+    for item in items:
+        for score in range(CALIBRATION_MAX_SCORE + 1):
+            rate = 0.50 + 0.10 * score / CALIBRATION_MAX_SCORE
+            wins = rng.random(per_score) < rate
+            rows.extend(
+                (item['timeframe'], item['asset_data']['symbol'], score, 'win' if win else 'loss')
+                for win in wins
+            )
+    conn.executemany('INSERT INTO signal_history (timeframe, asset, raw_score, result) VALUES (?, ?, ?, ?)', rows)
+    conn.commit()
+
+
+def make_bars(n_bars, seed):
+    """Синтетический OHLCV ряд (геометрическое блуждание)"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n_bars)))
+    return pd.DataFrame({
+        'Open': close,
+        'High': close * (1 + rng.random(n_bars) * 0.001),
+        'Low': close * (1 - rng.random(n_bars) * 0.001),
+        'Close': close,
+        'Volume': rng.integers(1_000, 2_000, n_bars).astype(float),
+    })
+
+
+def main():
+    items, _ = build_scan_items("short")
+    conn = sqlite3.connect(':memory:')
+    try:
+        make_history(conn, items)
+        curves = run_calibration(conn)
+        confidence_calibration.load(conn)
+    finally:
+        conn.close()
+
+    print("🎯 ПРОВЕРКА КАЛИБРОВКИ")
+    print("=" * 50)
+    curve = next(iter(curves.values()))[0]
+    print("исходная     | " + " ".join(f"{v:5.1f}" for v in default_curve()))
+    print("откалибр.    | " + " ".join(f"{v:5.1f}" for v in curve))
+
+    flat = [key for key, (fitted, _) in curves.items() if np.ptp(fitted) == 0]
+    if flat:
+        print(f"❌ Постоянная кривая у {len(flat)}/{len(curves)} пар: калибровка не ранжирует сигналы")
+        return 1
+    if curve.min() < 45 or curve.max() > 65:
+        print("❌ Кривая не соответствует истории с долей выигрышей 50-60%")
+        return 1
+
+    for seed, item in enumerate(items):
+        item['features'] = features_from_data(item['asset_data']['symbol'], item['timeframe'], make_bars(200, seed))
+
+    ranked, passed = rank_scan_results(items)
+    fresh = [signal for _, signal, _, _ in ranked if 'adx' in signal]
+    print(f"\nСканирование: {passed}/{len(items)} пар прошли порог, {len(fresh)} сигналов без fallback")
+    if not fresh:
+        print("❌ Откалиброванная уверенность не проходит пороги - сигналов нет")
+        return 1
+    print("✅ Сигналы выдаются по откалиброванной истории")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Проверка совпадения JIT-ядер индикаторов с эталонной реализацией NumPy/pandas"""
+
+import sys
+import numpy as np
+
+from modules.indicators import NUMBA_AVAILABLE, compare_backends
+
+
+def make_series(n_bars, seed=42, nan_count=0):
+    """Синтетический OHLC ряд (геометрическое блуждание) с пропусками"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    high = close * (1 + rng.random(n_bars) * 0.005)
+    low = close * (1 - rng.random(n_bars) * 0.005)
+    if nan_count:
+        for arr in (high, low, close):
+            arr[rng.integers(0, n_bars, nan_count)] = np.nan
+    return high, low, close
+
+
+def main():
+    print(f"⚙️ numba: {'установлена' if NUMBA_AVAILABLE else 'нет (ядра выполняются интерпретатором)'}")
+    print("=" * 50)
+
+    cases = [
+        ("100 баров", make_series(100)),
+        ("10k баров", make_series(10_000)),
+        ("10k баров с NaN", make_series(10_000, nan_count=50)),
+    ]
+
+    failed = False
+    for title, (high, low, close) in cases:
+        result = compare_backends(high, low, close)
+        bad = [name for name, info in result.items() if not info['ok']]
+        worst = max(info['max_abs_diff'] for info in result.values())
+        if bad:
+            failed = True
+            print(f"❌ {title}: расхождение в {', '.join(bad)}")
+        else:
+            print(f"✅ {title}: совпадает (макс. отклонение {worst:.2e})")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Проверка планов запросов: горячие запросы к signal_history и users должны идти по индексу.
+Проверяются не копии SQL, а операторы, которые реально выполняют методы Database
+и ExtendedDatabase на временной базе (перехват через set_trace_callback).
+"""
+
+import importlib.util
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from modules.database_extended import ExtendedDatabase
+
+# (название, вызов(db, ext)) - методы, чьи запросы должны идти по индексу
+HOT_CALLS = [
+    ('get_user_signal_stats', lambda db, ext: db.get_user_signal_stats(1, 'short')),
+    ('get_last_pending_signal', lambda db, ext: db.get_last_pending_signal(1)),
+    ('get_user_active_signals', lambda db, ext: db.get_user_active_signals(1)),
+    ('get_signal_asset', lambda db, ext: db.get_signal_asset(1)),
+    ('update_signal_result', lambda db, ext: db.update_signal_result(1, 'win', 100).result()),
+    ('sweep_expired_signals', lambda db, ext: db.sweep_expired_signals(500)),
+    ('get_detailed_stats', lambda db, ext: ext.get_detailed_stats(1)),
+    ('get_referral_stats', lambda db, ext: ext.get_referral_stats(1)),
+]
+
+# Операторы без плана чтения (управление транзакцией и соединением)
+SKIPPED_PREFIXES = ('BEGIN', 'COMMIT', 'ROLLBACK', 'PRAGMA', 'ANALYZE')
+
+
+def load_database_module(workdir):
+    """
+    bot/database/database.py напрямую: импорт пакета bot тянет конфиг и анализатор.
+    Модуль при импорте создаёт глобальный db на crypto_signals_bot.db в текущем
+    каталоге, поэтому загружается из временного каталога.
+    """
+    path = os.path.join(ROOT, 'bot', 'database', 'database.py')
+    spec = importlib.util.spec_from_file_location('bot_database', path)
+    module = importlib.util.module_from_spec(spec)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    module.db.close()
+    return module
+
+
+class StatementLog:
+    """Операторы, выполненные на подключённых соединениях (с подставленными параметрами)"""
+
+    def __init__(self):
+        self.statements = []
+        self._lock = threading.Lock()
+
+    def __call__(self, sql):
+        with self._lock:
+            self.statements.append(sql)
+
+    def take(self):
+        with self._lock:
+            statements, self.statements = self.statements, []
+        statements = (' '.join(sql.split()) for sql in statements)
+        return [sql for sql in statements if sql and not sql.upper().startswith(SKIPPED_PREFIXES)]
+
+
+def seed(db):
+    """Пользователь с одним pending-сигналом, чтобы методы прошли все ветки запросов"""
+    db.add_user(1, 'check', 'check')
+    expiration = (datetime.now() + timedelta(minutes=5)).isoformat()
+    db.save_signal_to_history(1, 'BTC/USD', '1M', 'CALL', 80, 1.0, 100, raw_score=3)
+    with db.write_cursor() as cursor:
+        cursor.execute('UPDATE signal_history SET expiration_time = ? WHERE id = 1', (expiration,))
+
+
+def query_plan(conn, sql):
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()]
+
+
+def full_scans(plan):
+    """Шаги плана, читающие таблицу целиком"""
+    return [step for step in plan if step.startswith('SCAN ') and ' USING ' not in step]
+
+
+def main():
+    failures = 0
+    checked = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        module = load_database_module(workdir)
+        db = module.Database(os.path.join(workdir, 'check.db'))
+        try:
+            seed(db)
+            log = StatementLog()
+            db.get_connection().set_trace_callback(log)
+            with db.write_cursor() as cursor:
+                cursor.connection.set_trace_callback(log)
+            log.take()
+
+            ext = ExtendedDatabase(db)
+            conn = sqlite3.connect(db.db_path)
+            print("🔎 ПЛАНЫ ГОРЯЧИХ ЗАПРОСОВ")
+            print("=" * 50)
+            try:
+                for name, call in HOT_CALLS:
+                    call(db, ext)
+                    statements = log.take()
+                    if not statements:
+                        failures += 1
+                        print(f"❌ {name}: запросы не перехвачены")
+                        continue
+                    for sql in statements:
+                        plan = query_plan(conn, sql)
+                        scans = full_scans(plan)
+                        checked += 1
+                        failures += bool(scans)
+                        print(f"{'❌' if scans else '✅'} {name}: {sql[:70]}")
+                        for step in plan:
+                            print(f"     {step}")
+            finally:
+                conn.close()
+        finally:
+            db.close()
+
+    if failures:
+        print(f"\n❌ Полное сканирование или пропуск в {failures} запросах")
+        return 1
+    print(f"\n✅ Все {checked} запросов {len(HOT_CALLS)} методов используют индексы")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,7 @@ ADMIN_ID = 7746862973
 # Полностью удалить админа
 cursor.execute('DELETE FROM users WHERE user_id = ?', (ADMIN_ID,))
 cursor.execute('DELETE FROM signal_history WHERE user_id = ?', (ADMIN_ID,))
+cursor.execute('DELETE FROM user_signal_stats WHERE user_id = ?', (ADMIN_ID,))
 
 conn.commit()
 print(f"✅ Админ {ADMIN_ID} полностью удален из базы")
@@ -121,6 +121,7 @@ class LowRiskStrategy:
             timestamp
         FROM market_history
         WHERE timestamp >= datetime('now', '-{lookback_hours} hours')
+        AND bucket IS NULL
         AND signal_generated IN ('CALL', 'PUT')
         ORDER BY timestamp ASC
         """
@@ -22,11 +22,14 @@ from telegram.ext import (
 # Импорт из modules/
 from modules.constants import (
     BOT_TOKEN, ADMIN_USER_ID, SUPPORT_CONTACT,
-    POCKET_OPTION_REF_LINK, PROMO_CODE, TRANSLATIONS
+    POCKET_OPTION_REF_LINK, PROMO_CODE, TRANSLATIONS, SCAN_TIMEOUTS,
+    EXPIRY_SWEEP_INTERVAL_SEC, EXPIRY_SWEEP_BATCH
 )
 
-from bot.database import db
+from bot.database import db, adb
 from modules.market_analyzer import analyzer, scan_market_signals, get_pocket_option_asset_name, get_expiration_time
+from modules.calibration import confidence_calibration
+from modules.market_history import market_history
 
 # Настройка логирования
 logging.basicConfig(
@@ -45,13 +48,17 @@ class CryptoSignalsBot:
     
     def __init__(self):
         self.application = None
+        self.sweeper_task = None
         self.admin_user_id = ADMIN_USER_ID
     
     # ========== УТИЛИТЫ ==========
     
-    def t(self, user_id: int, key: str) -> str:
+    async def t(self, user_id: int, key: str) -> str:
         """Получить перевод для пользователя"""
-        lang = db.get_user_language(user_id)
+        return self.translate(await adb.get_user_language(user_id), key)
+    
+    def translate(self, lang: str, key: str) -> str:
+        """Получить перевод по коду языка"""
         translations = TRANSLATIONS.get(lang, TRANSLATIONS['ru'])
         return translations.get(key, key)
     
@@ -65,27 +72,28 @@ class CryptoSignalsBot:
     
     # ========== КЛАВИАТУРЫ ==========
     
-    def get_main_keyboard(self, user_id: int) -> ReplyKeyboardMarkup:
+    async def get_main_keyboard(self, user_id: int) -> ReplyKeyboardMarkup:
         """Главная клавиатура - все сигналы доступны бесплатно"""
+        lang = await adb.get_user_language(user_id)
         keyboard = [
-            [KeyboardButton(f"⚡️ {self.t(user_id, 'short_signal')}")],
-            [KeyboardButton(f"🔵 {self.t(user_id, 'long_signal')}")],
-            [KeyboardButton(f"📊 {self.t(user_id, 'my_stats')}")],
-            [KeyboardButton(f"⚙️ {self.t(user_id, 'settings')}"), KeyboardButton(f"💰 Рефералка")],
-            [KeyboardButton(f"❓ {self.t(user_id, 'help')}")]
+            [KeyboardButton(f"⚡️ {self.translate(lang, 'short_signal')}")],
+            [KeyboardButton(f"🔵 {self.translate(lang, 'long_signal')}")],
+            [KeyboardButton(f"📊 {self.translate(lang, 'my_stats')}")],
+            [KeyboardButton(f"⚙️ {self.translate(lang, 'settings')}"), KeyboardButton(f"💰 Рефералка")],
+            [KeyboardButton(f"❓ {self.translate(lang, 'help')}")]
         ]
         return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
     
-    def get_settings_keyboard(self, user_id: int) -> InlineKeyboardMarkup:
+    async def get_settings_keyboard(self, user_id: int) -> InlineKeyboardMarkup:
         """Клавиатура настроек"""
-        lang = db.get_user_language(user_id)
-        currency = db.get_currency(user_id)
+        lang = await adb.get_user_language(user_id)
+        currency = await adb.get_currency(user_id)
         
         keyboard = [
             [InlineKeyboardButton(f"🌍 Язык: {lang.upper()}", callback_data="settings_language")],
             [InlineKeyboardButton(f"💱 Валюта: {currency}", callback_data="settings_currency")],
             [InlineKeyboardButton(f"📊 Моя статистика", callback_data="my_stats")],
-            [InlineKeyboardButton(f"◀️ {self.t(user_id, 'back')}", callback_data="back_main")]
+            [InlineKeyboardButton(f"◀️ {self.translate(lang, 'back')}", callback_data="back_main")]
         ]
         return InlineKeyboardMarkup(keyboard)
     
@@ -115,12 +123,12 @@ class CryptoSignalsBot:
         user_id = user.id
         
         # Проверка бана
-        if db.is_banned(user_id):
+        if await adb.is_banned(user_id):
             await update.message.reply_text("🚫 Вы заблокированы.")
             return
         
         # Добавление пользователя
-        db.add_user(user_id, user.username, user.first_name)
+        await adb.add_user(user_id, user.username, user.first_name)
         
         # Приветственное сообщение с реферальной ссылкой
         welcome_text = f"""👋 Добро пожаловать, {user.first_name}!
@@ -149,7 +157,7 @@ class CryptoSignalsBot:
         # Отправляем главное меню
         await update.message.reply_text(
             "🏠 Главное меню:",
-            reply_markup=self.get_main_keyboard(user_id)
+            reply_markup=await self.get_main_keyboard(user_id)
         )
     
     async def cmd_help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -183,33 +191,45 @@ class CryptoSignalsBot:
             help_text,
             parse_mode='Markdown',
             disable_web_page_preview=True,
-            reply_markup=self.get_main_keyboard(user_id)
+            reply_markup=await self.get_main_keyboard(user_id)
         )
     
+    async def scan_deadline(self, user_id):
+        """Бюджет ожидания сканирования по приоритету пользователя (админ или тариф подписки)"""
+        if await adb.is_admin(user_id, self.admin_user_id):
+            priority = 'admin'
+        else:
+            priority = await adb.get_subscription_tier(user_id)
+        return SCAN_TIMEOUTS.get(priority, SCAN_TIMEOUTS['free'])
+    
     async def cmd_short(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Получить SHORT сигнал - БЕСПЛАТНО"""
         user_id = update.effective_user.id
         
-        if db.is_banned(user_id):
+        if await adb.is_banned(user_id):
             return
         
         await update.message.reply_text("🔍 Анализирую рынок...")
         
         # Получение сигнала
         try:
-            signals = await scan_market_signals('short')
+            signals = await scan_market_signals(
+                'short', early_delivery=True, deadline=await self.scan_deadline(user_id)
+            )
+            # Персональный выбор с доски; лучший сигнал скана - если доска исчерпана
+            selected = await analyzer.get_signal('short', user_id=user_id, conn=adb) or (signals[0] if signals else None)
             
-            if signals:
-                asset_name, signal_info, timeframe = signals[0]
+            if selected:
+                asset_name, signal_info, timeframe = selected
                 
                 # Сохранение сигнала
-                signal_id = db.save_signal_to_history(
+                signal_id = await adb.save_signal_to_history(
                     user_id, asset_name, timeframe,
                     signal_info['signal'], signal_info['confidence'],
-                    signal_info.get('price', 0)
+                    signal_info.get('price', 0), raw_score=signal_info.get('score')
                 )
                 
-                db.increment_signals_used(user_id)
+                await adb.increment_signals_used(user_id)
                 
                 # Формирование сообщения
                 signal_emoji = "🟢" if signal_info['signal'] == 'CALL' else "🔴"
@@ -228,6 +248,7 @@ class CryptoSignalsBot:
 {payout_info}
 
 {'🐋 Обнаружен крупный игрок!' if signal_info.get('whale_detected') else ''}
+{'⏳ По данным предыдущего сканирования' if signal_info.get('stale') else ''}
 
 💰 **Регистрация:** [Pocket Option]({POCKET_OPTION_REF_LINK})"""
                 
@@ -255,24 +276,28 @@ class CryptoSignalsBot:
         """Получить LONG сигнал - БЕСПЛАТНО"""
         user_id = update.effective_user.id
         
-        if db.is_banned(user_id):
+        if await adb.is_banned(user_id):
             return
         
         await update.message.reply_text("🔍 Анализирую рынок (LONG)...")
         
         try:
-            signals = await scan_market_signals('long')
+            signals = await scan_market_signals(
+                'long', early_delivery=True, deadline=await self.scan_deadline(user_id)
+            )
+            # Персональный выбор с доски; лучший сигнал скана - если доска исчерпана
+            selected = await analyzer.get_signal('long', user_id=user_id, conn=adb) or (signals[0] if signals else None)
             
-            if signals:
-                asset_name, signal_info, timeframe = signals[0]
+            if selected:
+                asset_name, signal_info, timeframe = selected
                 
-                signal_id = db.save_signal_to_history(
+                signal_id = await adb.save_signal_to_history(
                     user_id, asset_name, timeframe,
                     signal_info['signal'], signal_info['confidence'],
-                    signal_info.get('price', 0)
+                    signal_info.get('price', 0), raw_score=signal_info.get('score')
                 )
                 
-                db.increment_signals_used(user_id)
+                await adb.increment_signals_used(user_id)
                 
                 signal_emoji = "🟢" if signal_info['signal'] == 'CALL' else "🔴"
                 pocket_asset = get_pocket_option_asset_name(asset_name)
@@ -290,6 +315,7 @@ class CryptoSignalsBot:
 {payout_info}
 
 {'🐋 Обнаружен крупный игрок!' if signal_info.get('whale_detected') else ''}
+{'⏳ По данным предыдущего сканирования' if signal_info.get('stale') else ''}
 
 💰 **Регистрация:** [Pocket Option]({POCKET_OPTION_REF_LINK})"""
                 
@@ -318,11 +344,11 @@ class CryptoSignalsBot:
         user_id = update.effective_user.id
         
         # Статистика сигналов
-        short_stats = db.get_user_signal_stats(user_id, 'short')
-        long_stats = db.get_user_signal_stats(user_id, 'long')
+        short_stats = await adb.get_user_signal_stats(user_id, 'short')
+        long_stats = await adb.get_user_signal_stats(user_id, 'long')
         
         # Получаем реферальный код
-        referral_code = db.get_referral_code(user_id)
+        referral_code = await adb.get_referral_code(user_id)
         
         stats_text = f"""📊 **Ваша статистика**
 
@@ -346,13 +372,13 @@ class CryptoSignalsBot:
         await update.message.reply_text(
             stats_text, 
             parse_mode='Markdown',
-            reply_markup=self.get_main_keyboard(user_id)
+            reply_markup=await self.get_main_keyboard(user_id)
         )
     
     async def cmd_referral(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Показать реферальную ссылку"""
         user_id = update.effective_user.id
-        referral_code = db.get_referral_code(user_id)
+        referral_code = await adb.get_referral_code(user_id)
         
         referral_text = f"""💰 **Реферальная программа**
 
@@ -375,7 +401,7 @@ class CryptoSignalsBot:
         await update.message.reply_text(
             referral_text,
             parse_mode='Markdown',
-            reply_markup=self.get_main_keyboard(user_id)
+            reply_markup=await self.get_main_keyboard(user_id)
         )
     
     async def cmd_settings(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -383,7 +409,7 @@ class CryptoSignalsBot:
         user_id = update.effective_user.id
         await update.message.reply_text(
             "⚙️ Настройки:",
-            reply_markup=self.get_settings_keyboard(user_id)
+            reply_markup=await self.get_settings_keyboard(user_id)
         )
     
     # ========== ОБРАБОТЧИКИ CALLBACK ==========
@@ -399,13 +425,13 @@ class CryptoSignalsBot:
         # Выбор языка
         if data.startswith("lang_"):
             lang = data.split("_")[1]
-            db.set_user_language(user_id, lang)
+            await adb.set_user_language(user_id, lang)
             await query.edit_message_text(f"✅ Язык установлен: {lang.upper()}")
         
         # Выбор валюты
         elif data.startswith("curr_"):
             currency = data.split("_")[1]
-            db.set_currency(user_id, currency)
+            await adb.set_currency(user_id, currency)
             await query.edit_message_text(f"✅ Валюта установлена: {currency}")
         
         # Настройки
@@ -427,12 +453,12 @@ class CryptoSignalsBot:
         elif data == "back_main":
             await query.edit_message_text(
                 "🏠 Главное меню",
-                reply_markup=self.get_settings_keyboard(user_id)
+                reply_markup=await self.get_settings_keyboard(user_id)
             )
         
         # Мой реферальный код
         elif data == "my_referral_code":
-            referral_code = db.get_referral_code(user_id)
+            referral_code = await adb.get_referral_code(user_id)
             await query.edit_message_text(
                 f"💰 **Ваш реферальный код:**\n\n`{referral_code}`\n\n"
                 f"🔗 **Ссылка:** {POCKET_OPTION_REF_LINK}\n\n"
@@ -448,13 +474,18 @@ class CryptoSignalsBot:
             
             # Обновление результата
             profit_loss = 100 if result == 'win' else -100  # Пример
-            db.update_signal_result(signal_id, result, profit_loss)
+            await adb.update_signal_result(signal_id, result, profit_loss)
             
-            # Обновление мартингейла
+            # Обновление мартингейла и серии проигрышей актива
+            asset_name = await adb.get_signal_asset(signal_id)
             if result == 'win':
-                db.update_martingale_after_win(user_id)
+                await adb.update_martingale_after_win(user_id)
+                if asset_name:
+                    analyzer.update_after_win(asset_name)
             else:
-                db.update_martingale_after_loss(user_id)
+                await adb.update_martingale_after_loss(user_id)
+                if asset_name:
+                    analyzer.update_after_loss(asset_name)
             
             result_emoji = "✅" if result == 'win' else "❌"
             await query.edit_message_text(
@@ -468,7 +499,7 @@ class CryptoSignalsBot:
         user_id = update.effective_user.id
         text = update.message.text
         
-        if db.is_banned(user_id):
+        if await adb.is_banned(user_id):
             return
         
         # Навигация по клавиатуре
@@ -491,11 +522,11 @@ class CryptoSignalsBot:
         """Админ панель"""
         user_id = update.effective_user.id
         
-        if not db.is_admin(user_id, self.admin_user_id):
+        if not await adb.is_admin(user_id, self.admin_user_id):
             await update.message.reply_text("🚫 Доступ запрещен.")
             return
         
-        stats = db.get_bot_stats()
+        stats = await adb.get_bot_stats()
         
         admin_text = f"""🔐 **Админ панель**
 
@@ -516,12 +547,12 @@ class CryptoSignalsBot:
         """Забанить пользователя"""
         user_id = update.effective_user.id
         
-        if not db.is_admin(user_id, self.admin_user_id):
+        if not await adb.is_admin(user_id, self.admin_user_id):
             return
         
         try:
             target_id = int(context.args[0])
-            db.ban_user(target_id, user_id)
+            await adb.ban_user(target_id, user_id)
             await update.message.reply_text(f"🚫 Пользователь {target_id} забанен.")
         except:
             await update.message.reply_text("Использование: /ban <user_id>")
@@ -530,18 +561,36 @@ class CryptoSignalsBot:
         """Разбанить пользователя"""
         user_id = update.effective_user.id
         
-        if not db.is_admin(user_id, self.admin_user_id):
+        if not await adb.is_admin(user_id, self.admin_user_id):
             return
         
         try:
             target_id = int(context.args[0])
-            db.unban_user(target_id, user_id)
+            await adb.unban_user(target_id, user_id)
             await update.message.reply_text(f"✅ Пользователь {target_id} разбанен.")
         except:
             await update.message.reply_text("Использование: /unban <user_id>")
     
     # ========== ЗАПУСК ==========
     
+    async def expiry_sweeper(self):
+        """Фоновое закрытие истекших pending-сигналов всех пользователей пакетами"""
+        while True:
+            try:
+                closed = await adb.sweep_expired_signals(EXPIRY_SWEEP_BATCH)
+                if closed:
+                    logger.info(f"⌛ Закрыто истекших сигналов: {closed}")
+                # Полный пакет - за ним могут быть ещё истекшие, следующий проход сразу
+                if closed >= EXPIRY_SWEEP_BATCH:
+                    continue
+            except Exception as e:
+                logger.error(f"Expiry sweep failed: {e}")
+            await asyncio.sleep(EXPIRY_SWEEP_INTERVAL_SEC)
+    
+    async def post_init(self, application):
+        """Фоновые задачи запускаются в цикле событий приложения"""
+        self.sweeper_task = asyncio.create_task(self.expiry_sweeper())
+    
     def setup_handlers(self):
         """Настройка обработчиков"""
         # Команды
@@ -570,9 +619,15 @@ class CryptoSignalsBot:
             logger.error("❌ BOT_TOKEN не установлен в .env файле!")
             return
         
-        self.application = Application.builder().token(BOT_TOKEN).build()
+        self.application = Application.builder().token(BOT_TOKEN).post_init(self.post_init).build()
         self.setup_handlers()
         
+        # Блокировки активов и калибровка уверенности восстанавливаются из БД
+        analyzer.attach_storage(db)
+        confidence_calibration.load(db.get_connection())
+        # Снимки сканирований пишутся в market_history через очередь отложенной записи
+        market_history.attach_storage(db.writes.submit)
+        
         logger.info("🤖 Бот запускается...")
         logger.info("📦 Используется модульная структура:")
         logger.info("   - modules/constants.py")
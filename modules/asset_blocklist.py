@@ -0,0 +1,128 @@
+"""
+Asset Blocklist module - блокировка активов после серии проигрышей
+Сроки блокировок лежат в куче: истёкшие снимаются лениво при обращении,
+без обхода всех блокировок. Состояние сохраняется в SQLite и
+восстанавливается при запуске, поэтому блокировки переживают перезапуск.
+Изменения пишутся через очередь отложенной записи БД, не блокируя цикл событий.
+"""
+import heapq
+import logging
+import threading
+import time
+
+from modules.constants import MAX_CONSECUTIVE_LOSSES, ASSET_BLOCK_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+def _log_failure(message):
+    """Callback Future записи: ошибка записи попадает в лог с контекстом актива"""
+    def callback(future):
+        error = future.exception()
+        if error is not None:
+            logger.error(f"{message}: {error}")
+    return callback
+
+
+class AssetBlocklist:
+    """Серии проигрышей и блокировки активов с ленивым истечением по куче сроков"""
+
+    def __init__(self, max_losses=MAX_CONSECUTIVE_LOSSES, block_duration=ASSET_BLOCK_DURATION):
+        self.max_losses = max_losses
+        self.block_duration = block_duration
+        self.loss_streak = {}
+        self.blocked = {}
+        self._expiry = []
+        self._submit = None
+        self._lock = threading.Lock()
+
+    def attach_storage(self, db):
+        """Подключить БД: создать таблицу снимка, загрузить действующее состояние и писать через db.writes"""
+        with db.write_cursor() as cursor:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS asset_blocklist (
+                    asset TEXT PRIMARY KEY,
+                    loss_streak INTEGER DEFAULT 0,
+                    blocked_until REAL
+                )
+            ''')
+            now = time.time()
+            cursor.execute('DELETE FROM asset_blocklist WHERE blocked_until IS NOT NULL AND blocked_until <= ?', (now,))
+
+        cursor = db.get_connection().cursor()
+        cursor.execute('SELECT asset, loss_streak, blocked_until FROM asset_blocklist')
+        with self._lock:
+            self._submit = db.writes.submit
+            self.loss_streak.clear()
+            self.blocked.clear()
+            self._expiry = []
+            for asset, streak, blocked_until in cursor.fetchall():
+                if streak:
+                    self.loss_streak[asset] = streak
+                if blocked_until is not None:
+                    self.blocked[asset] = blocked_until
+                    self._expiry.append((blocked_until, asset))
+            heapq.heapify(self._expiry)
+        logger.info(f"🚫 Loaded {len(self.blocked)} blocked assets, {len(self.loss_streak)} loss streaks")
+
+    def _purge(self, now):
+        """Снять истёкшие блокировки: O(log n) на каждую, O(1) если истёкших нет"""
+        expired = []
+        while self._expiry and self._expiry[0][0] <= now:
+            until, asset = heapq.heappop(self._expiry)
+            # Запись кучи устарела, если блокировку уже сняли или продлили
+            if self.blocked.get(asset) == until:
+                del self.blocked[asset]
+                self.loss_streak.pop(asset, None)
+                expired.append(asset)
+        return expired
+
+    def is_blocked(self, asset_name, now=None):
+        now = now if now is not None else time.time()
+        if self._expiry and self._expiry[0][0] <= now:
+            with self._lock:
+                expired = self._purge(now)
+            self._delete(expired)
+        return asset_name in self.blocked
+
+    def record_win(self, asset_name):
+        """Выигрыш обнуляет серию и снимает блокировку"""
+        with self._lock:
+            changed = self.loss_streak.pop(asset_name, None) is not None
+            changed = self.blocked.pop(asset_name, None) is not None or changed
+        if changed:
+            self._delete([asset_name])
+
+    def record_loss(self, asset_name, now=None):
+        """Проигрыш продлевает серию; True если актив заблокирован"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            streak = self.loss_streak.get(asset_name, 0) + 1
+            self.loss_streak[asset_name] = streak
+            blocked_until = None
+            if streak >= self.max_losses:
+                blocked_until = now + self.block_duration
+                self.blocked[asset_name] = blocked_until
+                heapq.heappush(self._expiry, (blocked_until, asset_name))
+        self._save(asset_name, streak, blocked_until)
+        return blocked_until is not None
+
+    def _save(self, asset_name, streak, blocked_until):
+        if self._submit is None:
+            return
+        params = (asset_name, streak, blocked_until)
+        future = self._submit(lambda cursor: cursor.execute(
+            'INSERT OR REPLACE INTO asset_blocklist (asset, loss_streak, blocked_until) VALUES (?, ?, ?)', params
+        ))
+        future.add_done_callback(_log_failure(f"Error saving blocklist state for {asset_name}"))
+
+    def _delete(self, assets):
+        if self._submit is None or not assets:
+            return
+        params = [(a,) for a in assets]
+        future = self._submit(lambda cursor: cursor.executemany('DELETE FROM asset_blocklist WHERE asset = ?', params))
+        future.add_done_callback(_log_failure("Error deleting blocklist state"))
+
+
+# Общий список блокировок активов
+asset_blocklist = AssetBlocklist()
@@ -0,0 +1,198 @@
+"""
+Calibration module - калибровка уверенности сигналов по реальным результатам
+Пакетная задача строит по закрытым сигналам signal_history монотонную кривую
+"score -> доля выигрышей" для каждой пары (таймфрейм, класс актива) и
+сохраняет её в таблицу. При скоринге кривые лежат в плотном массиве:
+уверенность берётся индексом [пара, score] без статистики на запрос.
+Откалиброванная уверенность - оценка вероятности выигрыша (0-100%), поэтому
+порог для неё - безубыточная доля выигрышей при доходности актива плюс
+CALIBRATION_MIN_EDGE; пороги min_confidence остаются для пар без кривой.
+"""
+import logging
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+from modules.constants import (
+    MARKET_ASSETS, CALIBRATION_MAX_SCORE, CALIBRATION_PRIOR, CALIBRATION_MIN_CONF, CALIBRATION_MAX_CONF,
+    CALIBRATION_MIN_EDGE
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _build_asset_classes():
+    classes = {}
+    for category, assets in MARKET_ASSETS.items():
+        asset_class = category.replace('_otc', '')
+        for asset_name, asset_data in assets.items():
+            classes.setdefault(asset_name, asset_class)
+            classes.setdefault(asset_data["symbol"], asset_class)
+    return classes
+
+
+# Класс актива по названию или тикеру: crypto, forex, stocks, commodities
+ASSET_CLASSES = _build_asset_classes()
+
+
+def asset_class(asset):
+    return ASSET_CLASSES.get(asset, 'other')
+
+
+def default_curve(min_conf=CALIBRATION_MIN_CONF, max_conf=CALIBRATION_MAX_CONF):
+    """Исходное отображение score -> уверенность: min_conf + score * 6 в пределах [min, max]"""
+    scores = np.arange(CALIBRATION_MAX_SCORE + 1, dtype=np.float64)
+    return np.clip(min_conf + scores * 6.0, min_conf, max_conf)
+
+
+def break_even(payout):
+    """Доля выигрышей (%), при которой ставка с доходностью payout% окупается"""
+    return 100.0 * 100.0 / (100.0 + np.asarray(payout, dtype=np.float64))
+
+
+def _isotonic(values, weights):
+    """Неубывающая регрессия (pool adjacent violators) с весами"""
+    blocks = []
+    for value, weight in zip(values, weights):
+        blocks.append([value, weight, 1])
+        while len(blocks) > 1 and blocks[-2][0] > blocks[-1][0]:
+            v2, w2, n2 = blocks.pop()
+            v1, w1, n1 = blocks.pop()
+            total = w1 + w2
+            blocks.append([(v1 * w1 + v2 * w2) / total, total, n1 + n2])
+    result = []
+    for value, _, count in blocks:
+        result.extend([value] * count)
+    return np.array(result)
+
+
+def fit_curve(wins, totals, prior=CALIBRATION_PRIOR):
+    """
+    Кривая вероятности выигрыша (%) по счётчикам выигрышей/сигналов на каждый score.
+    Доля выигрышей сглаживается к средней по паре (prior псевдо-сигналов),
+    затем делается неубывающей по score.
+    """
+    wins = np.asarray(wins, dtype=np.float64)
+    totals = np.asarray(totals, dtype=np.float64)
+    base = wins.sum() / totals.sum() if totals.sum() else 0.5
+    rate = (wins + prior * base) / (totals + prior)
+    curve = _isotonic(rate * 100, totals + prior)
+    return np.round(np.clip(curve, 0.0, 100.0), 1)
+
+
+def fit_calibration(rows):
+    """
+    Построить кривые по закрытым сигналам.
+    rows - (таймфрейм, актив, raw_score, результат 'win'/'loss').
+    Возвращает {(таймфрейм, класс актива): (кривая, число сигналов)}.
+    """
+    counts = {}
+    for timeframe, asset, raw_score, result in rows:
+        if raw_score is None or result not in ('win', 'loss'):
+            continue
+        key = (timeframe, asset_class(asset))
+        wins, totals = counts.setdefault(
+            key, (np.zeros(CALIBRATION_MAX_SCORE + 1), np.zeros(CALIBRATION_MAX_SCORE + 1))
+        )
+        score = min(max(int(raw_score), 0), CALIBRATION_MAX_SCORE)
+        totals[score] += 1
+        if result == 'win':
+            wins[score] += 1
+
+    return {
+        key: (fit_curve(wins, totals), int(totals.sum()))
+        for key, (wins, totals) in counts.items()
+    }
+
+
+def run_calibration(conn):
+    """Пакетная задача: подобрать кривые по signal_history и сохранить в confidence_calibration"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT timeframe, asset, raw_score, result
+        FROM signal_history
+        WHERE result IN ('win', 'loss') AND raw_score IS NOT NULL
+    ''')
+    curves = fit_calibration(cursor.fetchall())
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS confidence_calibration (
+            timeframe TEXT NOT NULL,
+            asset_class TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            confidence REAL NOT NULL,
+            samples INTEGER DEFAULT 0,
+            updated_at TEXT,
+            PRIMARY KEY (timeframe, asset_class, score)
+        )
+    ''')
+    now = datetime.now().isoformat()
+    cursor.execute('DELETE FROM confidence_calibration')
+    cursor.executemany('''
+        INSERT INTO confidence_calibration (timeframe, asset_class, score, confidence, samples, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [
+        (timeframe, cls, score, float(curve[score]), samples, now)
+        for (timeframe, cls), (curve, samples) in curves.items()
+        for score in range(CALIBRATION_MAX_SCORE + 1)
+    ])
+    conn.commit()
+    return curves
+
+
+class ConfidenceCalibration:
+    """Плотная таблица кривых: строка на пару (таймфрейм, класс актива), столбец на score"""
+
+    def __init__(self):
+        # Строка 0 - пары без калибровки (NaN: остаётся исходная уверенность)
+        self._state = ({}, np.full((1, CALIBRATION_MAX_SCORE + 1), np.nan))
+
+    def load(self, conn):
+        """Загрузить кривые из confidence_calibration; без таблицы калибровка не применяется"""
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT timeframe, asset_class, score, confidence FROM confidence_calibration')
+            rows = cursor.fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+
+        index = {}
+        for timeframe, cls, _, _ in rows:
+            index.setdefault((timeframe, cls), len(index) + 1)
+        table = np.full((len(index) + 1, CALIBRATION_MAX_SCORE + 1), np.nan)
+        for timeframe, cls, score, confidence in rows:
+            if 0 <= score <= CALIBRATION_MAX_SCORE:
+                table[index[(timeframe, cls)], score] = confidence
+
+        # Индекс и таблица подменяются одной ссылкой - читатели не видят частичного состояния
+        self._state = (index, table)
+        logger.info(f"🎯 Confidence calibration loaded: {len(index)} timeframe/asset class curves")
+
+    def _rows(self, index, timeframes, assets, count):
+        return np.fromiter(
+            (index.get((tf, asset_class(asset)), 0) for tf, asset in zip(timeframes, assets)),
+            dtype=np.int64, count=count
+        )
+
+    def lookup(self, timeframes, assets, scores, confidence):
+        """Откалиброванная уверенность для строк; где кривой нет - исходная confidence"""
+        index, table = self._state
+        rows = self._rows(index, timeframes, assets, len(scores))
+        columns = np.clip(np.asarray(scores, dtype=np.int64), 0, CALIBRATION_MAX_SCORE)
+        calibrated = table[rows, columns]
+        return np.where(np.isnan(calibrated), confidence, calibrated)
+
+    def thresholds(self, timeframes, assets, payout, min_confidence):
+        """
+        Порог уверенности для строк в шкале lookup: для откалиброванных пар -
+        безубыточная доля выигрышей плюс CALIBRATION_MIN_EDGE, иначе min_confidence
+        """
+        index, _ = self._state
+        min_confidence = np.asarray(min_confidence, dtype=np.float64)
+        rows = self._rows(index, timeframes, assets, len(min_confidence))
+        return np.where(rows > 0, break_even(payout) + CALIBRATION_MIN_EDGE, min_confidence)
+
+
+# Общая таблица калибровки
+confidence_calibration = ConfidenceCalibration()
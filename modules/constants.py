@@ -241,7 +241,63 @@ SCAN_TIMEOUTS = {
     'free': 45
 }
 
+# SQLite: WAL-журнал, соединение на поток и один писатель
+DB_BUSY_TIMEOUT_MS = 5000  # Ожидание блокировки записи другим соединением
+DB_CACHE_SIZE_KB = 16384  # Кэш страниц на соединение
+DB_SYNCHRONOUS = 'NORMAL'  # В режиме WAL безопасно и без fsync на каждый commit
+DB_EXECUTOR_WORKERS = 4  # Потоков пула запросов асинхронного фасада БД
+WRITE_BATCH_SIZE = 256  # Операций в одной транзакции очереди отложенной записи
+WRITE_BATCH_DELAY_MS = 5  # Окно накопления пакета отложенной записи
+PROFILE_CACHE_SIZE = 10000  # Профилей пользователей в кэше (LRU)
+SETTINGS_VERSION_CHECK_SEC = 5  # Как часто сверять версию bot_settings с БД
+MARKET_HISTORY_RAW_DAYS = 7  # Дней хранения снимков сканирования без свёртки
+MARKET_HISTORY_KEEP_DAYS = 180  # Дней хранения дневных корзин market_history
+MARKET_HISTORY_COMPACT_SEC = 3600  # Как часто сворачивать старые строки market_history
+EXPIRY_SWEEP_INTERVAL_SEC = 60  # Пауза между проходами закрытия истекших сигналов
+EXPIRY_SWEEP_BATCH = 500  # Сигналов за один проход (одна короткая транзакция)
+
 # Кэш и константы
-CACHE_DURATION = 180  # Кэш на 3 минуты
+# Длительность свечи таймфрейма: кэш сигнала действует до закрытия текущей свечи
+TIMEFRAME_SECONDS = {
+    "1M": 60, "2M": 120, "3M": 180, "5M": 300,
+    "15M": 900, "30M": 1800, "1H": 3600,
+    "4H": 14400, "1D": 86400, "1W": 604800
+}
 MAX_RECENT_ASSETS = 5  # Максимум последних активов для исключения
+SIGNAL_BOARD_SIZE = 10  # Записей на доске (категория, таймфрейм) после сканирования
+BOARD_CONFIDENCE_DELTA = 5  # Сдвиг уверенности (%) между сканированиями, о котором сообщается подписчикам
+
+# Конвейер сканирования: загрузка -> индикаторы -> оценка
+SCAN_FETCH_WORKERS = 16  # Параллельных загрузок котировок
+SCAN_PREPARE_WORKERS = 4  # Параллельных расчётов индикаторов
+SCAN_QUEUE_SIZE = 32  # Ёмкость очередей между стадиями
+SCAN_TOP_K = 10  # Размер онлайн-кучи лучших сигналов
+SCAN_EARLY_MARGIN = 5  # Сигнал с таким запасом уверенности над порогом пары (п.п.) отдаётся ожидающим сразу
+SCAN_SNAPSHOT_LIMIT = 200  # Сигналов последнего сканирования для ответа по дедлайну
+CORRELATION_WINDOW = 60  # Закрытых баров в окне корреляции доходностей
+CORRELATION_MIN_PERIODS = 20  # Минимум общих баров пары для оценки корреляции
+CORRELATION_THRESHOLD = 0.7  # Корреляция, при которой сигналы в одну сторону считаются одной ставкой
+RECENT_ASSET_TTL = 3600  # Недавно выданный актив исключается для пользователя не дольше часа
+EXCLUSION_MAX_USERS = 10000  # Пользователей в индексе исключений (LRU)
 MAX_CONSECUTIVE_LOSSES = 2  # Максимум проигрышей подряд перед блокировкой
+ASSET_BLOCK_DURATION = 3600  # Блокировка актива после серии проигрышей (1 час)
+
+# Адаптивные веса по истории результатов (signal_performance)
+PERFORMANCE_PRIOR = 5  # Псевдо-сигналов 50/50 при сглаживании win rate
+ADAPTIVE_WEIGHT_MIN = 0.5
+ADAPTIVE_WEIGHT_MAX = 1.5
+PERFORMANCE_FLUSH_INTERVAL = 60  # Секунд между пакетными записями в signal_performance
+
+# Калибровка уверенности по закрытым сигналам (calibrate_confidence.py)
+CALIBRATION_MAX_SCORE = 10  # Максимальный score: 5 условий + 2 бонуса тренда + 3 за стабильность
+CALIBRATION_PRIOR = 20  # Псевдо-сигналов средней доли выигрышей пары при сглаживании
+CALIBRATION_MIN_CONF = 70  # Исходное отображение score -> уверенность (пары без кривой)
+CALIBRATION_MAX_CONF = 92
+CALIBRATION_MIN_EDGE = 1.0  # П.п. вероятности выигрыша сверх безубыточной для откалиброванной пары
+
+# Расширенный набор индикаторов
+ADX_TREND_THRESHOLD = 25  # ADX выше порога подтверждает тренд (+1 к score)
+
+# Детекция крупного игрока по объёму (робастный z-score: медиана/MAD)
+WHALE_WINDOW = 20  # Закрытых баров в скользящем окне
+WHALE_Z_THRESHOLD = 3.5  # z-score объёма, начиная с которого бар считается аномальным
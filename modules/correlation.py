@@ -0,0 +1,200 @@
+"""
+Correlation module - скользящая корреляция доходностей по вселенной активов
+На каждый таймфрейм держится кольцевой буфер закрытых баров и накопленные
+попарные суммы (число пар, суммы, квадраты, произведения). Новый бар
+добавляется, а вытесненный вычитается за O(N^2) без пересчёта окна.
+Матрица используется для диверсифицированного TOP-N: сигналы, которые
+по сути являются одной ставкой, не попадают в выдачу вместе.
+"""
+import logging
+import math
+import threading
+
+import numpy as np
+
+from modules.constants import CORRELATION_WINDOW, CORRELATION_MIN_PERIODS, CORRELATION_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+
+class _RollingMatrix:
+    """Окно доходностей одного таймфрейма и попарные суммы по нему"""
+
+    def __init__(self, window):
+        self.window = window
+        self.index = {}
+        self.returns = np.zeros((window, 0))
+        self.mask = np.zeros((window, 0))
+        self.pos = 0
+        self.filled = 0
+        self.last_closed = None
+        self._resize_sums(0)
+
+    def _resize_sums(self, size):
+        self.n = np.zeros((size, size))
+        self.sx = np.zeros((size, size))
+        self.sxx = np.zeros((size, size))
+        self.sxy = np.zeros((size, size))
+
+    def add_symbol(self, symbol):
+        """Новый столбец: суммы нового актива нулевые, старые сохраняются"""
+        size = len(self.index)
+        self.index[symbol] = size
+        self.returns = np.pad(self.returns, ((0, 0), (0, 1)))
+        self.mask = np.pad(self.mask, ((0, 0), (0, 1)))
+        for name in ('n', 'sx', 'sxx', 'sxy'):
+            setattr(self, name, np.pad(getattr(self, name), ((0, 1), (0, 1))))
+
+    def _accumulate(self, x, m, sign):
+        # sx[i, j] - сумма x_i по барам, где есть оба актива; x уже обнулён вне маски
+        self.n += sign * np.outer(m, m)
+        self.sx += sign * np.outer(x, m)
+        self.sxx += sign * np.outer(x * x, m)
+        self.sxy += sign * np.outer(x, x)
+
+    def push(self, x, m):
+        slot = self.pos
+        if self.filled == self.window:
+            self._accumulate(self.returns[slot], self.mask[slot], -1)
+        else:
+            self.filled += 1
+        self.returns[slot] = x
+        self.mask[slot] = m
+        self._accumulate(x, m, 1)
+        self.pos = (slot + 1) % self.window
+
+    def correlation(self, i, j, min_periods):
+        n = self.n[i, j]
+        if n < min_periods:
+            return None
+        cov = self.sxy[i, j] - self.sx[i, j] * self.sx[j, i] / n
+        var_i = self.sxx[i, j] - self.sx[i, j] ** 2 / n
+        var_j = self.sxx[j, i] - self.sx[j, i] ** 2 / n
+        if var_i <= 0 or var_j <= 0:
+            return None
+        return float(cov / math.sqrt(var_i * var_j))
+
+    def matrix(self, min_periods):
+        n = self.n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = self.sxy - self.sx * self.sx.T / n
+            var = self.sxx - self.sx ** 2 / n
+            corr = cov / np.sqrt(var * var.T)
+        corr[(n < min_periods) | ~(var > 0) | ~(var.T > 0)] = np.nan
+        return corr
+
+
+class ReturnCorrelation:
+    """Скользящие корреляции лог-доходностей закрытых баров по таймфреймам"""
+
+    def __init__(self, window=CORRELATION_WINDOW, min_periods=CORRELATION_MIN_PERIODS,
+                 threshold=CORRELATION_THRESHOLD):
+        self.window = window
+        self.min_periods = min_periods
+        self.threshold = threshold
+        self._matrices = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def observe(self, symbol, interval, close):
+        """
+        Запомнить доходности ещё не учтённых закрытых баров (последний бар
+        формируется и пропускается). В матрицу они попадают при commit.
+        """
+        if close is None or len(close) < 3:
+            return
+
+        index = close.index
+        values = close.to_numpy(dtype=float)
+        closed = len(values) - 1
+
+        with self._lock:
+            matrix = self._matrices.get(interval)
+            if matrix is None:
+                matrix = self._matrices[interval] = _RollingMatrix(self.window)
+            start = max(1, closed - self.window)
+            if matrix.last_closed is not None:
+                start = max(start, index.searchsorted(matrix.last_closed, side='right'))
+
+            pending = self._pending.setdefault(interval, {})
+            for i in range(start, closed):
+                prev, cur = values[i - 1], values[i]
+                if prev > 0 and cur > 0:
+                    pending.setdefault(index[i], {})[symbol] = math.log(cur / prev)
+
+    def commit(self, intervals=None):
+        """Добавить накопленные бары в окна по порядку времени; возвращает число баров"""
+        added = 0
+        with self._lock:
+            for interval in list(intervals) if intervals is not None else list(self._pending):
+                bars = self._pending.pop(interval, None)
+                if not bars:
+                    continue
+                matrix = self._matrices[interval]
+                for timestamp in sorted(bars):
+                    row = bars[timestamp]
+                    for symbol in row:
+                        if symbol not in matrix.index:
+                            matrix.add_symbol(symbol)
+                    x = np.zeros(len(matrix.index))
+                    m = np.zeros(len(matrix.index))
+                    for symbol, value in row.items():
+                        x[matrix.index[symbol]] = value
+                        m[matrix.index[symbol]] = 1.0
+                    matrix.push(x, m)
+                    added += 1
+                matrix.last_closed = max(bars)
+        return added
+
+    def correlation(self, symbol_a, symbol_b, interval):
+        """Корреляция пары на таймфрейме; None если общих баров мало"""
+        if symbol_a == symbol_b:
+            return 1.0
+        matrix = self._matrices.get(interval)
+        if matrix is None:
+            return None
+        i = matrix.index.get(symbol_a)
+        j = matrix.index.get(symbol_b)
+        if i is None or j is None:
+            return None
+        return matrix.correlation(i, j, self.min_periods)
+
+    def matrix(self, interval):
+        """(список символов, матрица корреляций с NaN для пар без данных)"""
+        with self._lock:
+            matrix = self._matrices.get(interval)
+            if matrix is None:
+                return [], np.zeros((0, 0))
+            return list(matrix.index), matrix.matrix(self.min_periods)
+
+    def _redundant(self, a, b):
+        """Два сигнала - одна ставка: сильная корреляция с учётом направлений"""
+        info_a, info_b = a[1], b[1]
+        # Один инструмент на разных таймфреймах - повтор или встречная ставка
+        if info_a.get('asset') == info_b.get('asset'):
+            return True
+        corr = self.correlation(info_a.get('asset'), info_b.get('asset'), a[2])
+        if corr is None and a[2] != b[2]:
+            corr = self.correlation(info_a.get('asset'), info_b.get('asset'), b[2])
+        if corr is None:
+            return False
+        same_direction = info_a.get('signal') == info_b.get('signal')
+        return (corr if same_direction else -corr) >= self.threshold
+
+    def diversify(self, ranked, limit):
+        """
+        Жадный диверсифицированный TOP-N по ранжированному списку
+        (актив, signal_info, таймфрейм, ...): кандидат пропускается, если
+        повторяет ставку уже выбранного сигнала.
+        """
+        chosen = []
+        for candidate in ranked:
+            if len(chosen) >= limit:
+                break
+            if not any(self._redundant(candidate, picked) for picked in chosen):
+                chosen.append(candidate)
+        return chosen
+
+
+# Общие корреляции доходностей для всех сканирований
+return_correlation = ReturnCorrelation()
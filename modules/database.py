@@ -5,8 +5,15 @@ import sqlite3
 import logging
 from datetime import datetime, timedelta
 
+from modules.migrations import migrate
+from modules.settings_cache import SettingsCache, BUMP_VERSION_SQL
+from modules.profile_cache import user_profiles
+
 logger = logging.getLogger(__name__)
 
+# Настройки бота в памяти процесса: get_setting/is_admin не ходят в bot_settings
+settings_cache = SettingsCache()
+
 
 def get_connection(db_path='crypto_signals_bot.db'):
     """Получить соединение с БД"""
@@ -14,161 +21,127 @@ def get_connection(db_path='crypto_signals_bot.db'):
     return conn
 
 
-def setup_database(conn):
-    """Создать все таблицы и добавить недостающие колонки"""
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            user_id INTEGER PRIMARY KEY,
-            username TEXT,
-            first_name TEXT,
-            joined_date DATETIME,
-            subscription_end DATETIME,
-            is_premium BOOLEAN DEFAULT 0,
-            free_trials_used INTEGER DEFAULT 0,
-            signals_used INTEGER DEFAULT 0,
-            last_signal_date DATETIME,
-            initial_balance REAL DEFAULT NULL,
-            current_balance REAL DEFAULT NULL
-        )
-    ''')
-
-    # Добавить недостающие колонки (миграции)
-    optional_columns = [
-        ('initial_balance', 'REAL DEFAULT NULL'),
-        ('current_balance', 'REAL DEFAULT NULL'),
-        ('short_base_stake', 'REAL DEFAULT 100'),
-        ('current_martingale_level', 'INTEGER DEFAULT 0'),
-        ('consecutive_losses', 'INTEGER DEFAULT 0'),
-        ('currency', 'TEXT DEFAULT "RUB"'),
-        ('martingale_type', 'INTEGER DEFAULT 3'),
-        ('long_percentage', 'REAL DEFAULT 2.5'),
-        ('subscription_type', 'TEXT DEFAULT NULL'),
-        ('referral_code', 'TEXT DEFAULT NULL'),
-        ('referred_by', 'INTEGER DEFAULT NULL'),
-        ('new_user_discount_used', 'BOOLEAN DEFAULT 0'),
-        ('referral_earnings', 'REAL DEFAULT 0'),
-        ('pocket_option_registered', 'BOOLEAN DEFAULT 0'),
-        ('pocket_option_login', 'TEXT DEFAULT NULL'),
-        ('last_upgrade_offer', 'TEXT DEFAULT NULL'),
-        ('language', 'TEXT DEFAULT "ru"'),
-        ('free_short_signals_today', 'INTEGER DEFAULT 0'),
-        ('free_short_signals_date', 'TEXT DEFAULT NULL'),
-        ('free_long_signals_today', 'INTEGER DEFAULT 0'),
-        ('free_long_signals_date', 'TEXT DEFAULT NULL'),
-        ('banned', 'BOOLEAN DEFAULT 0'),
-        ('trading_strategy', 'TEXT DEFAULT NULL'),
-        ('martingale_multiplier', 'INTEGER DEFAULT 3'),
-        ('martingale_base_stake', 'REAL DEFAULT NULL'),
-        ('percentage_value', 'REAL DEFAULT 2.5'),
-        ('auto_trading_enabled', 'BOOLEAN DEFAULT 0'),
-        ('pocket_option_email', 'TEXT DEFAULT NULL'),
-        ('auto_trading_mode', 'TEXT DEFAULT "demo"'),
-        ('dalembert_base_stake', 'REAL DEFAULT 100'),
-        ('dalembert_unit', 'REAL DEFAULT 50'),
-        ('current_dalembert_level', 'INTEGER DEFAULT 0'),
-        ('auto_trading_strategy', 'TEXT DEFAULT "percentage"'),
-        ('pocket_option_ssid', 'TEXT DEFAULT NULL'),
-        ('pocket_option_connected', 'BOOLEAN DEFAULT 0'),
-        ('ssid_automation_purchased', 'BOOLEAN DEFAULT 0'),
-        ('ssid_automation_purchase_date', 'DATETIME DEFAULT NULL'),
-        ('referral_bonus_pending', 'TEXT DEFAULT NULL'),
-    ]
-
-    for col_name, col_def in optional_columns:
-        try:
-            cursor.execute(f'SELECT {col_name} FROM users LIMIT 1')
-        except sqlite3.OperationalError:
-            cursor.execute(f'ALTER TABLE users ADD COLUMN {col_name} {col_def}')
-            logger.info(f"✅ Added column {col_name} to users table")
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS signal_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            asset TEXT,
-            timeframe TEXT,
-            signal_type TEXT,
-            confidence REAL,
-            entry_price REAL,
-            result TEXT,
-            profit_loss REAL,
-            stake_amount REAL,
-            signal_date DATETIME,
-            close_date DATETIME,
-            notes TEXT,
-            FOREIGN KEY (user_id) REFERENCES users(user_id)
-        )
-    ''')
-
-    for col_name, col_def in [('expiration_time', 'TEXT'), ('signal_tier', 'TEXT DEFAULT "vip"')]:
-        try:
-            cursor.execute(f'SELECT {col_name} FROM signal_history LIMIT 1')
-        except sqlite3.OperationalError:
-            cursor.execute(f'ALTER TABLE signal_history ADD COLUMN {col_name} {col_def}')
+# Столбцы таблиц: (имя, определение). Новый столбец добавляется в конец списка
+# вместе с новой миграцией, которая снова вызывает ensure_table
+USERS_COLUMNS = (
+    ('user_id', 'INTEGER PRIMARY KEY'),
+    ('username', 'TEXT'),
+    ('first_name', 'TEXT'),
+    ('joined_date', 'DATETIME'),
+    ('subscription_end', 'DATETIME'),
+    ('is_premium', 'BOOLEAN DEFAULT 0'),
+    ('free_trials_used', 'INTEGER DEFAULT 0'),
+    ('signals_used', 'INTEGER DEFAULT 0'),
+    ('last_signal_date', 'DATETIME'),
+    ('initial_balance', 'REAL DEFAULT NULL'),
+    ('current_balance', 'REAL DEFAULT NULL'),
+    ('short_base_stake', 'REAL DEFAULT 100'),
+    ('current_martingale_level', 'INTEGER DEFAULT 0'),
+    ('consecutive_losses', 'INTEGER DEFAULT 0'),
+    ('currency', 'TEXT DEFAULT "RUB"'),
+    ('martingale_type', 'INTEGER DEFAULT 3'),
+    ('long_percentage', 'REAL DEFAULT 2.5'),
+    ('subscription_type', 'TEXT DEFAULT NULL'),
+    ('referral_code', 'TEXT DEFAULT NULL'),
+    ('referred_by', 'INTEGER DEFAULT NULL'),
+    ('new_user_discount_used', 'BOOLEAN DEFAULT 0'),
+    ('referral_earnings', 'REAL DEFAULT 0'),
+    ('pocket_option_registered', 'BOOLEAN DEFAULT 0'),
+    ('pocket_option_login', 'TEXT DEFAULT NULL'),
+    ('last_upgrade_offer', 'TEXT DEFAULT NULL'),
+    ('language', 'TEXT DEFAULT "ru"'),
+    ('free_short_signals_today', 'INTEGER DEFAULT 0'),
+    ('free_short_signals_date', 'TEXT DEFAULT NULL'),
+    ('free_long_signals_today', 'INTEGER DEFAULT 0'),
+    ('free_long_signals_date', 'TEXT DEFAULT NULL'),
+    ('banned', 'BOOLEAN DEFAULT 0'),
+    ('trading_strategy', 'TEXT DEFAULT NULL'),
+    ('martingale_multiplier', 'INTEGER DEFAULT 3'),
+    ('martingale_base_stake', 'REAL DEFAULT NULL'),
+    ('percentage_value', 'REAL DEFAULT 2.5'),
+    ('auto_trading_enabled', 'BOOLEAN DEFAULT 0'),
+    ('pocket_option_email', 'TEXT DEFAULT NULL'),
+    ('auto_trading_mode', 'TEXT DEFAULT "demo"'),
+    ('dalembert_base_stake', 'REAL DEFAULT 100'),
+    ('dalembert_unit', 'REAL DEFAULT 50'),
+    ('current_dalembert_level', 'INTEGER DEFAULT 0'),
+    ('auto_trading_strategy', 'TEXT DEFAULT "percentage"'),
+    ('pocket_option_ssid', 'TEXT DEFAULT NULL'),
+    ('pocket_option_connected', 'BOOLEAN DEFAULT 0'),
+    ('ssid_automation_purchased', 'BOOLEAN DEFAULT 0'),
+    ('ssid_automation_purchase_date', 'DATETIME DEFAULT NULL'),
+    ('referral_bonus_pending', 'TEXT DEFAULT NULL'),
+)
+
+SIGNAL_HISTORY_COLUMNS = (
+    ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    ('user_id', 'INTEGER'),
+    ('asset', 'TEXT'),
+    ('timeframe', 'TEXT'),
+    ('signal_type', 'TEXT'),
+    ('confidence', 'REAL'),
+    ('entry_price', 'REAL'),
+    ('result', 'TEXT'),
+    ('profit_loss', 'REAL'),
+    ('stake_amount', 'REAL'),
+    ('signal_date', 'DATETIME'),
+    ('close_date', 'DATETIME'),
+    ('notes', 'TEXT'),
+    ('expiration_time', 'TEXT'),
+    ('signal_tier', 'TEXT DEFAULT "vip"'),
+    ('raw_score', 'INTEGER'),
+)
+
+SIGNAL_PERFORMANCE_COLUMNS = (
+    ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    ('asset', 'TEXT NOT NULL'),
+    ('timeframe', 'TEXT NOT NULL'),
+    ('total_signals', 'INTEGER DEFAULT 0'),
+    ('wins', 'INTEGER DEFAULT 0'),
+    ('losses', 'INTEGER DEFAULT 0'),
+    ('win_rate', 'REAL DEFAULT 0.0'),
+    ('adaptive_weight', 'REAL DEFAULT 1.0'),
+    ('last_updated', 'TEXT NOT NULL'),
+)
+
+PENDING_NOTIFICATIONS_COLUMNS = (
+    ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    ('user_id', 'INTEGER NOT NULL'),
+    ('timeframe_type', 'TEXT'),
+    ('created_at', 'TEXT NOT NULL'),
+    ('is_active', 'BOOLEAN DEFAULT 1'),
+)
+
+BOT_SETTINGS_COLUMNS = (
+    ('key', 'TEXT PRIMARY KEY'),
+    ('value', 'TEXT'),
+    ('description', 'TEXT'),
+    ('updated_at', 'TEXT'),
+    ('updated_by', 'INTEGER'),
+)
+
+# market_history (снимки сканирований) создаётся миграциями bot/database/database.py
+
+
+def _migrate_base_tables(ctx):
+    ctx.ensure_table('users', USERS_COLUMNS)
+    ctx.ensure_table('signal_history', SIGNAL_HISTORY_COLUMNS,
+                     ('FOREIGN KEY (user_id) REFERENCES users(user_id)',))
+    ctx.ensure_table('signal_performance', SIGNAL_PERFORMANCE_COLUMNS, ('UNIQUE(asset, timeframe)',))
+    ctx.ensure_table('pending_notifications', PENDING_NOTIFICATIONS_COLUMNS,
+                     ('FOREIGN KEY (user_id) REFERENCES users(user_id)',))
+    ctx.ensure_table('bot_settings', BOT_SETTINGS_COLUMNS)
+
+
+# Миграции схемы по порядку; применённые не меняются, изменения - новой версией
+MIGRATIONS = (
+    (1, 'base tables', _migrate_base_tables),
+)
 
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS signal_performance (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            asset TEXT NOT NULL,
-            timeframe TEXT NOT NULL,
-            total_signals INTEGER DEFAULT 0,
-            wins INTEGER DEFAULT 0,
-            losses INTEGER DEFAULT 0,
-            win_rate REAL DEFAULT 0.0,
-            adaptive_weight REAL DEFAULT 1.0,
-            last_updated TEXT NOT NULL,
-            UNIQUE(asset, timeframe)
-        )
-    ''')
 
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS pending_notifications (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            timeframe_type TEXT,
-            created_at TEXT NOT NULL,
-            is_active BOOLEAN DEFAULT 1,
-            FOREIGN KEY (user_id) REFERENCES users(user_id)
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS bot_settings (
-            key TEXT PRIMARY KEY,
-            value TEXT,
-            description TEXT,
-            updated_at TEXT,
-            updated_by INTEGER
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS market_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            asset_symbol TEXT NOT NULL,
-            timeframe TEXT NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            price REAL,
-            volatility REAL,
-            volume REAL,
-            avg_volume REAL,
-            volume_ratio REAL,
-            whale_detected INTEGER DEFAULT 0,
-            trend TEXT,
-            rsi REAL,
-            macd REAL,
-            stoch_k REAL,
-            ema_20 REAL,
-            ema_50 REAL,
-            signal_generated TEXT,
-            confidence REAL,
-            score INTEGER
-        )
-    ''')
-
-    conn.commit()
+def setup_database(conn):
+    """Создать все таблицы и добавить недостающие колонки (миграции схемы)"""
+    migrate(conn, 'modules', MIGRATIONS)
     logger.info("✅ Database setup complete")
 
 
@@ -201,11 +174,14 @@ def init_default_settings(conn, admin_user_id):
     conn.commit()
 
 
+def get_settings(conn):
+    """Кэш настроек с типизированными геттерами"""
+    settings_cache.sync(conn)
+    return settings_cache
+
+
 def get_setting(conn, key, default=''):
-    cursor = conn.cursor()
-    cursor.execute('SELECT value FROM bot_settings WHERE key = ?', (key,))
-    result = cursor.fetchone()
-    return result[0] if result and result[0] else default
+    return get_settings(conn).get(key) or default
 
 
 def set_setting(conn, key, value, admin_id, main_admin_id):
@@ -219,13 +195,13 @@ def set_setting(conn, key, value, admin_id, main_admin_id):
         INSERT OR REPLACE INTO bot_settings (key, value, updated_at, updated_by)
         VALUES (?, ?, ?, ?)
     ''', (key, value, datetime.now().isoformat(), admin_id))
+    cursor.execute(BUMP_VERSION_SQL)
     conn.commit()
+    settings_cache.invalidate()
 
 
 def is_admin(conn, user_id, main_admin_id):
-    admin_users = get_setting(conn, 'admin_users', str(main_admin_id))
-    admin_list = [int(uid.strip()) for uid in admin_users.split(',') if uid.strip()]
-    return user_id in admin_list
+    return user_id in get_settings(conn).get_int_list('admin_users', str(main_admin_id))
 
 
 def is_banned(conn, user_id):
@@ -246,6 +222,7 @@ def set_user_language(conn, user_id, language):
     cursor = conn.cursor()
     cursor.execute('UPDATE users SET language = ? WHERE user_id = ?', (language, user_id))
     conn.commit()
+    user_profiles.invalidate(user_id)
 
 
 def get_bot_stats(conn):
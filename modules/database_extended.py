@@ -17,7 +17,7 @@ class ExtendedDatabase:
         self.db = db
     
     def get_connection(self):
-        """Получить соединение"""
+        """Соединение для чтения; запись - только через self.db.write_cursor()"""
         return self.db.get_connection()
     
     # ========== УПРАВЛЕНИЕ ПОДПИСКАМИ ==========
@@ -115,22 +115,22 @@ class ExtendedDatabase:
     def _increment_free_long_signal(self, user_id: int) -> bool:
         """Увеличить счетчик FREE long-сигналов"""
         today = datetime.now().date().isoformat()
-        cursor = self.get_connection().cursor()
         
-        cursor.execute('''
-            UPDATE users 
-            SET free_long_signals_today = CASE 
-                WHEN free_long_signals_date = ? THEN 
-                    CASE WHEN free_long_signals_today < 3 THEN free_long_signals_today + 1 ELSE free_long_signals_today END
-                ELSE 1
-            END,
-            free_long_signals_date = ?
-            WHERE user_id = ? 
-            AND (free_long_signals_date != ? OR free_long_signals_date IS NULL OR free_long_signals_today < 3)
-        ''', (today, today, user_id, today))
-        
-        affected_rows = cursor.rowcount
-        self.get_connection().commit()
+        with self.db.write_cursor() as cursor:
+            cursor.execute('''
+                UPDATE users 
+                SET free_long_signals_today = CASE 
+                    WHEN free_long_signals_date = ? THEN 
+                        CASE WHEN free_long_signals_today < 3 THEN free_long_signals_today + 1 ELSE free_long_signals_today END
+                    ELSE 1
+                END,
+                free_long_signals_date = ?
+                WHERE user_id = ? 
+                AND (free_long_signals_date != ? OR free_long_signals_date IS NULL OR free_long_signals_today < 3)
+            ''', (today, today, user_id, today))
+            affected_rows = cursor.rowcount
+        
+        self.db.invalidate_profile(user_id)
         return affected_rows > 0
     
     # ========== ИСТОРИЯ СИГНАЛОВ ==========
@@ -201,24 +201,6 @@ class ExtendedDatabase:
             })
         return results
     
-    def close_expired_positions(self, user_id: int) -> int:
-        """Закрыть истекшие позиции"""
-        cursor = self.get_connection().cursor()
-        now = datetime.now().isoformat()
-        
-        cursor.execute('''
-            UPDATE signal_history
-            SET result = 'expired', close_date = ?
-            WHERE user_id = ? 
-            AND result = 'pending'
-            AND expiration_time IS NOT NULL
-            AND expiration_time < ?
-        ''', (now, user_id, now))
-        
-        affected = cursor.rowcount
-        self.get_connection().commit()
-        return affected
-    
     # ========== СТАТИСТИКА И АНАЛИТИКА ==========
     
     def get_detailed_stats(self, user_id: int) -> Dict[str, Any]:
@@ -233,23 +215,15 @@ class ExtendedDatabase:
         
         overall_win_rate = (total_wins / total_signals * 100) if total_signals > 0 else 0
         
-        # Прибыльность
-        cursor = self.get_connection().cursor()
-        cursor.execute('''
-            SELECT SUM(profit_loss) FROM signal_history 
-            WHERE user_id = ? AND result = 'win'
-        ''', (user_id,))
-        total_profit = cursor.fetchone()[0] or 0
-        
-        cursor.execute('''
-            SELECT SUM(profit_loss) FROM signal_history 
-            WHERE user_id = ? AND result = 'loss'
-        ''', (user_id,))
-        total_loss = cursor.fetchone()[0] or 0
+        # Прибыльность - из счётчиков пользователя по всем таймфреймам
+        overall_stats = self.db.get_user_signal_stats(user_id)
+        total_profit = overall_stats.get('total_profit', 0)
+        total_loss = overall_stats.get('total_loss', 0)
         
         net_profit = total_profit + total_loss
         
         # Лучшие активы
+        cursor = self.get_connection().cursor()
         cursor.execute('''
             SELECT asset, COUNT(*) as cnt, 
                    SUM(CASE WHEN result = 'win' THEN 1 ELSE 0 END) as wins
@@ -329,8 +303,6 @@ class ExtendedDatabase:
     
     def update_trading_settings(self, user_id: int, settings: Dict[str, Any]) -> bool:
         """Обновить настройки торговли"""
-        cursor = self.get_connection().cursor()
-        
         valid_keys = [
             'martingale_type', 'martingale_multiplier', 'martingale_base_stake',
             'percentage_value', 'short_base_stake', 'long_percentage',
@@ -349,42 +321,43 @@ class ExtendedDatabase:
         
         values.append(user_id)
         
-        cursor.execute(f'''
-            UPDATE users SET {', '.join(updates)} WHERE user_id = ?
-        ''', values)
+        with self.db.write_cursor() as cursor:
+            cursor.execute(f'''
+                UPDATE users SET {', '.join(updates)} WHERE user_id = ?
+            ''', values)
+            updated = cursor.rowcount > 0
         
-        self.get_connection().commit()
-        return cursor.rowcount > 0
+        self.db.invalidate_profile(user_id)
+        return updated
     
     # ========== POCKET OPTION ==========
     
     def connect_pocket_option(self, user_id: int, email: str = None, ssid: str = None) -> bool:
         """Подключить аккаунт Pocket Option"""
-        cursor = self.get_connection().cursor()
-        
-        if email:
-            cursor.execute(
-                'UPDATE users SET pocket_option_email = ?, pocket_option_connected = 1 WHERE user_id = ?',
-                (email, user_id)
-            )
-        
-        if ssid:
-            cursor.execute(
-                'UPDATE users SET pocket_option_ssid = ?, pocket_option_connected = 1 WHERE user_id = ?',
-                (ssid, user_id)
-            )
+        with self.db.write_cursor() as cursor:
+            if email:
+                cursor.execute(
+                    'UPDATE users SET pocket_option_email = ?, pocket_option_connected = 1 WHERE user_id = ?',
+                    (email, user_id)
+                )
+            
+            if ssid:
+                cursor.execute(
+                    'UPDATE users SET pocket_option_ssid = ?, pocket_option_connected = 1 WHERE user_id = ?',
+                    (ssid, user_id)
+                )
         
-        self.get_connection().commit()
+        self.db.invalidate_profile(user_id)
         return True
     
     def disconnect_pocket_option(self, user_id: int) -> bool:
         """Отключить аккаунт Pocket Option"""
-        cursor = self.get_connection().cursor()
-        cursor.execute(
-            'UPDATE users SET pocket_option_connected = 0 WHERE user_id = ?',
-            (user_id,)
-        )
-        self.get_connection().commit()
+        with self.db.write_cursor() as cursor:
+            cursor.execute(
+                'UPDATE users SET pocket_option_connected = 0 WHERE user_id = ?',
+                (user_id,)
+            )
+        self.db.invalidate_profile(user_id)
         return True
     
     def get_pocket_option_status(self, user_id: int) -> Dict[str, Any]:
@@ -450,14 +423,13 @@ class ExtendedDatabase:
     
     def add_referral_bonus(self, user_id: int, amount: float) -> bool:
         """Добавить бонус за реферала"""
-        cursor = self.get_connection().cursor()
-        cursor.execute('''
-            UPDATE users 
-            SET referral_earnings = referral_earnings + ?
-            WHERE user_id = ?
-        ''', (amount, user_id))
-        self.get_connection().commit()
-        return cursor.rowcount > 0
+        with self.db.write_cursor() as cursor:
+            cursor.execute('''
+                UPDATE users 
+                SET referral_earnings = referral_earnings + ?
+                WHERE user_id = ?
+            ''', (amount, user_id))
+            return cursor.rowcount > 0
     
     # ========== АДМИН ФУНКЦИИ ==========
     
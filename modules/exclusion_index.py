@@ -0,0 +1,122 @@
+"""
+Exclusion Index module - персональные исключения при выдаче сигналов
+Для каждого пользователя хранятся недавно выданные активы (ограниченная
+очередь + множество с TTL) и активные сигналы до их экспирации.
+Общий объём ограничен числом пользователей с вытеснением по LRU.
+"""
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from modules.constants import MAX_RECENT_ASSETS, RECENT_ASSET_TTL, EXCLUSION_MAX_USERS
+
+
+class RecentAssets:
+    """Последние выданные активы: порядок выдачи и срок исключения каждого"""
+
+    __slots__ = ('limit', 'ttl', 'order', 'expires')
+
+    def __init__(self, limit=MAX_RECENT_ASSETS, ttl=RECENT_ASSET_TTL):
+        self.limit = limit
+        self.ttl = ttl
+        self.order = deque()
+        self.expires = {}
+
+    def add(self, asset_name, now):
+        if asset_name in self.expires:
+            self.order.remove(asset_name)
+        self.order.append(asset_name)
+        self.expires[asset_name] = now + self.ttl
+        while len(self.order) > self.limit:
+            del self.expires[self.order.popleft()]
+
+    def contains(self, asset_name, now):
+        expires = self.expires.get(asset_name)
+        return expires is not None and expires > now
+
+
+class UserExclusions:
+    """Исключения одного пользователя: недавние активы по типу сигнала и активные сигналы"""
+
+    __slots__ = ('recent', 'active')
+
+    def __init__(self):
+        self.recent = {}
+        self.active = {}
+
+    def is_active(self, asset_name, timeframe, now):
+        expires = self.active.get((asset_name, timeframe))
+        if expires is None:
+            return False
+        if expires <= now:
+            del self.active[(asset_name, timeframe)]
+            return False
+        return True
+
+
+class ExclusionIndex:
+    """Индекс исключений всех пользователей с вытеснением давно неактивных (LRU)"""
+
+    def __init__(self, max_users=EXCLUSION_MAX_USERS, recent_limit=MAX_RECENT_ASSETS,
+                 recent_ttl=RECENT_ASSET_TTL):
+        self.max_users = max_users
+        self.recent_limit = recent_limit
+        self.recent_ttl = recent_ttl
+        self._users = OrderedDict()
+
+    def __contains__(self, user_id):
+        return user_id in self._users
+
+    def __len__(self):
+        return len(self._users)
+
+    def _get(self, user_id):
+        entry = self._users.get(user_id)
+        if entry is None:
+            entry = self._users[user_id] = UserExclusions()
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+        return entry
+
+    def seed_active(self, user_id, signals, now=None):
+        """Загрузить активные сигналы из БД: [(актив, таймфрейм, время экспирации ISO)]"""
+        now = now if now is not None else time.time()
+        entry = self._get(user_id)
+        for asset_name, timeframe, expiration_time in signals:
+            try:
+                expires = datetime.fromisoformat(expiration_time).timestamp()
+            except (TypeError, ValueError):
+                continue
+            if expires > now:
+                entry.active[(asset_name, timeframe)] = expires
+
+    def is_excluded(self, user_id, timeframe_type, asset_name, timeframe, now=None):
+        """Исключён ли актив для пользователя: активный сигнал или недавняя выдача"""
+        entry = self._users.get(user_id)
+        if entry is None:
+            return False
+        now = now if now is not None else time.time()
+        if entry.is_active(asset_name, timeframe, now):
+            return True
+        recent = entry.recent.get(timeframe_type)
+        return recent is not None and recent.contains(asset_name, now)
+
+    def record_issue(self, user_id, timeframe_type, asset_name, timeframe, expires_at, now=None):
+        """Учесть выданный сигнал: актив в недавних, сигнал активен до экспирации"""
+        now = now if now is not None else time.time()
+        entry = self._get(user_id)
+        recent = entry.recent.get(timeframe_type)
+        if recent is None:
+            recent = entry.recent[timeframe_type] = RecentAssets(self.recent_limit, self.recent_ttl)
+        recent.add(asset_name, now)
+        # Истёкшие сигналы снимаются при каждой выдаче - словарь не растёт
+        for key in [k for k, expires in entry.active.items() if expires <= now]:
+            del entry.active[key]
+        if expires_at > now:
+            entry.active[(asset_name, timeframe)] = expires_at
+
+
+# Общий индекс исключений выдачи
+user_exclusions = ExclusionIndex()
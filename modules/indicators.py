@@ -0,0 +1,437 @@
+"""
+Indicators module - ядра технических индикаторов
+Рекурсивные фильтры (EMA) и скользящие экстремумы считаются JIT-ядрами (numba),
+если библиотека установлена; иначе используется эталонная реализация NumPy/pandas.
+С numba весь набор индикаторов считается одним слитым проходом по массивам OHLC.
+"""
+import logging
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Заглушка декоратора - ядра выполняются как обычный Python"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('numba', 'numpy')
+
+# Колонки, которые возвращает compute_indicators (порядок строк слитого ядра)
+INDICATOR_COLUMNS = (
+    'EMA_20', 'EMA_50', 'EMA_100', 'RSI', 'MACD', 'MACD_Signal',
+    'Stoch_K', 'Stoch_D', 'Resistance', 'Support', 'ATR', 'BB_Width', 'ADX'
+)
+
+# Периоды индикаторов расширенного набора
+ATR_PERIOD = 14
+ADX_PERIOD = 14
+BB_PERIOD = 20
+BB_STD = 2.0
+
+# Активный бэкенд: numba при наличии библиотеки, иначе NumPy/pandas
+_backend = 'numba' if NUMBA_AVAILABLE else 'numpy'
+
+
+def get_backend():
+    """Текущий бэкенд индикаторов"""
+    return _backend
+
+
+def set_backend(name):
+    """Переключить бэкенд индикаторов ('numba' или 'numpy')"""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown indicator backend: {name}")
+    if name == 'numba' and not NUMBA_AVAILABLE:
+        logger.warning("numba не установлена - используется бэкенд numpy")
+        name = 'numpy'
+    _backend = name
+    return _backend
+
+
+# ========== JIT ЯДРА ==========
+
+@njit(cache=True)
+def _ewm_step(weighted, old_wt, cur, alpha, adjust):
+    """Один шаг EMA с семантикой pandas ewm(adjust=..., ignore_na=False)"""
+    if weighted == weighted:
+        old_wt *= 1.0 - alpha
+        if cur == cur:
+            new_wt = 1.0 if adjust else alpha
+            if weighted != cur:
+                weighted = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+            if adjust:
+                old_wt += new_wt
+            else:
+                old_wt = 1.0
+    elif cur == cur:
+        weighted = cur
+    return weighted, old_wt
+
+
+@njit(cache=True)
+def _ema_kernel(values, alpha, adjust):
+    """EMA по всему массиву"""
+    n = values.shape[0]
+    out = np.empty(n)
+    weighted = np.nan
+    old_wt = 1.0
+    for i in range(n):
+        weighted, old_wt = _ewm_step(weighted, old_wt, values[i], alpha, adjust)
+        out[i] = weighted
+    return out
+
+
+@njit(cache=True)
+def _rolling_mean_kernel(values, window):
+    """Скользящее среднее (min_periods = window)"""
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    total = 0.0
+    nan_count = 0
+    for i in range(n):
+        cur = values[i]
+        if cur == cur:
+            total += cur
+        else:
+            nan_count += 1
+        if i >= window:
+            old = values[i - window]
+            if old == old:
+                total -= old
+            else:
+                nan_count -= 1
+        if i >= window - 1 and nan_count == 0:
+            out[i] = total / window
+    return out
+
+
+@njit(cache=True)
+def _rolling_extreme_kernel(values, window, is_max):
+    """Скользящий минимум/максимум на монотонной очереди - O(1) на бар"""
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    queue = np.empty(n, dtype=np.int64)
+    head = 0
+    tail = 0
+    last_nan = -window
+    for i in range(n):
+        cur = values[i]
+        if cur != cur:
+            last_nan = i
+        else:
+            while tail > head:
+                prev = values[queue[tail - 1]]
+                if (is_max and prev <= cur) or (not is_max and prev >= cur):
+                    tail -= 1
+                else:
+                    break
+            queue[tail] = i
+            tail += 1
+        while tail > head and queue[head] <= i - window:
+            head += 1
+        if i >= window - 1 and i - last_nan >= window and tail > head:
+            out[i] = values[queue[head]]
+    return out
+
+
+@njit(cache=True)
+def _window_extreme(values, i, window, is_max):
+    """Минимум/максимум окна [i - window + 1, i]; NaN если в окне есть пропуск"""
+    if i < window - 1:
+        return np.nan
+    best = values[i]
+    for j in range(i - window + 1, i + 1):
+        cur = values[j]
+        if cur != cur:
+            return np.nan
+        if (is_max and cur > best) or (not is_max and cur < best):
+            best = cur
+    return best
+
+
+@njit(cache=True)
+def _window_mean_std(values, i, window):
+    """Среднее и выборочное стандартное отклонение окна (ddof=1); NaN при пропуске"""
+    if i < window - 1:
+        return np.nan, np.nan
+    total = 0.0
+    for j in range(i - window + 1, i + 1):
+        cur = values[j]
+        if cur != cur:
+            return np.nan, np.nan
+        total += cur
+    mean = total / window
+    acc = 0.0
+    for j in range(i - window + 1, i + 1):
+        acc += (values[j] - mean) * (values[j] - mean)
+    return mean, np.sqrt(acc / (window - 1))
+
+
+@njit(cache=True)
+def _fused_kernel(high, low, close):
+    """Все индикаторы INDICATOR_COLUMNS за один проход по барам"""
+    n = close.shape[0]
+    out = np.full((13, n), np.nan)
+    ema20, ema50, ema100, rsi, macd, macd_sig = out[0], out[1], out[2], out[3], out[4], out[5]
+    stoch_k, stoch_d, resistance, support = out[6], out[7], out[8], out[9]
+    atr, bb_width, adx = out[10], out[11], out[12]
+
+    gain = np.zeros(n)
+    loss = np.zeros(n)
+
+    # Состояния рекурсивных фильтров: (значение, вес)
+    e20, w20 = np.nan, 1.0
+    e50, w50 = np.nan, 1.0
+    e100, w100 = np.nan, 1.0
+    e12, w12 = np.nan, 1.0
+    e26, w26 = np.nan, 1.0
+    e9, w9 = np.nan, 1.0
+    tr_s, tr_w = np.nan, 1.0
+    pdm_s, pdm_w = np.nan, 1.0
+    mdm_s, mdm_w = np.nan, 1.0
+    adx_s, adx_w = np.nan, 1.0
+
+    # Скользящие суммы (окна RSI и Stoch_D)
+    gain_sum = 0.0
+    loss_sum = 0.0
+    k_sum = 0.0
+    k_nan = 0
+
+    wilder = 1.0 / ATR_PERIOD
+    adx_alpha = 1.0 / ADX_PERIOD
+
+    for i in range(n):
+        c = close[i]
+        h = high[i]
+        l = low[i]
+
+        # EMA тренда (adjust=False) и MACD (adjust=True)
+        e20, w20 = _ewm_step(e20, w20, c, 2.0 / 21.0, False)
+        e50, w50 = _ewm_step(e50, w50, c, 2.0 / 51.0, False)
+        e100, w100 = _ewm_step(e100, w100, c, 2.0 / 101.0, False)
+        ema20[i] = e20
+        ema50[i] = e50
+        ema100[i] = e100
+
+        e12, w12 = _ewm_step(e12, w12, c, 2.0 / 13.0, True)
+        e26, w26 = _ewm_step(e26, w26, c, 2.0 / 27.0, True)
+        m = e12 - e26
+        macd[i] = m
+        e9, w9 = _ewm_step(e9, w9, m, 0.2, True)
+        macd_sig[i] = e9
+
+        # RSI: скользящее среднее приростов/падений за 14 баров
+        if i > 0:
+            delta = c - close[i - 1]
+            if delta > 0:
+                gain[i] = delta
+            elif delta < 0:
+                loss[i] = -delta
+        gain_sum += gain[i]
+        loss_sum += loss[i]
+        if i >= 14:
+            gain_sum -= gain[i - 14]
+            loss_sum -= loss[i - 14]
+        if i >= 13:
+            if loss_sum != 0.0:
+                rsi[i] = 100.0 - 100.0 / (1.0 + (gain_sum / 14) / (loss_sum / 14))
+            elif gain_sum != 0.0:
+                rsi[i] = 100.0
+
+        # Стохастик и уровни поддержки/сопротивления
+        low_14 = _window_extreme(low, i, 14, False)
+        high_14 = _window_extreme(high, i, 14, True)
+        rng = high_14 - low_14
+        k = 100.0 * ((c - low_14) / rng) if rng != 0.0 else np.nan
+        stoch_k[i] = k
+        if k == k:
+            k_sum += k
+        else:
+            k_nan += 1
+        if i >= 3:
+            old_k = stoch_k[i - 3]
+            if old_k == old_k:
+                k_sum -= old_k
+            else:
+                k_nan -= 1
+        if i >= 2 and k_nan == 0:
+            stoch_d[i] = k_sum / 3
+        resistance[i] = _window_extreme(high, i, 10, True)
+        support[i] = _window_extreme(low, i, 10, False)
+
+        # ATR и ADX (сглаживание Уайлдера)
+        tr = h - l
+        plus_dm = 0.0
+        minus_dm = 0.0
+        if i > 0:
+            prev_c = close[i - 1]
+            up_move = h - high[i - 1]
+            down_move = low[i - 1] - l
+            for cand in (abs(h - prev_c), abs(l - prev_c)):
+                if cand == cand and (tr != tr or cand > tr):
+                    tr = cand
+            if up_move > down_move and up_move > 0:
+                plus_dm = up_move
+            if down_move > up_move and down_move > 0:
+                minus_dm = down_move
+        tr_s, tr_w = _ewm_step(tr_s, tr_w, tr, wilder, False)
+        atr[i] = tr_s
+        pdm_s, pdm_w = _ewm_step(pdm_s, pdm_w, plus_dm, adx_alpha, False)
+        mdm_s, mdm_w = _ewm_step(mdm_s, mdm_w, minus_dm, adx_alpha, False)
+        plus_di = 100.0 * pdm_s / tr_s if tr_s != 0.0 else np.nan
+        minus_di = 100.0 * mdm_s / tr_s if tr_s != 0.0 else np.nan
+        di_sum = plus_di + minus_di
+        dx = 100.0 * abs(plus_di - minus_di) / di_sum if di_sum != 0.0 else np.nan
+        adx_s, adx_w = _ewm_step(adx_s, adx_w, dx, adx_alpha, False)
+        adx[i] = adx_s
+
+        # Ширина полос Боллинджера относительно средней линии
+        mid, std = _window_mean_std(close, i, BB_PERIOD)
+        if mid == mid and mid != 0.0:
+            bb_width[i] = 2.0 * BB_STD * std / mid
+
+    return out
+
+
+# ========== ПУБЛИЧНЫЙ API ==========
+
+def _as_float_array(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def ema(values, span=None, alpha=None, adjust=True):
+    """Экспоненциальное среднее - эквивалент Series.ewm(...).mean()"""
+    values = _as_float_array(values)
+    if alpha is None:
+        alpha = 2.0 / (span + 1.0)
+    if _backend == 'numba':
+        return _ema_kernel(values, float(alpha), bool(adjust))
+    return pd.Series(values).ewm(alpha=alpha, adjust=adjust).mean().to_numpy()
+
+
+def rolling_mean(values, window):
+    """Скользящее среднее - эквивалент Series.rolling(window).mean()"""
+    values = _as_float_array(values)
+    if _backend == 'numba':
+        return _rolling_mean_kernel(values, int(window))
+    return pd.Series(values).rolling(window).mean().to_numpy()
+
+
+def rolling_min(values, window):
+    """Скользящий минимум - эквивалент Series.rolling(window).min()"""
+    values = _as_float_array(values)
+    if _backend == 'numba':
+        return _rolling_extreme_kernel(values, int(window), False)
+    return pd.Series(values).rolling(window).min().to_numpy()
+
+
+def rolling_max(values, window):
+    """Скользящий максимум - эквивалент Series.rolling(window).max()"""
+    values = _as_float_array(values)
+    if _backend == 'numba':
+        return _rolling_extreme_kernel(values, int(window), True)
+    return pd.Series(values).rolling(window).max().to_numpy()
+
+
+def compute_indicators(high, low, close):
+    """Рассчитать набор индикаторов по массивам OHLC (колонки INDICATOR_COLUMNS)"""
+    high = _as_float_array(high)
+    low = _as_float_array(low)
+    close = _as_float_array(close)
+
+    if _backend == 'numba':
+        fused = _fused_kernel(high, low, close)
+        return dict(zip(INDICATOR_COLUMNS, fused))
+    return _compute_reference(high, low, close)
+
+
+def _compute_reference(high, low, close):
+    """Эталонный расчёт: отдельный векторный проход NumPy/pandas на каждый индикатор"""
+    columns = {
+        'EMA_20': ema(close, span=20, adjust=False),
+        'EMA_50': ema(close, span=50, adjust=False),
+        'EMA_100': ema(close, span=100, adjust=False),
+    }
+
+    delta = np.empty_like(close)
+    delta[0] = np.nan
+    delta[1:] = close[1:] - close[:-1]
+    gain = rolling_mean(np.where(delta > 0, delta, 0.0), 14)
+    loss = rolling_mean(np.where(delta < 0, -delta, 0.0), 14)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain / loss
+        columns['RSI'] = 100 - (100 / (1 + rs))
+
+    macd = ema(close, span=12) - ema(close, span=26)
+    columns['MACD'] = macd
+    columns['MACD_Signal'] = ema(macd, span=9)
+
+    low_14 = rolling_min(low, 14)
+    high_14 = rolling_max(high, 14)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stoch_k = 100 * ((close - low_14) / (high_14 - low_14))
+    columns['Stoch_K'] = stoch_k
+    columns['Stoch_D'] = rolling_mean(stoch_k, 3)
+
+    columns['Resistance'] = rolling_max(high, 10)
+    columns['Support'] = rolling_min(low, 10)
+
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    atr = ema(true_range, alpha=1.0 / ATR_PERIOD, adjust=False)
+    columns['ATR'] = atr
+
+    up_move = high - np.concatenate(([np.nan], high[:-1]))
+    down_move = np.concatenate(([np.nan], low[:-1])) - low
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100 * ema(plus_dm, alpha=1.0 / ADX_PERIOD, adjust=False) / atr
+        minus_di = 100 * ema(minus_dm, alpha=1.0 / ADX_PERIOD, adjust=False) / atr
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    columns['ADX'] = ema(dx, alpha=1.0 / ADX_PERIOD, adjust=False)
+
+    close_series = pd.Series(close)
+    mid = close_series.rolling(BB_PERIOD).mean().to_numpy()
+    std = close_series.rolling(BB_PERIOD).std().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns['BB_Width'] = 2 * BB_STD * std / mid
+    return columns
+
+
+def compare_backends(high, low, close, rtol=1e-9, atol=1e-9):
+    """Сравнить выходы бэкендов numba и numpy: {колонка: макс. отклонение}"""
+    global _backend
+    previous = _backend
+    try:
+        _backend = 'numpy'
+        reference = compute_indicators(high, low, close)
+        # Без numba ядра выполняются интерпретатором - сравнение остаётся честным
+        _backend = 'numba'
+        candidate = compute_indicators(high, low, close)
+    finally:
+        _backend = previous
+
+    deviations = {}
+    for name, expected in reference.items():
+        actual = candidate[name]
+        same_nan = np.array_equal(np.isnan(expected), np.isnan(actual))
+        mask = np.isfinite(expected) & np.isfinite(actual)
+        diff = np.abs(expected[mask] - actual[mask])
+        limit = atol + rtol * np.abs(expected[mask])
+        max_dev = float(diff.max()) if diff.size else 0.0
+        deviations[name] = {
+            'max_abs_diff': max_dev,
+            'nan_mask_equal': same_nan,
+            'ok': bool(same_nan and np.all(diff <= limit)),
+        }
+    return deviations
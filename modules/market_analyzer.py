@@ -4,6 +4,7 @@ Market Analyzer module - анализ рынка и генерация торг
 import logging
 import time
 import asyncio
+import inspect
 import numpy as np
 import pandas as pd
 import yfinance as yf
@@ -11,50 +12,48 @@ from datetime import datetime, timedelta, timezone
 
 from modules.constants import (
     MARKET_ASSETS, TIMEFRAMES, SHORT_TIMEFRAMES, LONG_TIMEFRAMES,
-    CACHE_DURATION, MAX_RECENT_ASSETS, MAX_CONSECUTIVE_LOSSES
+    SCAN_EARLY_MARGIN, SCAN_SNAPSHOT_LIMIT
 )
+from modules.indicators import compute_indicators
+from modules.timeframes import candle_close_time
+from modules.scoring import extract_features, stack_features, score_universe, rank_scores
+from modules.whale_detector import whale_detector
+from modules.signal_board import signal_boards
+from modules.exclusion_index import user_exclusions
+from modules.asset_blocklist import asset_blocklist
+from modules.performance_index import performance_index
+from modules.calibration import confidence_calibration
+from modules.scan_pipeline import ScanPipeline
+from modules.correlation import return_correlation
+from modules.market_history import market_history
 
 logger = logging.getLogger(__name__)
 
 # Глобальный кэш сигналов
 signal_cache = {
-    'short': {'signals': [], 'timestamp': 0},
-    'long': {'signals': [], 'timestamp': 0}
+    'short': {'signals': [], 'timestamp': 0, 'expires_at': 0},
+    'long': {'signals': [], 'timestamp': 0, 'expires_at': 0}
 }
 
-# Отслеживание последних выданных активов для разнообразия
-last_used_assets = {'short': [], 'long': []}
+# Идущие сканирования по типу сигнала: (конвейер, задача)
+inflight_scans = {}
 
-# Отслеживание проигрышей по активам
-asset_loss_streak = {}
-blocked_assets = {}
+# Ссылки на задачи сканирования до завершения: после раннего ответа их никто не ждёт
+scan_tasks = set()
+
+# Полный ранжированный результат последнего завершённого сканирования
+scan_snapshots = {
+    'short': {'ranked': [], 'timestamp': 0},
+    'long': {'ranked': [], 'timestamp': 0}
+}
 
 
 def calculate_indicators(df):
     """Рассчитать технические индикаторы"""
     try:
-        df['EMA_20'] = df['Close'].ewm(span=20, adjust=False).mean()
-        df['EMA_50'] = df['Close'].ewm(span=50, adjust=False).mean()
-        df['EMA_100'] = df['Close'].ewm(span=100, adjust=False).mean()
-
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-
-        exp1 = df['Close'].ewm(span=12).mean()
-        exp2 = df['Close'].ewm(span=26).mean()
-        df['MACD'] = exp1 - exp2
-        df['MACD_Signal'] = df['MACD'].ewm(span=9).mean()
-
-        low_14 = df['Low'].rolling(14).min()
-        high_14 = df['High'].rolling(14).max()
-        df['Stoch_K'] = 100 * ((df['Close'] - low_14) / (high_14 - low_14))
-        df['Stoch_D'] = df['Stoch_K'].rolling(3).mean()
-
-        df['Resistance'] = df['High'].rolling(10).max()
-        df['Support'] = df['Low'].rolling(10).min()
+        columns = compute_indicators(df['High'], df['Low'], df['Close'])
+        for name, values in columns.items():
+            df[name] = values
 
         df = df.fillna(method='bfill').fillna(method='ffill')
         return df
@@ -87,276 +86,444 @@ def generate_fallback_signal(asset_symbol, timeframe):
         'volume': 0,
         'avg_volume': 0,
         'volume_ratio': 1.0,
+        'volume_z': 0.0,
         'ema_20': 1.0,
         'ema_50': 1.0,
         'timestamp': datetime.now(),
+        'expires_at': candle_close_time(timeframe),
         'asset_type': 'regular',
         'payout': 85
     }, None
 
 
+def fetch_market_data(asset_symbol, timeframe):
+    """Загрузить историю котировок актива с Yahoo Finance"""
+    period_map = {
+        "1M": "5d", "5M": "5d", "15M": "1mo",
+        "30M": "1mo", "1H": "3mo", "4H": "6mo",
+        "1D": "1y", "1W": "2y"
+    }
+    period = period_map.get(timeframe, "1mo")
+    yf_timeframe = TIMEFRAMES.get(timeframe, "1h")
+
+    max_retries = 2
+    data = pd.DataFrame()
+    for attempt in range(max_retries):
+        try:
+            ticker = yf.Ticker(asset_symbol)
+            data = ticker.history(period=period, interval=yf_timeframe)
+            if not data.empty:
+                break
+        except Exception as e:
+            if attempt < max_retries - 1:
+                time.sleep(0.1)
+            else:
+                data = pd.DataFrame()
+    return data
+
+
+def analyze_asset_features(asset_symbol, timeframe):
+    """Загрузить данные и вернуть вектор признаков последнего бара (None если данных мало)"""
+    return features_from_data(asset_symbol, timeframe, fetch_market_data(asset_symbol, timeframe))
+
+
+def features_from_data(asset_symbol, timeframe, data):
+    """Вектор признаков последнего бара по загруженным данным (None если данных мало)"""
+    if data is None or len(data) < 20:
+        return None
+
+    # Объём оценивается до заполнения пропусков индикаторами
+    volume_signal = None
+    if 'Volume' in data.columns:
+        volume_signal = whale_detector.update(asset_symbol, timeframe, data['Volume'])
+    if 'Close' in data.columns:
+        return_correlation.observe(asset_symbol, timeframe, data['Close'])
+
+    data = calculate_indicators(data)
+    if data.empty:
+        return None
+
+    return extract_features(data, volume_signal)
+
+
+def build_signal_info(asset_symbol, timeframe, features, scores, row):
+    """Собрать словарь сигнала из признаков и строки векторной оценки"""
+    is_call = bool(scores['is_call'][row])
+
+    return {
+        'asset': asset_symbol,
+        'timeframe': timeframe,
+        'price': features['close'],
+        'trend': "BULLISH" if scores['bullish'][row] else "BEARISH",
+        'rsi': features['rsi'],
+        'macd': features['macd'],
+        'stoch_k': features['stoch_k'],
+        'atr': features['atr'],
+        'bb_width': features['bb_width'],
+        'adx': features['adx'],
+        'signal': 'CALL' if is_call else 'PUT',
+        'confidence': float(scores['confidence'][row]),
+        'direction': '📈' if is_call else '📉',
+        'score': int(scores['score'][row]),
+        'volatility': features['volatility'],
+        'whale_detected': bool(features['whale']),
+        'volume': features['volume'],
+        'avg_volume': features['avg_volume'],
+        'volume_ratio': features['volume_ratio'],
+        'volume_z': features['volume_z'],
+        'ema_20': features['ema_20'],
+        'ema_50': features['ema_50'],
+        'timestamp': datetime.now(),
+        'expires_at': candle_close_time(timeframe),
+        'asset_type': 'regular',
+        'payout': 85
+    }
+
+
 def analyze_asset_timeframe(asset_symbol, timeframe, conn=None, min_conf=70, max_conf=92):
     """Анализ актива на заданном таймфрейме"""
     try:
-        period_map = {
-            "1M": "5d", "5M": "5d", "15M": "1mo",
-            "30M": "1mo", "1H": "3mo", "4H": "6mo",
-            "1D": "1y", "1W": "2y"
-        }
-        period = period_map.get(timeframe, "1mo")
-        yf_timeframe = TIMEFRAMES.get(timeframe, "1h")
-
-        max_retries = 2
-        data = pd.DataFrame()
-        for attempt in range(max_retries):
-            try:
-                ticker = yf.Ticker(asset_symbol)
-                data = ticker.history(period=period, interval=yf_timeframe)
-                if not data.empty:
-                    break
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    time.sleep(0.1)
-                else:
-                    data = pd.DataFrame()
-
-        if len(data) < 20:
+        features = analyze_asset_features(asset_symbol, timeframe)
+        if features is None:
             return generate_fallback_signal(asset_symbol, timeframe)
 
-        data = calculate_indicators(data)
-
-        if data.empty:
-            return generate_fallback_signal(asset_symbol, timeframe)
-
-        current = data.iloc[-1]
-        trend = "BULLISH" if current['EMA_20'] > current['EMA_50'] else "BEARISH"
-
-        call_conditions = [
-            trend == "BULLISH",
-            current['Close'] > current['EMA_20'],
-            current['RSI'] < 70,
-            current['Stoch_K'] < 80,
-            current['MACD'] > current['MACD_Signal']
-        ]
-
-        put_conditions = [
-            trend == "BEARISH",
-            current['Close'] < current['EMA_20'],
-            current['RSI'] > 30,
-            current['Stoch_K'] > 20,
-            current['MACD'] < current['MACD_Signal']
-        ]
-
-        call_score = sum(call_conditions)
-        put_score = sum(put_conditions)
-
-        volatility = data['Close'].pct_change().std() * 100
-
-        whale_factor = 0
-        avg_volume = 0
-        current_volume = 0
-        volume_ratio = 0
-
-        if 'Volume' in data.columns:
-            avg_volume = data['Volume'].rolling(20).mean().iloc[-1]
-            current_volume = data['Volume'].iloc[-1]
-            if avg_volume > 0:
-                volume_ratio = current_volume / avg_volume
-                if volume_ratio >= 1.5:
-                    whale_factor = 1
-                    if trend == "BULLISH":
-                        call_score += 1
-                    else:
-                        put_score += 1
-
-        stability_bonus = 0
-        if volatility < 2.0:
-            stability_bonus = 3
-        elif volatility < 3.0:
-            stability_bonus = 1
-
-        total_call_score = call_score + stability_bonus
-        total_put_score = put_score + stability_bonus
-
-        if total_call_score >= total_put_score:
-            chosen_signal = 'CALL'
-            chosen_score = total_call_score
-            direction = '📈'
-        else:
-            chosen_signal = 'PUT'
-            chosen_score = total_put_score
-            direction = '📉'
-
-        base_conf = min_conf + chosen_score * 6.0
-        confidence = float(np.clip(base_conf, min_conf, max_conf))
-
-        signal_info = {
-            'asset': asset_symbol,
-            'timeframe': timeframe,
-            'price': float(current['Close']),
-            'trend': trend,
-            'rsi': float(current['RSI']),
-            'macd': float(current['MACD']),
-            'stoch_k': float(current['Stoch_K']),
-            'signal': chosen_signal,
-            'confidence': round(confidence, 1),
-            'direction': direction,
-            'score': chosen_score,
-            'volatility': float(volatility),
-            'whale_detected': whale_factor > 0,
-            'volume': float(current_volume),
-            'avg_volume': float(avg_volume),
-            'volume_ratio': float(volume_ratio),
-            'ema_20': float(current['EMA_20']),
-            'ema_50': float(current['EMA_50']),
-            'timestamp': datetime.now(),
-            'asset_type': 'regular',
-            'payout': 85
-        }
-
-        return signal_info, None
+        scores = score_universe(stack_features([features]), min_conf, max_conf)
+        scores['confidence'] = confidence_calibration.lookup([timeframe], [asset_symbol], scores['score'], scores['confidence'])
+        return build_signal_info(asset_symbol, timeframe, features, scores, 0), None
 
     except Exception as e:
         logger.error(f"Error analyzing {asset_symbol} on {timeframe}: {e}")
         return generate_fallback_signal(asset_symbol, timeframe)
 
 
-async def analyze_asset_async(asset_name, asset_data, timeframe, min_confidence=85, is_otc=False):
-    """Асинхронный анализ одного актива"""
-    try:
-        asset_symbol = asset_data["symbol"]
-        signal_info, error = await asyncio.to_thread(
-            analyze_asset_timeframe, asset_symbol, timeframe
-        )
+def scan_item(asset_name, asset_data, timeframe, min_confidence=85, is_otc=False, category="regular"):
+    """Элемент сканирования: актив, таймфрейм и порог уверенности (признаки заполняются позже)"""
+    return {
+        'asset_name': asset_name,
+        'asset_data': asset_data,
+        'timeframe': timeframe,
+        'min_confidence': min_confidence,
+        'is_otc': is_otc,
+        'category': category,
+        'features': None
+    }
 
-        if signal_info and signal_info.get('confidence', 0) >= min_confidence:
-            signal_info['asset_type'] = asset_data.get("type", "regular")
-            signal_info['payout'] = asset_data.get("payout", 85)
-            signal_info['is_otc'] = is_otc
-            return (asset_name, signal_info, timeframe)
-    except Exception as e:
-        logger.debug(f"Error analyzing {asset_name}: {e}")
-    return None
 
+def fetch_scan_item(item):
+    """Стадия конвейера: загрузка котировок"""
+    return fetch_market_data(item['asset_data']['symbol'], item['timeframe'])
+
+
+def prepare_scan_item(item, data):
+    """Стадия конвейера: индикаторы и вектор признаков"""
+    item['features'] = features_from_data(item['asset_data']['symbol'], item['timeframe'], data)
+    return item
+
+
+def annotate_signal(signal_info, item, weight):
+    """Добавить в сигнал данные актива из элемента сканирования"""
+    signal_info['asset_type'] = item['asset_data'].get("type", "regular")
+    signal_info['payout'] = item['asset_data'].get("payout", 85)
+    signal_info['is_otc'] = item['is_otc']
+    signal_info['category'] = item['category']
+    signal_info['adaptive_weight'] = float(weight)
+    return signal_info
+
+
+def score_scan_item(item):
+    """Стадия конвейера: оценка одной строки для онлайн TOP-K (None - ниже порога)"""
+    if item['features'] is None:
+        return None
+    scores = score_universe(stack_features([item['features']]))
+    scores['confidence'] = confidence_calibration.lookup(
+        [item['timeframe']], [item['asset_name']], scores['score'], scores['confidence']
+    )
+    payout = [item['asset_data'].get("payout", 85)]
+    threshold = confidence_calibration.thresholds(
+        [item['timeframe']], [item['asset_name']], payout, [item['min_confidence']]
+    )
+    weight = performance_index.weight(item['asset_name'], item['timeframe'])
+    order, final_score = rank_scores(scores['confidence'], payout, threshold, [weight])
+    if not len(order):
+        return None
+    signal_info = build_signal_info(item['asset_data']['symbol'], item['timeframe'], item['features'], scores, 0)
+    annotate_signal(signal_info, item, weight)
+    margin = float(scores['confidence'][0] - threshold[0])
+    return float(final_score[0]), margin, (item['asset_name'], signal_info, item['timeframe'])
+
+
+def rank_scan_results(results, limit=None, snapshot=None):
+    """
+    Оценить все результаты сканирования одним векторным проходом и вернуть лучшие (все при limit=None).
+    snapshot - список, в который добавляются сигналы всех проанализированных строк, включая ниже порога.
+    """
+    rows = [r for r in results if r and not isinstance(r, Exception)]
+    if not rows:
+        return [], 0
+
+    analyzed = [i for i, r in enumerate(rows) if r['features'] is not None]
+    scores = None
+    if analyzed:
+        scores = score_universe(stack_features([rows[i]['features'] for i in analyzed]))
+        # Сырой score -> откалиброванная уверенность индексом в таблице кривых
+        scores['confidence'] = confidence_calibration.lookup(
+            [rows[i]['timeframe'] for i in analyzed],
+            [rows[i]['asset_name'] for i in analyzed],
+            scores['score'], scores['confidence']
+        )
+
+    # Строки без данных получают fallback-сигнал как при одиночном анализе
+    score_row = {}
+    fallback = {}
+    confidence = np.empty(len(rows))
+    for pos, i in enumerate(analyzed):
+        score_row[i] = pos
+        confidence[i] = scores['confidence'][pos]
+    for i, r in enumerate(rows):
+        if i not in score_row:
+            fallback[i] = generate_fallback_signal(r['asset_data']['symbol'], r['timeframe'])[0]
+            confidence[i] = fallback[i]['confidence']
+
+    payout = np.fromiter((r['asset_data'].get("payout", 85) for r in rows), dtype=np.float64, count=len(rows))
+    min_confidence = np.fromiter((r['min_confidence'] for r in rows), dtype=np.float64, count=len(rows))
+    # Откалиброванные пары проверяются порогом в шкале вероятности выигрыша;
+    # fallback-сигналы и пары без кривой - исходным min_confidence
+    if analyzed:
+        min_confidence[analyzed] = confidence_calibration.thresholds(
+            [rows[i]['timeframe'] for i in analyzed],
+            [rows[i]['asset_name'] for i in analyzed],
+            payout[analyzed], min_confidence[analyzed]
+        )
+    # Адаптивные веса из индекса результатов в памяти - без запросов к БД
+    weights = np.fromiter(
+        (performance_index.weight(r['asset_name'], r['timeframe']) for r in rows), dtype=np.float64, count=len(rows)
+    )
+    order, final_score = rank_scores(confidence, payout, min_confidence, weights)
+
+    if snapshot is not None:
+        for i in analyzed:
+            r = rows[i]
+            snapshot.append((r['asset_name'], build_signal_info(
+                r['asset_data']['symbol'], r['timeframe'], r['features'], scores, score_row[i]
+            ), r['timeframe']))
+
+    ranked = []
+    for i in order[:limit]:
+        r = rows[i]
+        if i in fallback:
+            signal_info = fallback[i]
+        else:
+            signal_info = build_signal_info(r['asset_data']['symbol'], r['timeframe'], r['features'], scores, score_row[i])
+        annotate_signal(signal_info, r, weights[i])
+        ranked.append((r['asset_name'], signal_info, r['timeframe'], float(final_score[i])))
 
-async def scan_market_signals(timeframe_type, force_realtime=False, conn=None):
-    """Оптимизированное сканирование рынка с поддержкой OTC активов"""
-    cache_key = timeframe_type if timeframe_type in ['short', 'long'] else 'short'
-    current_time = time.time()
+    return ranked, len(order)
 
-    # SHORT всегда в реальном времени, LONG использует кэш
-    if timeframe_type == "long" and not force_realtime:
-        if (current_time - signal_cache[cache_key]['timestamp']) < CACHE_DURATION:
-            cached_signals = signal_cache[cache_key]['signals']
-            if cached_signals:
-                logger.info(f"✅ Using cached {cache_key} signals ({len(cached_signals)} found)")
-                return cached_signals
 
-    signals = []
-    tasks = []
+def build_scan_items(timeframe_type):
+    """Список элементов сканирования и таймфреймы для типа сигнала"""
+    items = []
+    timeframes = []
 
     if timeframe_type == "short":
-        logger.info("🔍 SHORT: Поиск сигналов в реальном времени (приоритет OTC 92%)")
-
-        for timeframe in ["1M", "5M"]:
+        timeframes = ["1M", "5M"]
+        for timeframe in timeframes:
             # OTC Криптовалюты (92% доходность)
             for asset_name, asset_data in MARKET_ASSETS.get("crypto_otc", {}).items():
-                tasks.append(analyze_asset_async(asset_name, asset_data, timeframe, min_confidence=80, is_otc=True))
+                items.append(scan_item(asset_name, asset_data, timeframe, min_confidence=80, is_otc=True, category="crypto_otc"))
 
             # OTC Форекс
             for asset_name, asset_data in MARKET_ASSETS.get("forex_otc", {}).items():
-                tasks.append(analyze_asset_async(asset_name, asset_data, timeframe, min_confidence=80, is_otc=True))
+                items.append(scan_item(asset_name, asset_data, timeframe, min_confidence=80, is_otc=True, category="forex_otc"))
 
             # OTC Акции
             for asset_name, asset_data in MARKET_ASSETS.get("stocks_otc", {}).items():
-                tasks.append(analyze_asset_async(asset_name, asset_data, timeframe, min_confidence=80, is_otc=True))
+                items.append(scan_item(asset_name, asset_data, timeframe, min_confidence=80, is_otc=True, category="stocks_otc"))
 
             # Обычные активы (85% доходность)
             for asset_name, asset_data in MARKET_ASSETS.get("crypto", {}).items():
-                tasks.append(analyze_asset_async(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False))
+                items.append(scan_item(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False, category="crypto"))
 
             for asset_name, asset_data in MARKET_ASSETS.get("forex", {}).items():
-                tasks.append(analyze_asset_async(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False))
+                items.append(scan_item(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False, category="forex"))
 
             for asset_name, asset_data in MARKET_ASSETS.get("stocks", {}).items():
-                tasks.append(analyze_asset_async(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False))
+                items.append(scan_item(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False, category="stocks"))
 
             for asset_name, asset_data in MARKET_ASSETS.get("commodities", {}).items():
-                tasks.append(analyze_asset_async(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False))
+                items.append(scan_item(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False, category="commodities"))
 
     elif timeframe_type == "long":
-        for timeframe in ["1H", "4H"]:
+        timeframes = ["1H", "4H"]
+        for timeframe in timeframes:
             # OTC Форекс
             for asset_name, asset_data in MARKET_ASSETS.get("forex_otc", {}).items():
-                tasks.append(analyze_asset_async(asset_name, asset_data, timeframe, min_confidence=80, is_otc=True))
+                items.append(scan_item(asset_name, asset_data, timeframe, min_confidence=80, is_otc=True, category="forex_otc"))
 
             # Обычный форекс
             for asset_name, asset_data in MARKET_ASSETS.get("forex", {}).items():
-                tasks.append(analyze_asset_async(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False))
+                items.append(scan_item(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False, category="forex"))
 
             # Обычные акции
             for asset_name, asset_data in MARKET_ASSETS.get("stocks", {}).items():
-                tasks.append(analyze_asset_async(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False))
+                items.append(scan_item(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False, category="stocks"))
 
             # Товары и индексы
             for asset_name, asset_data in MARKET_ASSETS.get("commodities", {}).items():
-                tasks.append(analyze_asset_async(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False))
-
-    # Выполнить все анализы параллельно
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    # Собрать успешные сигналы
-    for result in results:
-        if result and not isinstance(result, Exception):
-            signals.append(result)
-
-    # Сортировать по score и взять ТОП-3
-    if signals:
-        scored_signals = []
-        for asset_name, signal_info, timeframe in signals:
-            base_score = signal_info.get('confidence', 0)
-            payout_bonus = 25 if signal_info.get('payout', 85) >= 92 else 0
-            final_score = base_score + payout_bonus
-            scored_signals.append((asset_name, signal_info, timeframe, final_score))
-
-        scored_signals.sort(key=lambda x: x[3], reverse=True)
-        top_signals = [(name, info, tf) for name, info, tf, score in scored_signals[:3]]
-        signals = top_signals
-
-        logger.info(f"📊 Market scan complete: {len(scored_signals)} signals found, TOP-3 selected")
-        for i, (name, info, tf, score) in enumerate(scored_signals[:3], 1):
-            logger.info(f"   #{i}: {name} {tf} | Score: {score:.1f} | Payout: {info.get('payout', 85)}%")
-
-    # Обновить кэш
-    signal_cache[cache_key]['signals'] = signals
-    signal_cache[cache_key]['timestamp'] = current_time
-
-    # Fallback если нет сигналов
-    if not signals:
-        import random
-        logger.info("⚡ Генерируем fallback сигнал из OTC активов (92% доходность)")
-        if timeframe_type == "short":
-            all_assets = list(MARKET_ASSETS.get("crypto_otc", {}).items()) + list(MARKET_ASSETS.get("forex_otc", {}).items())
-            timeframe = random.choice(["1M", "5M"])
-        elif timeframe_type == "long":
-            all_assets = list(MARKET_ASSETS.get("forex_otc", {}).items()) + list(MARKET_ASSETS.get("stocks_otc", {}).items())
-            timeframe = random.choice(["1H", "4H"])
-        else:
-            all_assets = list(MARKET_ASSETS.get("crypto_otc", {}).items())[:3]
-            timeframe = "1M"
-
-        if all_assets:
-            asset_name, asset_data = random.choice(all_assets)
-            fallback_signal = generate_fallback_signal(asset_data["symbol"], timeframe)
-            if fallback_signal and fallback_signal[0]:
-                fallback_signal[0]['asset_type'] = asset_data["type"]
-                fallback_signal[0]['payout'] = asset_data["payout"]
-                signals.append((asset_name, fallback_signal[0], timeframe))
-                logger.info(f"✅ Создан fallback OTC сигнал: {asset_name} {timeframe} ({asset_data['payout']}% доходность)")
+                items.append(scan_item(asset_name, asset_data, timeframe, min_confidence=75, is_otc=False, category="commodities"))
+
+    return items, timeframes
 
+
+async def scan_market_signals(timeframe_type, force_realtime=False, conn=None, early_delivery=False, deadline=None):
+    """
+    Оптимизированное сканирование рынка с поддержкой OTC активов.
+    early_delivery - вернуть TOP-K, как только появится сигнал на SCAN_EARLY_MARGIN выше порога,
+    остальное сканирование (доски, кэш) завершится в фоне.
+    deadline - бюджет ожидания в секундах: по истечении возвращаются лучшие из свежих
+    результатов и последнего снимка (сигналы снимка помечены stale).
+    """
+    cache_key = timeframe_type if timeframe_type in ['short', 'long'] else 'short'
+    current_time = time.time()
+
+    # Кэш действует до закрытия ближайшей свечи просканированных таймфреймов
+    if not force_realtime and current_time < signal_cache[cache_key]['expires_at']:
+        cached_signals = signal_cache[cache_key]['signals']
+        if cached_signals:
+            logger.info(f"✅ Using cached {cache_key} signals ({len(cached_signals)} found)")
+            return cached_signals
+
+    # Одновременные запросы ждут одно и то же сканирование
+    inflight = inflight_scans.get(cache_key)
+    if inflight is None or inflight[1].done():
+        items, timeframes = build_scan_items(timeframe_type)
+        pipeline = ScanPipeline(
+            items, fetch=fetch_scan_item, prepare=prepare_scan_item,
+            score=score_scan_item, early_margin=SCAN_EARLY_MARGIN
+        )
+        task = asyncio.create_task(_run_scan(timeframe_type, cache_key, timeframes, pipeline, current_time))
+        scan_tasks.add(task)
+        task.add_done_callback(_scan_done)
+        inflight = inflight_scans[cache_key] = (pipeline, task)
+
+    pipeline, task = inflight
+    if early_delivery:
+        early_signals = await pipeline.wait_early(timeout=deadline)
+        if early_signals:
+            logger.info(f"⚡ Early delivery: {early_signals[0][0]} {early_signals[0][2]}, scan continues in background")
+            return early_signals
+
+    # Отмена ожидающего обработчика не прерывает общее сканирование
+    if deadline is None:
+        return await asyncio.shield(task)
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), max(deadline - (time.time() - current_time), 0))
+    except asyncio.TimeoutError:
+        return anytime_signals(cache_key, pipeline)
+
+
+def anytime_signals(cache_key, pipeline, limit=3):
+    """
+    Лучшие сигналы к дедлайну: свежие из TOP-K конвейера плюс последний снимок
+    для ещё не просканированных пар. Сигналы снимка помечаются stale.
+    """
+    pending = pipeline.pending()
+    pending_keys = {(item['asset_name'], item['timeframe']) for item in pending}
+    snapshot = scan_snapshots[cache_key]
+
+    candidates = pipeline.scored()
+    for name, info, tf, score in snapshot['ranked']:
+        if (name, tf) in pending_keys:
+            stale_info = dict(info)
+            stale_info['stale'] = True
+            stale_info['scanned_at'] = snapshot['timestamp']
+            candidates.append((score, (name, stale_info, tf)))
+    candidates.sort(key=lambda c: c[0], reverse=True)
+    signals = [signal for _, signal in candidates[:limit]]
+
+    stale_assets = sorted({name for name, info, _ in signals if info.get('stale')})
+    logger.warning(
+        f"⏱ {cache_key} scan deadline: {len(pipeline.rows)}/{len(pipeline.items)} assets fresh, "
+        f"{len(pending)} pending; returned {len(signals)} signals"
+        + (f", stale: {', '.join(stale_assets)}" if stale_assets else "")
+    )
     return signals
 
 
+def _scan_done(task):
+    """Снять ссылку на задачу сканирования и записать её ошибку (после раннего ответа её некому поднять)"""
+    scan_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background market scan failed: {task.exception()!r}")
+
+
+async def _run_scan(timeframe_type, cache_key, timeframes, pipeline, current_time):
+    """Прогнать конвейер, ранжировать вселенную, опубликовать доски и обновить кэш"""
+    signals = []
+    try:
+        if timeframe_type == "short":
+            logger.info("🔍 SHORT: Поиск сигналов в реальном времени (приоритет OTC 92%)")
+
+        rows = await pipeline.run()
+        return_correlation.commit(timeframes)
+        snapshot = []
+        scored_signals, found = rank_scan_results(rows, snapshot=snapshot)
+        # Снимок всех проанализированных активов - одной пакетной записью
+        market_history.record(snapshot, current_time)
+
+        scan_snapshots[cache_key] = {'ranked': scored_signals[:SCAN_SNAPSHOT_LIMIT], 'timestamp': current_time}
+
+        # Опубликовать доски (категория, таймфрейм) для выдачи пользователям
+        if timeframes:
+            version = signal_boards.publish(cache_key, timeframes, scored_signals)
+            logger.info(f"📋 Signal boards v{version} published for {cache_key}")
+
+        # Взять ТОП-3 по score без коррелированных дублей одной ставки
+        if scored_signals:
+            top = return_correlation.diversify(scored_signals, 3)
+            signals = [(name, info, tf) for name, info, tf, score in top]
+
+            logger.info(f"📊 Market scan complete: {found} signals found, diversified TOP-{len(top)} selected")
+            for i, (name, info, tf, score) in enumerate(top, 1):
+                logger.info(f"   #{i}: {name} {tf} | Score: {score:.1f} | Payout: {info.get('payout', 85)}%")
+
+        # Обновить кэш
+        signal_cache[cache_key]['signals'] = signals
+        signal_cache[cache_key]['timestamp'] = current_time
+        signal_cache[cache_key]['expires_at'] = min(
+            (candle_close_time(tf, current_time) for tf in timeframes), default=current_time
+        )
+
+        # Fallback если нет сигналов
+        if not signals:
+            import random
+            logger.info("⚡ Генерируем fallback сигнал из OTC активов (92% доходность)")
+            if timeframe_type == "short":
+                all_assets = list(MARKET_ASSETS.get("crypto_otc", {}).items()) + list(MARKET_ASSETS.get("forex_otc", {}).items())
+                timeframe = random.choice(["1M", "5M"])
+            elif timeframe_type == "long":
+                all_assets = list(MARKET_ASSETS.get("forex_otc", {}).items()) + list(MARKET_ASSETS.get("stocks_otc", {}).items())
+                timeframe = random.choice(["1H", "4H"])
+            else:
+                all_assets = list(MARKET_ASSETS.get("crypto_otc", {}).items())[:3]
+                timeframe = "1M"
+
+            if all_assets:
+                asset_name, asset_data = random.choice(all_assets)
+                fallback_signal = generate_fallback_signal(asset_data["symbol"], timeframe)
+                if fallback_signal and fallback_signal[0]:
+                    fallback_signal[0]['asset_type'] = asset_data["type"]
+                    fallback_signal[0]['payout'] = asset_data["payout"]
+                    signals.append((asset_name, fallback_signal[0], timeframe))
+                    logger.info(f"✅ Создан fallback OTC сигнал: {asset_name} {timeframe} ({asset_data['payout']}% доходность)")
+
+        return signals
+    finally:
+        inflight = inflight_scans.get(cache_key)
+        if inflight and inflight[0] is pipeline:
+            del inflight_scans[cache_key]
+
+
 def get_expiration_time(timeframe):
     """Возвращает оптимальное время экспирации для Pocket Option"""
     expiration_map = {
@@ -412,101 +579,84 @@ def get_pocket_option_asset_name(asset_name):
     return pocket_name
 
 
+def log_board_changes(events):
+    """Подписчик досок: сводка изменений между сканированиями"""
+    counts = {}
+    for event in events:
+        counts[event.kind] = counts.get(event.kind, 0) + 1
+    summary = ", ".join(f"{kind}: {count}" for kind, count in counts.items())
+    logger.info(f"🔄 {events[0].timeframe_type} board v{events[0].version} changes - {summary}")
+
+
+signal_boards.subscribe(log_board_changes)
+
+
 # Анализатор - синглтон
 class MarketAnalyzer:
     """Класс для анализа рынка"""
     
     def __init__(self):
         self.cache = signal_cache
-        self.last_used_assets = last_used_assets
-        self.asset_loss_streak = asset_loss_streak
-        self.blocked_assets = blocked_assets
+        self.boards = signal_boards
+        self.exclusions = user_exclusions
+        self.blocklist = asset_blocklist
     
     async def get_signal(self, timeframe_type, user_priority='free', user_id=None, conn=None):
-        """Получить лучший сигнал из кэша"""
-        signals = self.cache.get(timeframe_type, {}).get('signals', [])
+        """Получить лучший сигнал с доски: проход по заранее ранжированному порядку"""
+        board = self.boards.merged(timeframe_type)
         
-        if not signals:
+        if not board:
             return None
         
-        # Получить список активных сигналов пользователя для исключения
-        active_user_signals = set()
-        if conn and user_id:
-            active_user_signals = set(conn.get_user_active_signals(user_id) if hasattr(conn, 'get_user_active_signals') else [])
+        # Активные сигналы пользователя загружаются из БД один раз, дальше ведутся при выдаче
+        if conn and user_id and user_id not in self.exclusions and hasattr(conn, 'get_user_active_signals'):
+            active = conn.get_user_active_signals(user_id)
+            # Асинхронный фасад БД возвращает awaitable
+            if inspect.isawaitable(active):
+                active = await active
+            self.exclusions.seed_active(user_id, active)
         
-        # Очистить заблокированные активы
         current_time = time.time()
-        for asset in list(self.blocked_assets.keys()):
-            if current_time >= self.blocked_assets.get(asset, 0):
-                if asset in self.blocked_assets:
-                    del self.blocked_assets[asset]
-                if asset in self.asset_loss_streak:
-                    del self.asset_loss_streak[asset]
         
-        scored_signals = []
+        best = None
         
-        for asset_name, signal_info, timeframe in signals:
-            # Исключаем активные сигналы пользователя
-            if (asset_name, timeframe) in active_user_signals:
+        # Доска уже упорядочена по score выдачи - первый допустимый и есть лучший
+        for entry in board:
+            # Сигнал рассчитан на уже закрытой свече
+            if entry.signal_info.get('expires_at', current_time + 1) <= current_time:
                 continue
             
             # Исключаем заблокированные активы
-            if asset_name in self.blocked_assets:
+            if self.blocklist.is_blocked(entry.asset_name, current_time):
                 continue
             
-            # Исключаем недавно использованные активы
-            if asset_name in self.last_used_assets.get(timeframe_type, []):
+            # Исключаем активные сигналы и недавно выданные этому пользователю активы
+            if self.exclusions.is_excluded(user_id, timeframe_type, entry.asset_name, entry.timeframe, current_time):
                 continue
             
-            base_confidence = signal_info.get('confidence', 0)
-            payout = signal_info.get('payout', 85)
-            
-            payout_bonus = 0
-            if payout >= 92:
-                payout_bonus = 25
-            elif payout >= 85:
-                payout_bonus = 15
-            
-            final_score = base_confidence + payout_bonus
-            
-            scored_signals.append({
-                'asset_name': asset_name,
-                'signal_info': signal_info,
-                'timeframe': timeframe,
-                'final_score': final_score
-            })
+            best = entry
+            break
         
-        if not scored_signals:
+        if best is None:
             return None
         
-        scored_signals.sort(key=lambda x: x['final_score'], reverse=True)
-        best = scored_signals[0]
+        expires_at = datetime.fromisoformat(calculate_expiration_time(best.timeframe)).timestamp()
+        self.exclusions.record_issue(user_id, timeframe_type, best.asset_name, best.timeframe, expires_at, current_time)
         
-        # Добавляем в список последних
-        if timeframe_type in self.last_used_assets:
-            self.last_used_assets[timeframe_type].append(best['asset_name'])
-            if len(self.last_used_assets[timeframe_type]) > MAX_RECENT_ASSETS:
-                self.last_used_assets[timeframe_type].pop(0)
-        
-        return (best['asset_name'], best['signal_info'], best['timeframe'])
+        return best.as_signal()
+    
+    def attach_storage(self, db):
+        """Подключить БД для сохранения блокировок активов между перезапусками"""
+        self.blocklist.attach_storage(db)
     
     def update_after_win(self, asset_name, timeframe_type='short'):
         """Обновить после выигрыша"""
-        if asset_name in self.asset_loss_streak:
-            del self.asset_loss_streak[asset_name]
-        if asset_name in self.blocked_assets:
-            del self.blocked_assets[asset_name]
+        self.blocklist.record_win(asset_name)
     
     def update_after_loss(self, asset_name, timeframe_type='short'):
         """Обновить после проигрыша"""
-        if asset_name in self.asset_loss_streak:
-            self.asset_loss_streak[asset_name] += 1
-        else:
-            self.asset_loss_streak[asset_name] = 1
-        
-        if self.asset_loss_streak[asset_name] >= MAX_CONSECUTIVE_LOSSES:
-            self.blocked_assets[asset_name] = time.time() + 3600  # Блокировка на 1 час
-            logger.warning(f"🚫 Актив {asset_name} заблокирован после {MAX_CONSECUTIVE_LOSSES} проигрышей подряд")
+        if self.blocklist.record_loss(asset_name):
+            logger.warning(f"🚫 Актив {asset_name} заблокирован после {self.blocklist.max_losses} проигрышей подряд")
 
 
 # Создаем глобальный экземпляр
@@ -0,0 +1,139 @@
+"""
+Market History module - запись снимков сканирования в market_history
+Каждое сканирование добавляет строки всех проанализированных активов одним
+executemany через очередь отложенной записи. Строки старше
+MARKET_HISTORY_RAW_DAYS сворачиваются в дневные корзины (bucket = 'day',
+samples - число исходных строк), корзины старше MARKET_HISTORY_KEEP_DAYS удаляются.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from modules.constants import MARKET_HISTORY_RAW_DAYS, MARKET_HISTORY_KEEP_DAYS, MARKET_HISTORY_COMPACT_SEC
+
+logger = logging.getLogger(__name__)
+
+# Столбцы снимка и ключи словаря сигнала, из которых они берутся
+SNAPSHOT_FIELDS = (
+    ('price', 'price'),
+    ('volatility', 'volatility'),
+    ('volume', 'volume'),
+    ('avg_volume', 'avg_volume'),
+    ('volume_ratio', 'volume_ratio'),
+    ('whale_detected', 'whale_detected'),
+    ('trend', 'trend'),
+    ('rsi', 'rsi'),
+    ('macd', 'macd'),
+    ('stoch_k', 'stoch_k'),
+    ('ema_20', 'ema_20'),
+    ('ema_50', 'ema_50'),
+    ('signal_generated', 'signal'),
+    ('confidence', 'confidence'),
+    ('score', 'score'),
+)
+
+# Числовые столбцы, усредняемые в корзине с весом samples
+AVERAGED_COLUMNS = ('price', 'volatility', 'volume', 'avg_volume', 'volume_ratio',
+                    'rsi', 'macd', 'stoch_k', 'ema_20', 'ema_50', 'confidence', 'score')
+
+INSERT_SQL = f'''
+    INSERT INTO market_history (asset_symbol, timeframe, timestamp, {', '.join(c for c, _ in SNAPSHOT_FIELDS)})
+    VALUES ({', '.join('?' * (len(SNAPSHOT_FIELDS) + 3))})
+'''
+
+
+def _weighted_average(column):
+    return f'1.0 * SUM({column} * samples) / SUM(CASE WHEN {column} IS NOT NULL THEN samples END)'
+
+
+ROLLUP_SQL = f'''
+    INSERT INTO market_history
+    (asset_symbol, timeframe, timestamp, trend, signal_generated, whale_detected, samples, bucket,
+     {', '.join(AVERAGED_COLUMNS)})
+    SELECT asset_symbol, timeframe, date(timestamp), trend, signal_generated, whale_detected,
+           SUM(samples), 'day',
+           {', '.join(_weighted_average(c) for c in AVERAGED_COLUMNS)}
+    FROM market_history
+    WHERE bucket IS NULL AND timestamp < ?
+    GROUP BY asset_symbol, timeframe, date(timestamp), trend, signal_generated, whale_detected
+'''
+
+
+def _sql_value(value):
+    """numpy-скаляры в типы Python: sqlite3 не привязывает np.int64"""
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _utc_timestamp(moment):
+    """Формат CURRENT_TIMESTAMP SQLite: аналитика сравнивает с datetime('now', ...)"""
+    return datetime.fromtimestamp(moment, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class MarketHistoryRecorder:
+    """Пакетная запись снимков сканирования и свёртка старых строк в дневные корзины"""
+
+    def __init__(self, raw_days=MARKET_HISTORY_RAW_DAYS, keep_days=MARKET_HISTORY_KEEP_DAYS,
+                 compact_interval=MARKET_HISTORY_COMPACT_SEC):
+        self.raw_days = raw_days
+        self.keep_days = keep_days
+        self.compact_interval = compact_interval
+        self._submit = None
+        self._compacted_at = 0.0
+        self._lock = threading.Lock()
+
+    def attach_storage(self, submit):
+        """Подключить очередь записи БД: submit(op), где op(cursor) выполняется в транзакции пакета"""
+        self._submit = submit
+
+    def rows(self, signals, moment):
+        """Строки market_history из сигналов (asset_name, signal_info, timeframe, ...)"""
+        timestamp = _utc_timestamp(moment)
+        rows = []
+        for _, info, timeframe, *_ in signals:
+            values = [_sql_value(info.get(key)) for _, key in SNAPSHOT_FIELDS]
+            rows.append((info.get('asset'), timeframe, timestamp, *values))
+        return rows
+
+    def record(self, signals, moment=None):
+        """Поставить снимок сканирования в очередь записи; возвращает число строк"""
+        if self._submit is None or not signals:
+            return 0
+        moment = time.time() if moment is None else moment
+        rows = self.rows(signals, moment)
+        compact = self._compaction_due(moment)
+
+        def op(cursor):
+            cursor.executemany(INSERT_SQL, rows)
+            if compact:
+                self.compact(cursor, moment)
+
+        self._submit(op)
+        return len(rows)
+
+    def _compaction_due(self, moment):
+        with self._lock:
+            if moment - self._compacted_at < self.compact_interval:
+                return False
+            self._compacted_at = moment
+            return True
+
+    def compact(self, cursor, moment=None):
+        """Свернуть сырые строки старше raw_days в дневные корзины и удалить корзины старше keep_days"""
+        now = datetime.fromtimestamp(time.time() if moment is None else moment, timezone.utc)
+        # Граница по началу суток: в корзину попадают только целые дни
+        raw_cutoff = (now - timedelta(days=self.raw_days)).strftime('%Y-%m-%d')
+        keep_cutoff = (now - timedelta(days=self.keep_days)).strftime('%Y-%m-%d')
+
+        cursor.execute(ROLLUP_SQL, (raw_cutoff,))
+        buckets = cursor.rowcount
+        cursor.execute('DELETE FROM market_history WHERE bucket IS NULL AND timestamp < ?', (raw_cutoff,))
+        rolled = cursor.rowcount
+        cursor.execute('DELETE FROM market_history WHERE timestamp < ?', (keep_cutoff,))
+        expired = cursor.rowcount
+        if rolled or expired:
+            logger.info(f"🗜 market_history: {rolled} rows rolled into {buckets} daily buckets, {expired} expired")
+
+
+# Общий регистратор снимков сканирования
+market_history = MarketHistoryRecorder()
@@ -0,0 +1,107 @@
+"""
+Migrations module - версионированные миграции схемы SQLite
+Применённые версии хранятся в таблице schema_version отдельно для каждого
+компонента (несколько модулей БД работают с одним файлом). При запуске с
+актуальной базой выполняется один запрос MAX(version); иначе недостающие
+миграции применяются по порядку в одной транзакции. Состав столбцов
+читается через PRAGMA table_info один раз на таблицу.
+"""
+import logging
+import sqlite3
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationContext:
+    """Курсор транзакции миграции и кэш столбцов таблиц"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self._columns = {}
+
+    def execute(self, sql, params=()):
+        return self.cursor.execute(sql, params)
+
+    def columns(self, table):
+        """Имена столбцов таблицы (пустое множество, если таблицы нет)"""
+        if table not in self._columns:
+            self.cursor.execute(f'PRAGMA table_info({table})')
+            self._columns[table] = {row[1] for row in self.cursor.fetchall()}
+        return self._columns[table]
+
+    def ensure_table(self, table, columns, constraints=()):
+        """
+        Создать таблицу по списку (столбец, определение[, определение для ALTER])
+        или добавить в существующую недостающие столбцы. ALTER TABLE не принимает
+        непостоянный DEFAULT (CURRENT_TIMESTAMP) - для таких столбцов задаётся
+        третий элемент. True, если таблица создана.
+        """
+        existing = self.columns(table)
+        if not existing:
+            definitions = [f'{name} {definition}' for name, definition, *_ in columns]
+            self.cursor.execute(f'CREATE TABLE {table} ({", ".join(definitions + list(constraints))})')
+            self._columns[table] = {column[0] for column in columns}
+            return True
+
+        for name, definition, *alter in columns:
+            if name not in existing:
+                definition = alter[0] if alter else definition
+                self.cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+                existing.add(name)
+                logger.info(f"✅ Added column {name} to {table} table")
+        return False
+
+
+def schema_version(conn, component):
+    """Последняя применённая версия схемы компонента (0 для базы без schema_version)"""
+    try:
+        row = conn.execute('SELECT MAX(version) FROM schema_version WHERE component = ?', (component,)).fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+def migrate(conn, component, migrations):
+    """
+    Применить недостающие миграции компонента - последовательность
+    (версия, описание, apply(ctx)) по возрастанию версии.
+    Возвращает число применённых миграций.
+    """
+    target = migrations[-1][0]
+    if schema_version(conn, component) >= target:
+        return 0
+
+    cursor = conn.cursor()
+    # IMMEDIATE: второй процесс, запущенный одновременно, ждёт и видит уже обновлённую схему
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                component TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                description TEXT,
+                applied_at TEXT,
+                PRIMARY KEY (component, version)
+            )
+        ''')
+        current = schema_version(conn, component)
+        ctx = MigrationContext(cursor)
+        applied = 0
+        for version, description, apply in migrations:
+            if version <= current:
+                continue
+            apply(ctx)
+            cursor.execute(
+                'INSERT INTO schema_version (component, version, description, applied_at) VALUES (?, ?, ?, ?)',
+                (component, version, description, datetime.now().isoformat())
+            )
+            applied += 1
+            logger.info(f"✅ Schema migration {component} {version}: {description}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return applied
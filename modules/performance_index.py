@@ -0,0 +1,121 @@
+"""
+Performance Index module - статистика результатов по (актив, таймфрейм) в памяти
+Индекс загружается из signal_performance при старте, обновляется за O(1)
+при записи результата сигнала и пакетно сбрасывается обратно в таблицу.
+Скоринг читает адаптивные веса без запросов к БД.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+from modules.constants import PERFORMANCE_PRIOR, ADAPTIVE_WEIGHT_MIN, ADAPTIVE_WEIGHT_MAX, PERFORMANCE_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+def adaptive_weight(wins, total, prior=PERFORMANCE_PRIOR):
+    """Вес по сглаженному win rate: 1.0 без истории, выше - для стабильно выигрывающих пар"""
+    smoothed = (wins + prior) / (total + 2 * prior)
+    return min(max(smoothed * 2, ADAPTIVE_WEIGHT_MIN), ADAPTIVE_WEIGHT_MAX)
+
+
+class PerformanceIndex:
+    """Счётчики побед/поражений и адаптивные веса пар (актив, таймфрейм)"""
+
+    def __init__(self, flush_interval=PERFORMANCE_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._stats = {}
+        self._dirty = set()
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+
+    def load(self, conn):
+        """Заполнить индекс из таблицы signal_performance"""
+        cursor = conn.cursor()
+        cursor.execute('SELECT asset, timeframe, wins, losses FROM signal_performance')
+        with self._lock:
+            self._stats = {
+                (asset, timeframe): [wins or 0, losses or 0]
+                for asset, timeframe, wins, losses in cursor.fetchall()
+            }
+            self._dirty.clear()
+        logger.info(f"📈 Performance index loaded: {len(self._stats)} asset/timeframe pairs")
+
+    def record(self, asset, timeframe, result):
+        """Учесть результат сигнала ('win'/'loss')"""
+        if result not in ('win', 'loss'):
+            return
+        key = (asset, timeframe)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = [0, 0]
+            stats[0 if result == 'win' else 1] += 1
+            self._dirty.add(key)
+
+    def weight(self, asset, timeframe):
+        stats = self._stats.get((asset, timeframe))
+        if stats is None:
+            return 1.0
+        return adaptive_weight(stats[0], stats[0] + stats[1])
+
+    def combined_weight(self, assets, timeframe):
+        """Вес по суммарной статистике нескольких названий одного инструмента"""
+        wins = 0
+        total = 0
+        for asset in assets:
+            stats = self._stats.get((asset, timeframe))
+            if stats:
+                wins += stats[0]
+                total += stats[0] + stats[1]
+        return adaptive_weight(wins, total)
+
+    def maybe_flush(self, conn):
+        """Сбросить изменения, если с прошлого сброса прошло flush_interval секунд"""
+        if self._dirty and time.time() - self._last_flush >= self.flush_interval:
+            self.flush(conn)
+
+    def flush(self, conn):
+        """Записать изменённые пары в signal_performance одним пакетом"""
+        with self._lock:
+            if not self._dirty:
+                return 0
+            now = datetime.now().isoformat()
+            rows = []
+            for key in self._dirty:
+                wins, losses = self._stats[key]
+                total = wins + losses
+                rows.append((
+                    key[0], key[1], total, wins, losses,
+                    wins / total * 100 if total else 0.0,
+                    adaptive_weight(wins, total), now
+                ))
+            flushed = set(self._dirty)
+            self._dirty.clear()
+            self._last_flush = time.time()
+
+        try:
+            conn.executemany('''
+                INSERT INTO signal_performance
+                (asset, timeframe, total_signals, wins, losses, win_rate, adaptive_weight, last_updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(asset, timeframe) DO UPDATE SET
+                    total_signals = excluded.total_signals,
+                    wins = excluded.wins,
+                    losses = excluded.losses,
+                    win_rate = excluded.win_rate,
+                    adaptive_weight = excluded.adaptive_weight,
+                    last_updated = excluded.last_updated
+            ''', rows)
+            conn.commit()
+        except Exception:
+            # Несохранённые пары уйдут следующим пакетом
+            with self._lock:
+                self._dirty.update(flushed)
+            raise
+        return len(rows)
+
+
+# Общий индекс результатов
+performance_index = PerformanceIndex()
@@ -0,0 +1,55 @@
+"""
+Profile Cache module - кэш профилей пользователей в памяти процесса
+Язык, валюта, бан и дневные квоты читаются из users один раз и дальше
+отдаются из LRU. Методы записи профиля сбрасывают запись пользователя,
+поэтому отрисовка меню в устойчивом режиме не обращается к БД.
+"""
+import threading
+from collections import OrderedDict
+
+from modules.constants import PROFILE_CACHE_SIZE
+
+
+class UserProfileCache:
+    """Ограниченный LRU-кэш профилей с защитой от записи устаревших данных"""
+
+    def __init__(self, max_size=PROFILE_CACHE_SIZE):
+        self.max_size = max_size
+        self._profiles = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def get(self, user_id, loader):
+        """Профиль из кэша или loader(user_id) с сохранением в кэш"""
+        with self._lock:
+            profile = self._profiles.get(user_id)
+            if profile is not None:
+                self._profiles.move_to_end(user_id)
+                return profile
+            generation = self._generation
+
+        profile = loader(user_id)
+
+        with self._lock:
+            # Профиль сбросили, пока шла загрузка - результат мог устареть, не кэшируем
+            if generation == self._generation:
+                self._profiles[user_id] = profile
+                if len(self._profiles) > self.max_size:
+                    self._profiles.popitem(last=False)
+        return profile
+
+    def invalidate(self, user_id=None):
+        """Сбросить профиль пользователя (всех - при user_id=None)"""
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._profiles.clear()
+            else:
+                self._profiles.pop(user_id, None)
+
+
+# Общий кэш профилей процесса: Database и функции modules/database.py
+user_profiles = UserProfileCache()
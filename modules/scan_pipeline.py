@@ -0,0 +1,140 @@
+"""
+Scan Pipeline module - конвейер сканирования рынка
+Загрузка данных -> индикаторы и признаки -> оценка, между стадиями
+ограниченные очереди. Оценённые строки попадают в онлайн-кучу TOP-K:
+ожидающим обработчикам отдаётся первый сигнал выше порога, а
+остальная часть сканирования продолжается в фоне.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+
+from modules.constants import SCAN_FETCH_WORKERS, SCAN_PREPARE_WORKERS, SCAN_QUEUE_SIZE, SCAN_TOP_K
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class ScanPipeline:
+    """
+    Асинхронный конвейер над списком элементов сканирования.
+    fetch(item) -> data и prepare(item, data) -> item (дополненный) выполняются в потоках,
+    score(row) -> (score, запас уверенности над порогом, signal) или None - в цикле событий.
+    """
+
+    def __init__(self, items, fetch, prepare, score, early_margin,
+                 top_k=SCAN_TOP_K, fetch_workers=SCAN_FETCH_WORKERS,
+                 prepare_workers=SCAN_PREPARE_WORKERS, queue_size=SCAN_QUEUE_SIZE):
+        self.items = list(items)
+        self.fetch = fetch
+        self.prepare = prepare
+        self.score = score
+        self.early_margin = early_margin
+        self.top_k = top_k
+        self.fetch_workers = max(1, min(fetch_workers, len(self.items)))
+        self.prepare_workers = max(1, prepare_workers)
+        self.queue_size = queue_size
+
+        self.rows = []
+        self._heap = []
+        self._seq = itertools.count()
+        self._early = asyncio.Event()
+        self._done = asyncio.Event()
+
+    async def _fetch_stage(self, source, fetched):
+        for item in source:
+            try:
+                data = await asyncio.to_thread(self.fetch, item)
+            except Exception as e:
+                logger.error(f"Scan fetch failed for {item.get('asset_name')}: {e}")
+                data = None
+            await fetched.put((item, data))
+
+    async def _prepare_stage(self, fetched, prepared):
+        while True:
+            entry = await fetched.get()
+            if entry is _DONE:
+                return
+            item, data = entry
+            try:
+                row = await asyncio.to_thread(self.prepare, item, data)
+            except Exception as e:
+                logger.error(f"Scan prepare failed for {item.get('asset_name')}: {e}")
+                row = item
+            await prepared.put(row)
+
+    def _push(self, row):
+        scored = self.score(row)
+        if scored is None:
+            return
+        final_score, margin, signal = scored
+        entry = (final_score, next(self._seq), signal)
+        if len(self._heap) < self.top_k:
+            heapq.heappush(self._heap, entry)
+        elif final_score > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+        if margin >= self.early_margin:
+            self._early.set()
+
+    async def run(self):
+        """Прогнать все элементы; возвращает подготовленные строки в порядке готовности"""
+        fetched = asyncio.Queue(self.queue_size)
+        prepared = asyncio.Queue(self.queue_size)
+        # Общий итератор: каждый загрузчик берёт следующий элемент
+        source = iter(self.items)
+
+        fetchers = [asyncio.create_task(self._fetch_stage(source, fetched)) for _ in range(self.fetch_workers)]
+        preparers = [asyncio.create_task(self._prepare_stage(fetched, prepared)) for _ in range(self.prepare_workers)]
+
+        async def close_stages():
+            await asyncio.gather(*fetchers)
+            for _ in preparers:
+                await fetched.put(_DONE)
+            await asyncio.gather(*preparers)
+            await prepared.put(_DONE)
+
+        closer = asyncio.create_task(close_stages())
+        try:
+            while True:
+                row = await prepared.get()
+                if row is _DONE:
+                    break
+                self.rows.append(row)
+                try:
+                    self._push(row)
+                except Exception as e:
+                    logger.error(f"Scan scoring failed for {row.get('asset_name')}: {e}")
+            await closer
+        finally:
+            for task in fetchers + preparers + [closer]:
+                task.cancel()
+            self._done.set()
+        return self.rows
+
+    def scored(self):
+        """Текущие лучшие (score, сигнал) по убыванию score"""
+        return [(score, signal) for score, _, signal in sorted(self._heap, reverse=True)]
+
+    def top(self):
+        """Текущие лучшие сигналы по убыванию score"""
+        return [signal for _, signal in self.scored()]
+
+    def pending(self):
+        """Элементы, ещё не прошедшие конвейер"""
+        processed = {id(row) for row in self.rows}
+        return [item for item in self.items if id(item) not in processed]
+
+    async def wait_early(self, timeout=None):
+        """Дождаться первого сигнала выше порога; None если сканирование закончилось раньше или вышел timeout"""
+        early = asyncio.create_task(self._early.wait())
+        done = asyncio.create_task(self._done.wait())
+        try:
+            await asyncio.wait({early, done}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            early.cancel()
+            done.cancel()
+        if self._early.is_set() and not self._done.is_set():
+            return self.top()
+        return None
@@ -0,0 +1,133 @@
+"""
+Scoring module - векторная оценка CALL/PUT по всей вселенной активов
+Условия, бонусы и ограничение уверенности считаются массивными операциями
+над векторами индикаторов последнего бара всех пар (актив, таймфрейм) сразу.
+"""
+import numpy as np
+
+from modules.constants import ADX_TREND_THRESHOLD
+
+# Поля вектора признаков последнего бара
+FEATURE_FIELDS = (
+    'close', 'ema_20', 'ema_50', 'rsi', 'stoch_k', 'macd', 'macd_signal',
+    'adx', 'volatility', 'whale'
+)
+
+# Бонус ранжирования за повышенную доходность
+HIGH_PAYOUT = 92
+HIGH_PAYOUT_BONUS = 25
+REGULAR_PAYOUT = 85
+REGULAR_PAYOUT_BONUS = 15
+
+
+def extract_features(data, volume_signal=None):
+    """Вектор признаков последнего бара из DataFrame с индикаторами
+
+    volume_signal - оценка объёма от WhaleDetector (None для инструментов без объёма)
+    """
+    current = data.iloc[-1]
+    volatility = data['Close'].pct_change().std() * 100
+
+    avg_volume = 0.0
+    current_volume = 0.0
+    volume_ratio = 0.0
+    if 'Volume' in data.columns:
+        avg_volume = float(data['Volume'].rolling(20).mean().iloc[-1])
+        current_volume = float(data['Volume'].iloc[-1])
+        if avg_volume > 0:
+            volume_ratio = current_volume / avg_volume
+
+    return {
+        'close': float(current['Close']),
+        'ema_20': float(current['EMA_20']),
+        'ema_50': float(current['EMA_50']),
+        'rsi': float(current['RSI']),
+        'stoch_k': float(current['Stoch_K']),
+        'macd': float(current['MACD']),
+        'macd_signal': float(current['MACD_Signal']),
+        'atr': float(current['ATR']),
+        'bb_width': float(current['BB_Width']),
+        'adx': float(current['ADX']),
+        'volatility': float(volatility),
+        'volume': current_volume,
+        'avg_volume': avg_volume,
+        'volume_ratio': float(volume_ratio),
+        'volume_z': float(volume_signal['z_score']) if volume_signal else 0.0,
+        'whale': bool(volume_signal and volume_signal['whale']),
+    }
+
+
+def stack_features(rows):
+    """Собрать список векторов признаков в таблицу {поле: np.ndarray}"""
+    table = {}
+    for field in FEATURE_FIELDS:
+        dtype = bool if field == 'whale' else np.float64
+        table[field] = np.fromiter((row[field] for row in rows), dtype=dtype, count=len(rows))
+    return table
+
+
+def score_universe(table, min_conf=70, max_conf=92):
+    """Оценить все строки таблицы признаков за один проход"""
+    bullish = table['ema_20'] > table['ema_50']
+    close = table['close']
+    ema_20 = table['ema_20']
+
+    call_score = (
+        bullish.astype(np.int64)
+        + (close > ema_20)
+        + (table['rsi'] < 70)
+        + (table['stoch_k'] < 80)
+        + (table['macd'] > table['macd_signal'])
+    )
+    put_score = (
+        (~bullish).astype(np.int64)
+        + (close < ema_20)
+        + (table['rsi'] > 30)
+        + (table['stoch_k'] > 20)
+        + (table['macd'] < table['macd_signal'])
+    )
+
+    # Крупный игрок и сильный тренд по ADX усиливают сторону тренда
+    trend_bonus = table['whale'].astype(np.int64) + (table['adx'] >= ADX_TREND_THRESHOLD)
+    call_score = call_score + np.where(bullish, trend_bonus, 0)
+    put_score = put_score + np.where(bullish, 0, trend_bonus)
+
+    volatility = table['volatility']
+    stability_bonus = np.where(volatility < 2.0, 3, np.where(volatility < 3.0, 1, 0))
+
+    total_call = call_score + stability_bonus
+    total_put = put_score + stability_bonus
+    is_call = total_call >= total_put
+    score = np.where(is_call, total_call, total_put)
+    confidence = np.round(np.clip(min_conf + score * 6.0, min_conf, max_conf), 1)
+
+    return {
+        'bullish': bullish,
+        'is_call': is_call,
+        'score': score,
+        'confidence': confidence,
+    }
+
+
+def rank_scores(confidence, payout, min_confidence, weights=None):
+    """Ранжировать строки: индексы прошедших порог по убыванию итогового score
+
+    weights - адаптивные веса пар по истории результатов (умножают уверенность)
+    """
+    confidence = np.asarray(confidence, dtype=np.float64)
+    payout = np.asarray(payout, dtype=np.float64)
+    weighted = confidence if weights is None else confidence * np.asarray(weights, dtype=np.float64)
+    final_score = weighted + np.where(payout >= HIGH_PAYOUT, HIGH_PAYOUT_BONUS, 0)
+    passed = np.flatnonzero(confidence >= np.asarray(min_confidence, dtype=np.float64))
+    order = passed[np.argsort(-final_score[passed], kind='stable')]
+    return order, final_score
+
+
+def selection_scores(confidence, payout, weights=None):
+    """Score выдачи пользователю: уверенность (с адаптивным весом) плюс бонус за доходность 92% и 85%"""
+    confidence = np.asarray(confidence, dtype=np.float64)
+    payout = np.asarray(payout, dtype=np.float64)
+    if weights is not None:
+        confidence = confidence * np.asarray(weights, dtype=np.float64)
+    bonus = np.where(payout >= HIGH_PAYOUT, HIGH_PAYOUT_BONUS, np.where(payout >= REGULAR_PAYOUT, REGULAR_PAYOUT_BONUS, 0))
+    return confidence + bonus
@@ -0,0 +1,94 @@
+"""
+Settings Cache module - кэш bot_settings в памяти процесса
+Настройки читаются целиком один раз и отдаются из памяти уже разобранными
+(списки int, float, bool). set_setting увеличивает версию в строке
+settings_version; другие процессы раз в несколько секунд сверяют её
+одним запросом по первичному ключу и перечитывают таблицу при изменении.
+"""
+import threading
+import time
+
+from modules.constants import SETTINGS_VERSION_CHECK_SEC
+
+SETTINGS_VERSION_KEY = 'settings_version'
+
+# Увеличение версии настроек в той же транзакции, что и запись значения
+BUMP_VERSION_SQL = '''
+    INSERT INTO bot_settings (key, value) VALUES ('settings_version', '1')
+    ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+'''
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+class SettingsCache:
+    """Типизированный кэш настроек с версией и редкой проверкой её изменения"""
+
+    def __init__(self, check_interval=SETTINGS_VERSION_CHECK_SEC):
+        self.check_interval = check_interval
+        self.version = None
+        self._values = {}
+        self._parsed = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def sync(self, conn):
+        """Сверить версию (не чаще check_interval) и перечитать настройки, если она изменилась"""
+        now = time.monotonic()
+        if self.version is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if self.version is not None and now - self._checked_at < self.check_interval:
+                return
+            cursor = conn.cursor()
+            cursor.execute('SELECT value FROM bot_settings WHERE key = ?', (SETTINGS_VERSION_KEY,))
+            row = cursor.fetchone()
+            version = row[0] if row else '0'
+            if version != self.version:
+                cursor.execute('SELECT key, value FROM bot_settings')
+                self._values = {key: value for key, value in cursor.fetchall() if key != SETTINGS_VERSION_KEY}
+                self._parsed = {}
+                self.version = version
+            self._checked_at = now
+
+    def invalidate(self):
+        """Перечитать при следующем sync (после записи этим процессом)"""
+        with self._lock:
+            self.version = None
+
+    def get(self, key, default=None):
+        """Строковое значение настройки; default если её нет"""
+        value = self._values.get(key)
+        return default if value is None else value
+
+    def _typed(self, kind, key, default, parse):
+        # Берём словарь разборов до чтения значения: sync сначала меняет значения, потом словарь
+        parsed = self._parsed
+        memo_key = (kind, key, default)
+        try:
+            return parsed[memo_key]
+        except KeyError:
+            pass
+        raw = self.get(key)
+        if not raw:
+            raw = default
+        try:
+            value = parse(raw) if isinstance(raw, str) else raw
+        except (TypeError, ValueError):
+            value = parse(default) if isinstance(default, str) else default
+        parsed[memo_key] = value
+        return value
+
+    def get_int(self, key, default=0):
+        return self._typed('int', key, default, lambda raw: int(raw.strip()))
+
+    def get_float(self, key, default=0.0):
+        return self._typed('float', key, default, lambda raw: float(raw.strip()))
+
+    def get_bool(self, key, default=False):
+        return self._typed('bool', key, default, lambda raw: raw.strip().lower() in _TRUE_VALUES)
+
+    def get_int_list(self, key, default=''):
+        """Список int из строки через запятую (например admin_users)"""
+        return self._typed('int_list', key, default,
+                           lambda raw: tuple(int(part.strip()) for part in raw.split(',') if part.strip()))
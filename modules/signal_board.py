@@ -0,0 +1,204 @@
+"""
+Signal Board module - материализованные доски сигналов после сканирования
+Сканер публикует неизменяемую ранжированную доску на каждую пару
+(категория, таймфрейм) и заранее сливает их в общий порядок выдачи
+для типа таймфрейма. Выбор сигнала пользователю - проход по готовому
+порядку без пересчёта score и сортировки.
+Новая доска сравнивается с предыдущей, подписчики получают только
+изменения: новый сигнал, смена направления, выбывание, сдвиг уверенности.
+"""
+import logging
+import threading
+import time
+from types import MappingProxyType
+
+from modules.constants import SIGNAL_BOARD_SIZE, BOARD_CONFIDENCE_DELTA
+from modules.scoring import selection_scores
+
+logger = logging.getLogger(__name__)
+
+# Типы событий изменения доски
+EVENT_NEW = 'new'
+EVENT_FLIP = 'flip'
+EVENT_DROPPED = 'dropped'
+EVENT_CONFIDENCE = 'confidence'
+
+
+class BoardEntry:
+    """Строка доски: актив, таймфрейм, данные сигнала и score выдачи"""
+
+    __slots__ = ('asset_name', 'timeframe', 'signal_info', 'score')
+
+    def __init__(self, asset_name, timeframe, signal_info, score):
+        self.asset_name = asset_name
+        self.timeframe = timeframe
+        self.signal_info = MappingProxyType(dict(signal_info))
+        self.score = score
+
+    def as_signal(self):
+        """Кортеж (актив, копия signal_info, таймфрейм) в формате выдачи сигналов"""
+        return (self.asset_name, dict(self.signal_info), self.timeframe)
+
+
+class BoardEvent:
+    """Изменение доски между двумя публикациями"""
+
+    __slots__ = ('kind', 'timeframe_type', 'asset_name', 'timeframe', 'signal', 'confidence', 'previous', 'version')
+
+    def __init__(self, kind, timeframe_type, asset_name, timeframe, signal, confidence, previous, version):
+        self.kind = kind
+        self.timeframe_type = timeframe_type
+        self.asset_name = asset_name
+        self.timeframe = timeframe
+        self.signal = signal
+        self.confidence = confidence
+        # Направление (flip) или уверенность (confidence) на прошлой доске
+        self.previous = previous
+        self.version = version
+
+    def __repr__(self):
+        return (f"BoardEvent({self.kind}, {self.asset_name} {self.timeframe}, "
+                f"{self.signal} {self.confidence}, previous={self.previous})")
+
+
+def diff_boards(previous, current, timeframe_type, version, timeframes=None, min_delta=BOARD_CONFIDENCE_DELTA):
+    """
+    События между двумя досками (итерируемые BoardEntry).
+    Выбывание учитывается только для таймфреймов timeframes (все при None).
+    """
+    old = {(e.asset_name, e.timeframe): e for e in previous or ()}
+    new = {(e.asset_name, e.timeframe): e for e in current or ()}
+
+    events = []
+    for key, entry in new.items():
+        info = entry.signal_info
+        signal = info.get('signal')
+        confidence = info.get('confidence', 0)
+        before = old.get(key)
+        if before is None:
+            events.append(BoardEvent(EVENT_NEW, timeframe_type, key[0], key[1], signal, confidence, None, version))
+            continue
+        previous_signal = before.signal_info.get('signal')
+        previous_confidence = before.signal_info.get('confidence', 0)
+        if signal != previous_signal:
+            events.append(BoardEvent(EVENT_FLIP, timeframe_type, key[0], key[1], signal, confidence, previous_signal, version))
+        elif abs(confidence - previous_confidence) >= min_delta:
+            events.append(BoardEvent(
+                EVENT_CONFIDENCE, timeframe_type, key[0], key[1], signal, confidence, previous_confidence, version
+            ))
+
+    for key, entry in old.items():
+        if key not in new and (timeframes is None or key[1] in timeframes):
+            info = entry.signal_info
+            events.append(BoardEvent(
+                EVENT_DROPPED, timeframe_type, key[0], key[1], info.get('signal'), info.get('confidence', 0), None, version
+            ))
+    return events
+
+
+class SignalBoard:
+    """Неизменяемая доска: TOP-N записей одной пары (категория, таймфрейм) или слитый порядок"""
+
+    __slots__ = ('key', 'version', 'published_at', 'entries')
+
+    def __init__(self, key, version, entries, published_at=None):
+        self.key = key
+        self.version = version
+        self.entries = tuple(entries)
+        self.published_at = published_at if published_at is not None else time.time()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+
+class SignalBoardStore:
+    """Хранилище досок: публикация заменяет доски целиком, чтение не блокируется"""
+
+    def __init__(self, size=SIGNAL_BOARD_SIZE):
+        self.size = size
+        self._boards = {}
+        self._merged = {}
+        self._version = 0
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Подписаться на изменения: callback(events) после каждой публикации с изменениями"""
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def publish(self, timeframe_type, timeframes, ranked):
+        """
+        Опубликовать результат сканирования таймфреймов timeframes.
+        ranked - список (актив, signal_info, таймфрейм, score скана) по убыванию score.
+        Доски просканированных таймфреймов заменяются целиком, пустые снимаются.
+        Возвращает версию; подписчики получают события относительно прошлой доски.
+        """
+        boards = {}
+        for asset_name, signal_info, timeframe, _ in ranked:
+            key = (signal_info.get('category', 'regular'), timeframe)
+            rows = boards.setdefault(key, [])
+            if len(rows) < self.size:
+                rows.append((asset_name, signal_info, timeframe))
+
+        with self._lock:
+            self._version += 1
+            version = self._version
+            published_at = time.time()
+
+            for key in [k for k in self._boards if k[1] in timeframes]:
+                del self._boards[key]
+
+            merged = []
+            for key, rows in boards.items():
+                scores = selection_scores(
+                    [info.get('confidence', 0) for _, info, _ in rows],
+                    [info.get('payout', 85) for _, info, _ in rows],
+                    [info.get('adaptive_weight', 1.0) for _, info, _ in rows]
+                )
+                entries = [
+                    BoardEntry(name, tf, info, float(score))
+                    for (name, info, tf), score in zip(rows, scores)
+                ]
+                entries.sort(key=lambda e: e.score, reverse=True)
+                self._boards[key] = SignalBoard(key, version, entries, published_at)
+                merged.extend(entries)
+
+            merged.sort(key=lambda e: e.score, reverse=True)
+            previous = self._merged.get(timeframe_type)
+            self._merged[timeframe_type] = SignalBoard(timeframe_type, version, merged, published_at)
+
+        events = diff_boards(previous, merged, timeframe_type, version, timeframes)
+        if events:
+            self._notify(events)
+        return version
+
+    def _notify(self, events):
+        for callback in list(self._subscribers):
+            try:
+                callback(events)
+            except Exception as e:
+                logger.error(f"Board subscriber {callback!r} failed: {e}")
+
+    def board(self, category, timeframe):
+        """Доска пары (категория, таймфрейм) или None"""
+        return self._boards.get((category, timeframe))
+
+    def merged(self, timeframe_type):
+        """Слитый порядок выдачи для типа таймфрейма ('short'/'long') или None"""
+        return self._merged.get(timeframe_type)
+
+    @property
+    def version(self):
+        return self._version
+
+
+# Общее хранилище досок сканера
+signal_boards = SignalBoardStore()
@@ -9,6 +9,8 @@ import pandas as pd
 import yfinance as yf
 from datetime import datetime, timedelta
 
+from modules.indicators import compute_indicators
+
 logger = logging.getLogger(__name__)
 
 # Таймфреймы
@@ -25,28 +27,9 @@ LONG_TIMEFRAMES = ["1H", "4H", "1D", "1W"]
 def calculate_indicators(df):
     """Рассчитать технические индикаторы"""
     try:
-        df['EMA_20'] = df['Close'].ewm(span=20, adjust=False).mean()
-        df['EMA_50'] = df['Close'].ewm(span=50, adjust=False).mean()
-        df['EMA_100'] = df['Close'].ewm(span=100, adjust=False).mean()
-
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-
-        exp1 = df['Close'].ewm(span=12).mean()
-        exp2 = df['Close'].ewm(span=26).mean()
-        df['MACD'] = exp1 - exp2
-        df['MACD_Signal'] = df['MACD'].ewm(span=9).mean()
-
-        low_14 = df['Low'].rolling(14).min()
-        high_14 = df['High'].rolling(14).max()
-        df['Stoch_K'] = 100 * ((df['Close'] - low_14) / (high_14 - low_14))
-        df['Stoch_D'] = df['Stoch_K'].rolling(3).mean()
-
-        df['Resistance'] = df['High'].rolling(10).max()
-        df['Support'] = df['Low'].rolling(10).min()
+        columns = compute_indicators(df['High'], df['Low'], df['Close'])
+        for name, values in columns.items():
+            df[name] = values
 
         df = df.fillna(method='bfill').fillna(method='ffill')
         return df
@@ -0,0 +1,17 @@
+"""
+Timeframes module - границы свечей таймфреймов
+Не зависит от загрузки котировок и анализатора: используется и модульным
+анализатором, и bot/analyzer.py для срока жизни кэша сигналов.
+"""
+import time
+
+from modules.constants import TIMEFRAME_SECONDS
+
+
+def candle_close_time(timeframe, now=None):
+    """Время закрытия текущей свечи таймфрейма (epoch, свечи выровнены по UTC)"""
+    now = time.time() if now is None else now
+    seconds = TIMEFRAME_SECONDS.get(timeframe, 300)
+    # Недельные свечи начинаются в понедельник, эпоха Unix - в четверг
+    offset = 4 * 86400 if timeframe == "1W" else 0
+    return ((now - offset) // seconds + 1) * seconds + offset
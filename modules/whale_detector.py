@@ -0,0 +1,260 @@
+"""
+Whale Detector module - потоковая детекция аномального объёма (крупный игрок)
+Для каждой пары (символ, интервал) держится скользящее окно закрытых баров
+в индексируемом skip-списке: медиана и MAD считаются порядковыми статистиками,
+а каждый новый бар обновляет окно за O(log n) без пересчёта истории.
+"""
+import math
+import random
+import threading
+from collections import deque
+
+from modules.constants import WHALE_WINDOW, WHALE_Z_THRESHOLD
+
+# Коэффициент приведения MAD к стандартному отклонению нормального распределения
+MAD_SCALE = 1.4826
+
+
+def _kth_of_two(a, na, b, nb, k):
+    """k-й (с нуля) элемент объединения двух отсортированных последовательностей"""
+    lo = max(0, k + 1 - nb)
+    hi = min(k + 1, na)
+    while True:
+        i = (lo + hi) // 2
+        j = k + 1 - i
+        if i < na and j > 0 and b(j - 1) > a(i):
+            lo = i + 1
+        elif i > 0 and j < nb and a(i - 1) > b(j):
+            hi = i - 1
+        else:
+            left_a = a(i - 1) if i > 0 else -math.inf
+            left_b = b(j - 1) if j > 0 else -math.inf
+            return max(left_a, left_b)
+
+
+class _Node:
+    __slots__ = ('value', 'next', 'width')
+
+    def __init__(self, value, levels):
+        self.value = value
+        self.next = [None] * levels
+        # width[level] - сколько элементов перепрыгивает ссылка next[level]
+        self.width = [1] * levels
+
+
+class _IndexableSkiplist:
+    """
+    Отсортированный мультисет с доступом по позиции: вставка, удаление, s[i]
+    и bisect_left за O(log n) в среднем.
+    """
+
+    def __init__(self, expected_size):
+        self.size = 0
+        self.levels = int(1 + math.log2(max(expected_size, 2)))
+        self.tail = _Node(math.inf, 0)
+        self.head = _Node(None, self.levels)
+        self.head.next = [self.tail] * self.levels
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        node = self.head
+        i += 1
+        for level in reversed(range(self.levels)):
+            while node.width[level] <= i:
+                i -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def bisect_left(self, value):
+        """Число элементов меньше value"""
+        node = self.head
+        rank = 0
+        for level in reversed(range(self.levels)):
+            while node.next[level].value < value:
+                rank += node.width[level]
+                node = node.next[level]
+        return rank
+
+    def insert(self, value):
+        chain = [None] * self.levels
+        steps = [0] * self.levels
+        node = self.head
+        for level in reversed(range(self.levels)):
+            while node.next[level].value <= value:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        height = min(self.levels, 1 - int(math.log2(1.0 - random.random())))
+        new = _Node(value, height)
+        passed = 0
+        for level in range(height):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - passed
+            prev.width[level] = passed + 1
+            passed += steps[level]
+        for level in range(height, self.levels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, value):
+        chain = [None] * self.levels
+        node = self.head
+        for level in reversed(range(self.levels)):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target.value != value:
+            raise KeyError(value)
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), self.levels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+
+class RollingMedianMAD:
+    """Скользящие медиана и MAD по окну фиксированной длины"""
+
+    def __init__(self, window=WHALE_WINDOW):
+        self.window = window
+        self.values = deque()
+        self.sorted = _IndexableSkiplist(window)
+
+    def __len__(self):
+        return len(self.values)
+
+    def push(self, value):
+        """Добавить значение, вытеснив самое старое при заполненном окне"""
+        if len(self.values) == self.window:
+            self.sorted.remove(self.values.popleft())
+        self.values.append(value)
+        self.sorted.insert(value)
+
+    def median(self):
+        s = self.sorted
+        n = len(s)
+        if n == 0:
+            return math.nan
+        mid = n // 2
+        return s[mid] if n % 2 else (s[mid - 1] + s[mid]) / 2
+
+    def mad(self):
+        """Медиана |x - median|: отклонения слева и справа от медианы уже упорядочены"""
+        s = self.sorted
+        n = len(s)
+        if n == 0:
+            return math.nan
+        med = self.median()
+        split = s.bisect_left(med)
+
+        # Левые отклонения по возрастанию идут от split-1 к 0, правые - от split к концу
+        def left(i):
+            return med - s[split - 1 - i]
+
+        def right(i):
+            return s[split + i] - med
+
+        nl = split
+        nr = n - split
+        upper = _kth_of_two(left, nl, right, nr, n // 2)
+        if n % 2:
+            return upper
+        return (_kth_of_two(left, nl, right, nr, n // 2 - 1) + upper) / 2
+
+
+class _SeriesState:
+    """Окно закрытых баров одного ряда, метка последнего учтённого бара и его оценка"""
+
+    def __init__(self, window):
+        self.window = RollingMedianMAD(window)
+        self.last_closed = None
+        self.result = None
+
+
+class WhaleDetector:
+    """Детектор крупного игрока по робастному z-score объёма на ряд (символ, интервал)"""
+
+    def __init__(self, window=WHALE_WINDOW, threshold=WHALE_Z_THRESHOLD):
+        self.window = window
+        self.threshold = threshold
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def update(self, symbol, interval, volume):
+        """
+        Учесть новые бары серии объёма (pandas Series с индексом времени) и оценить
+        последний закрытый бар по окну предшествующих ему закрытых баров.
+        Формирующийся бар не оценивается: его объём ещё неполный. Пока новых
+        закрытых баров нет, возвращается прежняя оценка. None для инструментов без объёма.
+        """
+        if volume is None or len(volume) < 2:
+            return None
+
+        index = volume.index
+        values = volume.to_numpy(dtype=float)
+        key = (symbol, interval)
+
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = _SeriesState(self.window)
+
+            # Закрытые бары - все, кроме последнего; в окно идут только ещё не учтённые
+            last = len(values) - 2
+            start = max(0, last - self.window)
+            if state.last_closed is not None:
+                start = max(start, index.searchsorted(state.last_closed, side='right'))
+            if start > last:
+                return state.result
+
+            for i in range(start, last):
+                if values[i] == values[i]:
+                    state.window.push(values[i])
+            # Последний закрытый бар оценивается до того, как попадёт в своё окно
+            state.result = self._score(state.window, values[last])
+            if values[last] == values[last]:
+                state.window.push(values[last])
+            state.last_closed = index[last]
+            return state.result
+
+    def _score(self, window, current):
+        if len(window) < window.window // 2 or current != current:
+            return None
+        median = window.median()
+        # Форекс с Yahoo отдаёт нулевой объём - оценивать нечего
+        if median <= 0:
+            return None
+
+        scale = MAD_SCALE * window.mad()
+        if scale > 0:
+            z_score = (current - median) / scale
+        else:
+            # Постоянный объём в окне: любое превышение медианы - аномалия
+            z_score = math.inf if current > median else 0.0
+
+        return {
+            'z_score': z_score,
+            'median': median,
+            'whale': z_score >= self.threshold,
+        }
+
+    def reset(self, symbol=None, interval=None):
+        """Сбросить состояние одного ряда или всех рядов"""
+        with self._lock:
+            if symbol is None:
+                self._states.clear()
+            else:
+                self._states.pop((symbol, interval), None)
+
+
+# Общий детектор для всех сканирований
+whale_detector = WhaleDetector()
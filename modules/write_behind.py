@@ -0,0 +1,129 @@
+"""
+Write Behind module - групповая фиксация записей в SQLite
+Мутации ставятся в очередь и выполняются фоновым потоком одной транзакцией:
+раз в несколько миллисекунд или по накоплении пакета. Вызывающий код не
+ждёт fsync; чтения, которым нужны свежие данные, ждут барьер очереди.
+Каждая операция получает Future: результат или ошибку после фиксации.
+"""
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from modules.constants import WRITE_BATCH_SIZE, WRITE_BATCH_DELAY_MS
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """
+    Очередь отложенной записи поверх write_cursor базы.
+    Операция - callable(cursor); если она возвращает callable, он вызывается
+    после успешной фиксации пакета (учёт в индексах в памяти и т.п.), иначе
+    возвращённое значение становится результатом Future операции.
+    """
+
+    def __init__(self, write_cursor, max_batch=WRITE_BATCH_SIZE, max_delay=WRITE_BATCH_DELAY_MS / 1000,
+                 after_commit=None):
+        self.write_cursor = write_cursor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.after_commit = after_commit
+        self._ops = collections.deque()
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._committed = 0
+        self._closed = False
+        self._thread = None
+
+    def submit(self, op):
+        """Поставить операцию в очередь; Future завершается после фиксации (ошибкой, если операция не записана)"""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write-behind queue is closed")
+            self._ops.append((op, future))
+            self._submitted += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='db-write-behind', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return future
+
+    def barrier(self, timeout=None):
+        """Дождаться фиксации всех поставленных операций"""
+        with self._cond:
+            target = self._submitted
+            return self._cond.wait_for(lambda: self._committed >= target, timeout)
+
+    @property
+    def pending(self):
+        return self._submitted - self._committed
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._ops or self._closed)
+                if not self._ops:
+                    return
+                # Короткое окно на накопление пакета
+                deadline = time.monotonic() + self.max_delay
+                while len(self._ops) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._ops.popleft() for _ in range(min(len(self._ops), self.max_batch))]
+
+            self._execute(batch)
+            with self._cond:
+                self._committed += len(batch)
+                self._cond.notify_all()
+
+    def _execute(self, batch):
+        # (future, результат) зафиксированных операций; Future завершаются только после commit
+        done = []
+        try:
+            with self.write_cursor() as cursor:
+                for op, future in batch:
+                    done.append((future, op(cursor)))
+        except Exception as e:
+            # Пакет откатан целиком - повторяем по одной, чтобы ошибка не потеряла соседние записи
+            logger.error(f"Write-behind batch of {len(batch)} failed, retrying one by one: {e}")
+            done = []
+            for op, future in batch:
+                try:
+                    with self.write_cursor() as cursor:
+                        result = op(cursor)
+                    done.append((future, result))
+                except Exception as op_error:
+                    logger.error(f"Write-behind operation failed: {op_error}")
+                    future.set_exception(op_error)
+
+        callbacks = []
+        for future, result in done:
+            if callable(result):
+                callbacks.append(result)
+                result = None
+            future.set_result(result)
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Write-behind commit callback failed: {e}")
+        if self.after_commit:
+            try:
+                self.after_commit()
+            except Exception as e:
+                logger.error(f"Write-behind after-commit hook failed: {e}")
+
+    def close(self, timeout=None):
+        """Зафиксировать оставшиеся операции и остановить фоновый поток"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
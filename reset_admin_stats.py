@@ -48,6 +48,7 @@ cursor.execute('''
 
 # Удалить всю историю сигналов админа
 cursor.execute('DELETE FROM signal_history WHERE user_id = ?', (admin_id,))
+cursor.execute('DELETE FROM user_signal_stats WHERE user_id = ?', (admin_id,))
 
 conn.commit()
 
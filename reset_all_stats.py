@@ -19,6 +19,7 @@ def reset_all_stats():
         # 1. Удалить всю историю сигналов
         cursor.execute('DELETE FROM signal_history')
         deleted_signals = cursor.rowcount
+        cursor.execute('DELETE FROM user_signal_stats')
         print(f"✅ Удалено {deleted_signals} сигналов из истории")
         
         # 2. Очистить статистику производительности активов
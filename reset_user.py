@@ -25,6 +25,7 @@ def reset_user(user_id):
     # Удалить все данные пользователя
     cursor.execute('DELETE FROM users WHERE user_id = ?', (user_id,))
     cursor.execute('DELETE FROM signal_history WHERE user_id = ?', (user_id,))
+    cursor.execute('DELETE FROM user_signal_stats WHERE user_id = ?', (user_id,))
     
     conn.commit()
     
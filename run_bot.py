@@ -111,7 +111,7 @@ def main():
     print("-" * 50)
     
     try:
-        from bot.bot import main as run_bot
+        from main import main as run_bot
         run_bot()
     except KeyboardInterrupt:
         print("\n👋 Бот остановлен пользователем")
@@ -31,17 +31,17 @@ class StrategyAnalyzer:
         return df
     
     def get_market_patterns(self):
-        """Анализ паттернов из market_history"""
+        """Анализ паттернов из market_history (дневные корзины учитываются с весом samples)"""
         query = """
         SELECT 
             asset_symbol,
             timeframe,
             trend,
             signal_generated,
-            AVG(volatility) as avg_volatility,
-            AVG(confidence) as avg_confidence,
-            COUNT(*) as total_records,
-            SUM(CASE WHEN whale_detected = 1 THEN 1 ELSE 0 END) as whale_count
+            1.0 * SUM(volatility * samples) / SUM(CASE WHEN volatility IS NOT NULL THEN samples END) as avg_volatility,
+            1.0 * SUM(confidence * samples) / SUM(CASE WHEN confidence IS NOT NULL THEN samples END) as avg_confidence,
+            SUM(samples) as total_records,
+            SUM(CASE WHEN whale_detected = 1 THEN samples ELSE 0 END) as whale_count
         FROM market_history
         GROUP BY asset_symbol, timeframe, trend, signal_generated
         HAVING total_records >= 3
@@ -71,10 +71,10 @@ class StrategyAnalyzer:
         market_query = """
         SELECT 
             timeframe,
-            AVG(volatility) as avg_volatility,
-            AVG(confidence) as avg_confidence,
-            COUNT(*) as scan_count,
-            SUM(CASE WHEN whale_detected = 1 THEN 1 ELSE 0 END) as whale_detections
+            1.0 * SUM(volatility * samples) / SUM(CASE WHEN volatility IS NOT NULL THEN samples END) as avg_volatility,
+            1.0 * SUM(confidence * samples) / SUM(CASE WHEN confidence IS NOT NULL THEN samples END) as avg_confidence,
+            SUM(samples) as scan_count,
+            SUM(CASE WHEN whale_detected = 1 THEN samples ELSE 0 END) as whale_detections
         FROM market_history
         GROUP BY timeframe
         """
@@ -90,9 +90,9 @@ class StrategyAnalyzer:
         SELECT 
             signal_generated as direction,
             trend,
-            COUNT(*) as count,
-            AVG(confidence) as avg_confidence,
-            AVG(volatility) as avg_volatility
+            SUM(samples) as count,
+            1.0 * SUM(confidence * samples) / SUM(CASE WHEN confidence IS NOT NULL THEN samples END) as avg_confidence,
+            1.0 * SUM(volatility * samples) / SUM(CASE WHEN volatility IS NOT NULL THEN samples END) as avg_volatility
         FROM market_history
         WHERE signal_generated IN ('CALL', 'PUT')
         GROUP BY signal_generated, trend
@@ -102,7 +102,7 @@ class StrategyAnalyzer:
         return df
     
     def get_time_patterns(self):
-        """Временные паттерны (лучшие часы для торговли)"""
+        """Временные паттерны (лучшие часы для торговли) - только по несвёрнутым снимкам"""
         query = """
         SELECT 
             strftime('%H', timestamp) as hour,
@@ -111,6 +111,7 @@ class StrategyAnalyzer:
             AVG(volatility) as avg_volatility,
             SUM(CASE WHEN whale_detected = 1 THEN 1 ELSE 0 END) as whale_count
         FROM market_history
+        WHERE bucket IS NULL
         GROUP BY hour
         ORDER BY hour
         """
@@ -127,9 +128,9 @@ class StrategyAnalyzer:
                 WHEN volatility < 1.5 THEN 'High (0.7-1.5%)'
                 ELSE 'Very High (> 1.5%)'
             END as volatility_range,
-            COUNT(*) as count,
-            AVG(confidence) as avg_confidence,
-            AVG(score) as avg_score
+            SUM(samples) as count,
+            1.0 * SUM(confidence * samples) / SUM(CASE WHEN confidence IS NOT NULL THEN samples END) as avg_confidence,
+            1.0 * SUM(score * samples) / SUM(CASE WHEN score IS NOT NULL THEN samples END) as avg_score
         FROM market_history
         GROUP BY volatility_range
         ORDER BY avg_confidence DESC
@@ -180,10 +181,10 @@ class StrategyAnalyzer:
         query = """
         SELECT 
             whale_detected,
-            COUNT(*) as count,
-            AVG(confidence) as avg_confidence,
-            AVG(score) as avg_score,
-            AVG(volatility) as avg_volatility
+            SUM(samples) as count,
+            1.0 * SUM(confidence * samples) / SUM(CASE WHEN confidence IS NOT NULL THEN samples END) as avg_confidence,
+            1.0 * SUM(score * samples) / SUM(CASE WHEN score IS NOT NULL THEN samples END) as avg_score,
+            1.0 * SUM(volatility * samples) / SUM(CASE WHEN volatility IS NOT NULL THEN samples END) as avg_volatility
         FROM market_history
         GROUP BY whale_detected
         """